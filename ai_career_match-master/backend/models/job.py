@@ -17,6 +17,9 @@ class Job(JobBase):
         from_attributes = True
         extra = "ignore"  # ← IMPORTANT: Ignore les champs supplémentaires
 
+class JobUpsert(JobBase):
+    job_id: Optional[int] = None  # Absent: a new id is assigned
+
 class JobMatch(Job):
     match_score: float
     linkedin_url: str
@@ -25,6 +28,16 @@ class JobSearchResponse(BaseModel):
     query: str
     top_k: int
     results: List[JobMatch]
+    filters: Optional[Dict] = None
+    facets: Optional[Dict] = None  # counts over the jobs matching the filters
+    corrected_query: Optional[str] = None  # set when spelling corrections were applied
+    corrections: List[Dict] = []
+
+class SimilarJobsResponse(BaseModel):
+    job_id: int
+    job_title: str
+    top_k: int
+    results: List[JobMatch]
 
 class SearchLinkResponse(BaseModel):
     job_title: str
@@ -2,19 +2,25 @@
 Assistant Routes
 Basic assistant for job search with pattern-based query analysis
 """
+import os
 from typing import Dict
-from fastapi import APIRouter, HTTPException, Query
-from routes.job_routes import job_matcher
+from fastapi import APIRouter, Depends, HTTPException, Query
+from routes.job_routes import current_matcher
+from services.matcher import JobMatcher
 from services.assistant import career_assistant as simple_assistant
-from utils.link_generator import LinkGenerator
+from services.query_planner import DEFAULT_BUDGET_MS, QueryPlanner
 from models.job import JobMatch
 
 router = APIRouter(prefix="/api", tags=["assistant"])
 
+# Latency budget of the assistant's search cascade in milliseconds (0: no budget)
+latency_budget_ms = float(os.getenv("ASSISTANT_LATENCY_BUDGET_MS", str(DEFAULT_BUDGET_MS)))
+
 
 @router.post("/assistant", response_model=Dict)
 async def career_assistant_endpoint(
-    message: str = Query(..., description="Message en langage naturel pour l'assistant")
+    message: str = Query(..., description="Message en langage naturel pour l'assistant"),
+    matcher: JobMatcher = Depends(current_matcher)
 ):
     """
     Basic Assistant - Pattern-based job search assistant.
@@ -22,99 +28,39 @@ async def career_assistant_endpoint(
     Uses simple pattern matching to understand user queries and generate search results.
     Returns job matches with links to external platforms.
     """
-    if not job_matcher:
-        raise HTTPException(status_code=500, detail="Job matcher not initialized")
-    
+    # matcher: corpus chosen with ?corpus=, the same one for the whole request even if a reload swaps it
     try:
         # Analyze message with pattern-based assistant
         analysis = simple_assistant.analyze_query(message)
         
-        # Try multiple queries in cascade
-        all_matches = []
-        tried_queries = []
-        
-        # 1. Main query
+        # Cascade planned up front: hopeless stages skipped, the rest batched within the latency budget
+        planner = QueryPlanner(matcher, budget_ms=latency_budget_ms)
         search_query = analysis['search_query'] or message
-        tried_queries.append(search_query)
-        
-        try:
-            matches = job_matcher.search_jobs(search_query, top_k=10)
-            all_matches.extend(matches)
-            print(f"✅ Main query found: {len(matches)} results")
-        except Exception as e:
-            print(f"⚠️ Error with main query: {e}")
-        
-        # 2. Try fallbacks if not enough results
-        if len(all_matches) < 5 and analysis.get('fallback_queries'):
-            for fallback_query in analysis.get('fallback_queries', [])[:3]:
-                tried_queries.append(fallback_query)
-                try:
-                    fallback_matches = job_matcher.search_jobs(fallback_query, top_k=5)
-                    existing_indices = {idx for idx, _ in all_matches}
-                    for idx, score in fallback_matches:
-                        if idx not in existing_indices:
-                            all_matches.append((idx, score))
-                    print(f"✅ Fallback '{fallback_query}': {len(fallback_matches)} results")
-                except Exception as e:
-                    print(f"⚠️ Error with fallback '{fallback_query}': {e}")
-        
-        # 3. If still nothing, try very general search
-        if len(all_matches) == 0:
-            general_queries = ["technologie", "informatique", "digital"]
-            for gen_query in general_queries:
-                tried_queries.append(gen_query)
-                try:
-                    gen_matches = job_matcher.search_jobs(gen_query, top_k=3)
-                    all_matches.extend(gen_matches)
-                    if gen_matches:
-                        print(f"✅ General search '{gen_query}': {len(gen_matches)} results")
-                        break
-                except Exception as e:
-                    print(f"⚠️ Error with general search: {e}")
-        
-        # Sort by score and limit to at least 8 results
-        all_matches.sort(key=lambda x: x[1], reverse=True)
-        # Ensure minimum 8 results, but try to get more if available
-        min_results = 8
-        top_matches = all_matches[:max(min_results, len(all_matches))]
-        
-        # If we still don't have 8, try to get more with broader search
-        if len(top_matches) < min_results:
-            try:
-                broader_matches = job_matcher.search_jobs(message, top_k=min_results * 2)
-                existing_indices = {idx for idx, _ in top_matches}
-                for idx, score in broader_matches:
-                    if idx not in existing_indices and len(top_matches) < min_results:
-                        top_matches.append((idx, score))
-                top_matches.sort(key=lambda x: x[1], reverse=True)
-            except Exception as e:
-                print(f"⚠️ Error getting additional results: {e}")
+        # Typos would send the cascade to the fallbacks: correct against the index vocabulary first
+        with planner.trace.stage("spelling"):
+            search_query, corrections = matcher.correct_query(search_query)
+            corrected_message, message_corrections = matcher.correct_query(message)
+        seen = {(c["original"], c["corrected"]) for c in corrections}
+        corrections += [c for c in message_corrections if (c["original"], c["corrected"]) not in seen]
+        if corrections:
+            print(f"✏️ Spelling corrections: {[(c['original'], c['corrected']) for c in corrections]}")
+        fallback_queries = analysis.get('fallback_queries', [])[:3]
+        stages = planner.plan(search_query, fallback_queries, corrected_message)
+        all_matches, top_matches, tried_queries = planner.execute(stages)
         
         print(f"📊 Total queries tried: {tried_queries}")
-        print(f"🎯 Final results: {len(top_matches)} jobs (minimum: {min_results})")
+        print(f"🎯 Final results: {len(top_matches)} jobs (minimum: {planner.min_results})")
         
-        # Prepare results
+        # Prepare results: links precomputed with the index, read once per job
         jobs_results = []
+        jobs_with_all_urls = []
         for idx, score in top_matches:
             try:
-                job_data = job_matcher.get_job_by_index(idx)
-                job_id = str(job_data.get('job_id', idx + 1))
-                
-                # Generate all URLs with Stagiaires.ma as primary
-                all_urls = LinkGenerator.generate_all_urls(
-                    job_data.get('job_title', search_query),
-                    job_id=job_id
-                )
+                job_data = matcher.get_job_by_index(idx)
+                all_urls = matcher.job_links(idx, search_query)
                 
                 job_match = JobMatch(
-                    job_id=job_data.get('job_id', idx + 1),
-                    job_title=job_data.get('job_title', f'Poste {idx + 1}'),
-                    category=job_data.get('category', 'Général'),
-                    description=job_data.get('description', 'Description non disponible'),
-                    required_skills=job_data.get('required_skills', 'Compétences variées'),
-                    recommended_courses=job_data.get('recommended_courses', ''),
-                    avg_salary_mad=job_data.get('avg_salary_mad', 'Non spécifié'),
-                    demand_level=job_data.get('demand_level', 'Medium'),
+                    **job_data,
                     match_score=round(score, 4),
                     linkedin_url=all_urls["linkedin_url"]
                 )
@@ -123,25 +69,17 @@ async def career_assistant_endpoint(
             except Exception as job_error:
                 print(f"⚠️ Error processing job {idx}: {job_error}")
                 continue
-        
-        # Convert to dictionaries and add all URLs
-        jobs_with_all_urls = []
-        for i, job in enumerate(jobs_results):
-            job_dict = job.dict()
-            if i < len(top_matches):
-                job_data = job_matcher.get_job_by_index(top_matches[i][0])
-                job_id = str(job_data.get('job_id', top_matches[i][0] + 1))
-                all_urls = LinkGenerator.generate_all_urls(
-                    job_data.get('job_title', search_query),
-                    job_id=job_id
-                )
-                job_dict["all_search_urls"] = all_urls
-                # Add primary Stagiaires.ma URL
-                job_dict["stagiaires_url"] = all_urls.get("stagiaires_url", all_urls.get("linkedin_url"))
+            
+            job_dict = job_match.dict()
+            job_dict["all_search_urls"] = all_urls
+            # Add primary Stagiaires.ma URL
+            job_dict["stagiaires_url"] = all_urls.get("stagiaires_url", all_urls.get("linkedin_url"))
             jobs_with_all_urls.append(job_dict)
         
         # Generate assistant response
-        assistant_response = simple_assistant.generate_response(message, jobs_with_all_urls)
+        assistant_response = simple_assistant.generate_response(message, jobs_with_all_urls, matcher)
+        
+        assistant_response["corrections"] = corrections
         
         # Add debug metadata
         assistant_response["debug_info"] = {
@@ -149,6 +87,8 @@ async def career_assistant_endpoint(
             "total_candidates_found": len(all_matches),
             "returned_jobs": len(jobs_results)
         }
+        # Stages run or skipped, with the time spent in each part of the search
+        assistant_response["query_plan"] = planner.report(stages)
         
         return assistant_response
         
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from typing import List, Optional,Dict
 import os
+import hmac
+import numpy as np
 from services.assistant import career_assistant
 import json
-from models.job import Job, JobMatch, JobSearchResponse, SearchLinkResponse
-from services.matcher import JobMatcher
+from models.job import Job, JobMatch, JobSearchResponse, SearchLinkResponse, JobUpsert, SimilarJobsResponse
+from services.matcher import JobMatcher, SCORING_MODES
+from services.matcher_provider import MatcherProvider
+from services.corpus_registry import CorpusRegistry, CorpusUnavailable, discover_corpora
+from services.search.bm25f import parse_field_weights
+from services.search.facets import normalize_filters
+from services.search.trace import SearchTrace
 from utils.link_generator import LinkGenerator
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from services.builder.generator_standard import generate_structured_resume
 import json
 # Note: Assistant endpoints moved to assistant_routes.py and smart_assistant_routes.py
@@ -14,108 +22,170 @@ import json
 current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 csv_path = os.path.join(current_dir, "data", "jobs_morocco.csv")
 
+# Background merge of incremental upserts/deletes (0 disables it, POST /jobs/admin/compact still works)
+compaction_interval = float(os.getenv("JOB_INDEX_COMPACTION_INTERVAL", "300"))
+# Serving matcher, swapped on reload: other routes import it, requests use job_matcher.current()
+job_matcher = MatcherProvider(lambda: JobMatcher(csv_path), csv_path, compaction_interval)
+
 try:
-    job_matcher = JobMatcher(csv_path)
+    job_matcher.load()
     print("✅ Job matcher initialized successfully!")
 except Exception as e:
     print(f"❌ Error initializing job matcher: {e}")
-    job_matcher = None
+
+# Reload when the CSV changes (0 disables the watcher, POST /jobs/admin/reload still works)
+reload_watch_interval = float(os.getenv("JOB_RELOAD_WATCH_INTERVAL", "10"))
+if reload_watch_interval > 0:
+    job_matcher.start_watcher(reload_watch_interval)
+
+# Other corpora (one CSV / JSONL per corpus in data/corpora, or JOB_CORPORA="name=path,..."),
+# loaded on first request with ?corpus=name; job_matcher stays the default corpus
+corpus_registry = CorpusRegistry(
+    discover_corpora(os.getenv("JOB_CORPORA_DIR", os.path.join(current_dir, "data", "corpora")), os.getenv("JOB_CORPORA", "")),
+    default=(os.getenv("JOB_DEFAULT_CORPUS", "morocco"), job_matcher),
+    memory_budget_mb=float(os.getenv("JOB_CORPUS_MEMORY_MB", "1024")),
+    idle_seconds=float(os.getenv("JOB_CORPUS_IDLE_SECONDS", "1800")),
+    compaction_interval=compaction_interval,
+    watch_interval=reload_watch_interval,
+    # A corpus whose feed fails to load answers 503 without reloading until then (or until the feed changes)
+    retry_seconds=float(os.getenv("JOB_CORPUS_RETRY_SECONDS", "60"))
+)
+corpus_registry.start_janitor()
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-@router.get("/all", response_model=List[Job])
-async def get_all_jobs():
-    """Get all available jobs"""
-    if not job_matcher:
+
+async def serving_matcher(
+    corpus: Optional[str] = Query(None, description="Job corpus (default: the Moroccan jobs), see /jobs/corpora")
+) -> JobMatcher:
+    """Matcher serving the corpus (admin endpoints write to it)"""
+    try:
+        # Loaded corpus: answered on the event loop, only a first load goes to the thread pool
+        matcher = corpus_registry.get(corpus, load=False) or await run_in_threadpool(corpus_registry.get, corpus)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus '{corpus}', expected one of {corpus_registry.names()}")
+    except CorpusUnavailable as e:
+        raise corpus_unavailable(e)
+    if matcher is None:
         raise HTTPException(status_code=500, detail="Job matcher not initialized")
+    return matcher
+
+
+def corpus_unavailable(error: CorpusUnavailable) -> HTTPException:
+    """503 for a corpus whose feed failed to load, with the delay before the next attempt"""
+    return HTTPException(status_code=503, detail=str(error),
+                         headers={"Retry-After": str(max(1, int(error.retry_in + 0.999)))})
+
+
+async def current_matcher(matcher: JobMatcher = Depends(serving_matcher)) -> JobMatcher:
+    """
+    Matcher for the whole request, pinned to one index snapshot: a reload swapping in a new index,
+    an upsert or a compaction meanwhile does not affect it
+    """
+    return matcher.pinned()
+
+
+def search_filters(
+    category: Optional[List[str]] = Query(None, description="Filter by category (repeatable)"),
+    demand_level: Optional[List[str]] = Query(None, description="Filter by demand level: High, Medium, Low (repeatable)"),
+    salary_min: Optional[float] = Query(None, ge=0, description="Jobs whose salary range reaches at least this amount (MAD)"),
+    salary_max: Optional[float] = Query(None, ge=0, description="Jobs whose salary range starts at most at this amount (MAD)")
+) -> Optional[dict]:
+    """Facet filter query parameters shared by the search endpoints"""
+    return normalize_filters(category, demand_level, salary_min, salary_max)
+
+
+# Jobs per chunk written to the response stream
+STREAM_CHUNK_JOBS = 500
+
+
+def _stream_json_array(payloads: List[bytes], rows: np.ndarray):
+    yield b"["
+    for i in range(0, len(rows), STREAM_CHUNK_JOBS):
+        yield (b"," if i else b"") + b",".join(payloads[row] for row in rows[i:i + STREAM_CHUNK_JOBS])
+    yield b"]"
+
+
+def _stream_ndjson(payloads: List[bytes], rows: np.ndarray):
+    for i in range(0, len(rows), STREAM_CHUNK_JOBS):
+        yield b"".join(payloads[row] + b"\n" for row in rows[i:i + STREAM_CHUNK_JOBS])
+
+
+@router.get("/all")
+async def get_all_jobs(
+    cursor: Optional[int] = Query(None, ge=0, description="Start after this job_id (next_cursor of the previous page)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; without limit and cursor the whole catalogue is streamed"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json, or ndjson (one job per line)"),
+    matcher: JobMatcher = Depends(current_matcher)
+):
+    """
+    Get all available jobs, ordered by job_id.
+    - no cursor/limit: JSON array of all jobs, streamed
+    - cursor and/or limit: one page {"jobs": [...], "next_cursor": ..., "count": ...}
+    - format=ndjson: one job per line, next cursor in the X-Next-Cursor header
+    Jobs are pre-serialized at index load, nothing is converted per request.
+    """
+    ids, rows, payloads = matcher.job_listing()
+    start = int(np.searchsorted(ids, cursor, side="right")) if cursor is not None else 0
+    end = len(ids) if limit is None else min(start + limit, len(ids))
+    next_cursor = int(ids[end - 1]) if start < end < len(ids) else None
+    page_rows = rows[start:end]
     
-    try:
-        print("🔍 Debug: Getting all jobs...")
-        jobs_data = job_matcher.get_all_jobs()
-        print(f"✅ Debug: Got {len(jobs_data)} raw jobs")
-        
-        # Debug: Vérifier le premier élément
-        if jobs_data:
-            first_job = jobs_data[0]
-            print(f"🔍 First job keys: {list(first_job.keys())}")
-            print(f"🔍 First job values: {first_job}")
-        
-        # Convertir en objets Pydantic avec gestion d'erreur
-        jobs = []
-        for i, job_dict in enumerate(jobs_data):
-            try:
-                # Nettoyer les données si nécessaire
-                cleaned_job = {
-                    'job_id': int(job_dict.get('job_id', 0)),
-                    'job_title': str(job_dict.get('job_title', '')),
-                    'category': str(job_dict.get('category', '')),
-                    'description': str(job_dict.get('description', '')),
-                    'required_skills': str(job_dict.get('required_skills', '')),
-                    'recommended_courses': str(job_dict.get('recommended_courses', '')),
-                    'avg_salary_mad': str(job_dict.get('avg_salary_mad', '')),
-                    'demand_level': str(job_dict.get('demand_level', ''))
-                }
-                job_obj = Job(**cleaned_job)
-                jobs.append(job_obj)
-            except Exception as e:
-                print(f"❌ Error processing job {i}: {e}")
-                print(f"🔍 Problematic job data: {job_dict}")
-                continue
-        
-        print(f"✅ Successfully processed {len(jobs)} jobs")
-        return jobs
-        
-    except Exception as e:
-        print(f"❌ Error in /jobs/all: {str(e)}")
-        import traceback
-        print(f"🔍 Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    if format == "ndjson":
+        return StreamingResponse(_stream_ndjson(payloads, page_rows), media_type="application/x-ndjson", headers=headers)
+    if cursor is None and limit is None:
+        return StreamingResponse(_stream_json_array(payloads, page_rows), media_type="application/json")
     
-
-        return {"error": str(e)}    
+    body = b'{"jobs":[' + b",".join(payloads[row] for row in page_rows) + b'],"next_cursor":' \
+        + json.dumps(next_cursor).encode() + b',"count":' + str(len(page_rows)).encode() + b"}"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/search", response_model=JobSearchResponse)
 async def search_jobs(
     query: str = Query(..., description="Job search query"),
-    top_k: int = Query(5, description="Number of top matches to return", ge=1, le=20)
+    top_k: int = Query(5, description="Number of top matches to return", ge=1, le=20),
+    scoring: Optional[str] = Query(None, description="Scoring mode: tfidf, bm25f or lsa (default: server config)"),
+    field_weights: Optional[str] = Query(None, description="BM25F field weights, e.g. job_title:3,required_skills:2,description:1,category:1"),
+    filters: Optional[dict] = Depends(search_filters),
+    spell_check: bool = Query(True, description="Correct misspelled terms against the index vocabulary"),
+    matcher: JobMatcher = Depends(current_matcher)
 ):
     """Search for jobs matching the query"""
-    if not job_matcher:
-        raise HTTPException(status_code=500, detail="Job matcher not initialized")
-    
     if not query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
+    if scoring and scoring not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring mode, expected one of {list(SCORING_MODES)}")
+    try:
+        weights = parse_field_weights(field_weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         print(f"🔍 Searching for: '{query}' with top_k={top_k}")
         
+        # Misspelled terms would match nothing: search with the corrected query
+        search_query, corrections = matcher.correct_query(query) if spell_check else (query, [])
+        if corrections:
+            print(f"✏️ Corrected query: '{search_query}'")
+        
         # Search for matching jobs
-        matches = job_matcher.search_jobs(query, top_k)
+        matches = matcher.search_jobs(search_query, top_k, scoring=scoring, field_weights=weights, filters=filters)
         print(f"✅ Found {len(matches)} matches")
         
         # Prepare results
         results = []
         for idx, score in matches:
             try:
-                job_data = job_matcher.get_job_by_index(idx)
-                print(f"🔍 Processing job {idx}: {job_data.get('job_title', 'Unknown')}")
-                
-                # Debug: print all available keys
-                print(f"🔍 Available keys: {list(job_data.keys())}")
+                job_data = matcher.get_job_by_index(idx)
                 
-                # Generate LinkedIn URL
-                linkedin_url = LinkGenerator.generate_linkedin_url(job_data.get('job_title', query))
+                # LinkedIn URL precomputed with the index
+                linkedin_url = matcher.job_links(idx, query)["linkedin_url"]
                 
-                # Create job match result with safe field access
+                # Record view straight into the response model (every column is always present)
                 job_match = JobMatch(
-                    job_id=job_data.get('job_id', idx + 1),
-                    job_title=job_data.get('job_title', f'Poste {idx + 1}'),
-                    category=job_data.get('category', 'Général'),
-                    description=job_data.get('description', f'Poste correspondant à la recherche: {query}'),
-                    required_skills=job_data.get('required_skills', 'Compétences variées'),
-                    recommended_courses=job_data.get('recommended_courses', 'Formations adaptées au poste'),
-                    avg_salary_mad=job_data.get('avg_salary_mad', '5000-10000'),
-                    demand_level=job_data.get('demand_level', 'Medium'),
+                    **job_data,
                     match_score=round(score, 4),
                     linkedin_url=linkedin_url
                 )
@@ -129,7 +199,11 @@ async def search_jobs(
         return JobSearchResponse(
             query=query,
             top_k=top_k,
-            results=results
+            results=results,
+            filters=filters,
+            facets=matcher.facet_counts(filters),
+            corrected_query=search_query if corrections else None,
+            corrections=corrections
         )
         
     except Exception as e:
@@ -138,6 +212,94 @@ async def search_jobs(
         print(f"🔍 Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
+@router.get("/search/explain")
+async def explain_search(
+    query: str = Query(..., description="Job search query"),
+    top_k: int = Query(5, description="Number of top matches to explain", ge=1, le=20),
+    scoring: Optional[str] = Query(None, description="Scoring mode: tfidf, bm25f or lsa (default: server config)"),
+    field_weights: Optional[str] = Query(None, description="BM25F field weights, e.g. job_title:3,required_skills:2,description:1,category:1"),
+    filters: Optional[dict] = Depends(search_filters),
+    spell_check: bool = Query(True, description="Correct misspelled terms against the index vocabulary"),
+    matcher: JobMatcher = Depends(current_matcher)
+):
+    """
+    Same search as /jobs/search (result cache bypassed), with the per-term / per-field
+    score contributions of each hit and the time spent in each stage
+    """
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    if scoring and scoring not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring mode, expected one of {list(SCORING_MODES)}")
+    try:
+        weights = parse_field_weights(field_weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    trace = SearchTrace()
+    with trace.stage("spelling"):
+        search_query, corrections = matcher.correct_query(query) if spell_check else (query, [])
+    matches = matcher.search_jobs(search_query, top_k, scoring=scoring, field_weights=weights,
+                                  filters=filters, trace=trace)
+    with trace.stage("hydration"):
+        records = [matcher.get_job_by_index(idx).to_dict() for idx, _ in matches]
+    with trace.stage("link_generation"):
+        links = [matcher.job_links(idx, query)["linkedin_url"] for idx, _ in matches]
+    # Not part of the search itself: timed separately, outside the total
+    explain_trace = SearchTrace()
+    with explain_trace.stage("explain"):
+        results = [
+            {
+                **record,
+                "match_score": round(score, 4),
+                "linkedin_url": link,
+                "explanation": matcher.explain(search_query, idx, scoring=scoring, field_weights=weights),
+            }
+            for (idx, score), record, link in zip(matches, records, links)
+        ]
+    
+    return {
+        "query": query,
+        "corrected_query": search_query if corrections else None,
+        "corrections": corrections,
+        "scoring": scoring or ("bm25f" if weights else matcher.scoring),
+        "search_backend": matcher.backend,
+        "filters": filters,
+        "results": results,
+        "timings_ms": trace.as_dict(),
+        "explain_ms": explain_trace.as_dict()["explain"],
+    }
+
+@router.get("/suggest")
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(8, description="Number of suggestions", ge=1, le=20),
+    matcher: JobMatcher = Depends(current_matcher)
+):
+    """Typeahead: job titles, skills and categories starting with the prefix (any word), most in demand first"""
+    return {"prefix": prefix, "suggestions": matcher.suggest(prefix, limit)}
+
+@router.get("/{job_id}/similar", response_model=SimilarJobsResponse)
+async def get_similar_jobs(
+    job_id: int,
+    top_k: int = Query(5, description="Number of similar jobs to return", ge=1, le=20),
+    matcher: JobMatcher = Depends(current_matcher)
+):
+    """Jobs most similar to a posting ("more like this"), read from the precomputed neighbor table"""
+    job = matcher.get_job_by_id(job_id)
+    matches = matcher.similar_jobs(job_id, top_k) if job is not None else None
+    if matches is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    results = []
+    for idx, score in matches:
+        job_data = matcher.get_job_by_index(idx)
+        results.append(JobMatch(
+            **job_data,
+            match_score=round(score, 4),
+            linkedin_url=matcher.job_links(idx)["linkedin_url"]
+        ))
+    return SimilarJobsResponse(job_id=job_id, job_title=job['job_title'], top_k=top_k, results=results)
+
 @router.get("/{job_title}/search-link", response_model=SearchLinkResponse)
 async def get_job_search_link(job_title: str):
     """Generate external job search links for a specific job title"""
@@ -152,35 +314,107 @@ async def get_job_search_link(job_title: str):
     )
 
 @router.get("/categories")
-async def get_categories():
+async def get_categories(matcher: JobMatcher = Depends(current_matcher)):
     """Get all available job categories"""
-    if not job_matcher:
-        raise HTTPException(status_code=500, detail="Job matcher not initialized")
-    
-    categories = job_matcher.get_categories()
+    categories = matcher.get_categories()
     return {"categories": categories}
 
+@router.get("/facets")
+async def get_facets(filters: Optional[dict] = Depends(search_filters), matcher: JobMatcher = Depends(current_matcher)):
+    """Category / demand level counts and salary bounds of the jobs matching the filters"""
+    return {"filters": filters, "facets": matcher.facet_counts(filters)}
+
 @router.get("/category/{category_name}")
-async def get_jobs_by_category(category_name: str):
+async def get_jobs_by_category(category_name: str, matcher: JobMatcher = Depends(current_matcher)):
     """Get jobs by category"""
-    if not job_matcher:
-        raise HTTPException(status_code=500, detail="Job matcher not initialized")
-    
-    jobs = job_matcher.get_jobs_by_category(category_name)
+    jobs = matcher.get_jobs_by_category(category_name)
     return {"category": category_name, "jobs": jobs, "count": len(jobs)}
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    status = "healthy" if job_matcher else "unhealthy"
-    jobs_loaded = len(job_matcher.df) if job_matcher else 0
+    matcher = job_matcher.current()
+    status = "healthy" if matcher else "unhealthy"
+    jobs_loaded = matcher.job_count if matcher else 0
     
     return {
         "status": status,
         "jobs_loaded": jobs_loaded,
-        "matcher_initialized": job_matcher is not None
+        "matcher_initialized": matcher is not None,
+        "search_backend": matcher.backend if matcher else None,
+        "scoring": matcher.scoring if matcher else None,
+        "index": matcher.index_stats() if matcher else None,
+        "query_cache": matcher.result_cache.stats() if matcher else None,
+        "reload": job_matcher.status(),
+        "corpora": corpus_registry.status()
     }
+
+
+@router.get("/corpora")
+async def get_corpora():
+    """Available corpora, which ones are loaded and their memory use"""
+    return corpus_registry.status()
     
     # Note: Assistant endpoints moved to:
     # - /api/assistant (in assistant_routes.py) - Basic pattern-based assistant
-    # - /api/smart-assistant (in smart_assistant_routes.py) - LLM-powered assistant
\ No newline at end of file
+    # - /api/smart-assistant (in smart_assistant_routes.py) - LLM-powered assistant
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints require the JOB_ADMIN_TOKEN value in X-Admin-Token, and are disabled without it"""
+    expected = os.getenv("JOB_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled: JOB_ADMIN_TOKEN is not set")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.put("/admin/jobs", dependencies=[Depends(require_admin_token)])
+async def upsert_job(job: JobUpsert, matcher: JobMatcher = Depends(serving_matcher)):
+    """Insert or replace a job posting, searchable immediately (no refit)"""
+    # Vectorizing, journaling and publishing a snapshot block: off the event loop
+    result = await run_in_threadpool(matcher.upsert_job, job.dict())
+    return {**result, "index": matcher.index_stats()}
+
+
+@router.post("/admin/jobs/bulk", dependencies=[Depends(require_admin_token)])
+async def upsert_jobs_bulk(jobs: List[JobUpsert], matcher: JobMatcher = Depends(serving_matcher)):
+    """Insert or replace many job postings in one batch"""
+    results = await run_in_threadpool(matcher.upsert_jobs, [job.dict() for job in jobs])
+    return {"results": results, "count": len(results), "index": matcher.index_stats()}
+
+
+@router.delete("/admin/jobs/{job_id}", dependencies=[Depends(require_admin_token)])
+async def delete_job(job_id: int, matcher: JobMatcher = Depends(serving_matcher)):
+    """Delete a job posting by id"""
+    if not await run_in_threadpool(matcher.delete_job, job_id):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"job_id": job_id, "deleted": True, "index": matcher.index_stats()}
+
+
+@router.post("/admin/compact", dependencies=[Depends(require_admin_token)])
+async def compact_index(matcher: JobMatcher = Depends(serving_matcher)):
+    """Merge pending upserts/deletes into the base index now"""
+    compacted = await run_in_threadpool(matcher.compact)
+    return {"compacted": compacted, "index": matcher.index_stats()}
+
+
+@router.post("/admin/reload", dependencies=[Depends(require_admin_token)])
+async def reload_index(
+    wait: bool = Query(False, description="Answer once the new index is in service"),
+    corpus: Optional[str] = Query(None, description="Corpus to reload (default: the Moroccan jobs)")
+):
+    """Rebuild the matcher from the CSV in the background, then swap it in (the current one serves meanwhile)"""
+    try:
+        provider = corpus_registry.provider(corpus)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus '{corpus}', expected one of {corpus_registry.names()}")
+    if provider is None:
+        # Not loaded: the next request loads the current feed anyway
+        return {"started": False, "reload": None}
+    if wait:
+        # The build runs in its own thread: do not block the event loop while it finishes
+        started = await run_in_threadpool(provider.reload, True)
+    else:
+        started = provider.reload()
+    return {"started": started, "reload": provider.status()}
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Dict, Optional
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from fastapi.responses import StreamingResponse
 from services.builder.generator_standard import generate_structured_resume
@@ -13,7 +14,8 @@ from services.assistant import career_assistant
 from services.llm_assistant import career_coach
 from services.cv_analyzer import cv_analyzer
 from services.resume_parser_api import resume_parser_api
-from routes.job_routes import job_matcher
+from routes.job_routes import corpus_registry, corpus_unavailable
+from services.corpus_registry import CorpusUnavailable
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -21,11 +23,13 @@ from sklearn.metrics.pairwise import cosine_similarity
 class SearchRequest(BaseModel):
     query: str
     session_id: str
+    corpus: Optional[str] = None  # default: the Moroccan jobs, see /jobs/corpora
 
 
 class ClarifyRequest(BaseModel):
     session_id: str
     answer: str
+    corpus: Optional[str] = None
 
 
 router = APIRouter(prefix="/api", tags=["assistant-v2"])
@@ -46,15 +50,27 @@ def _llm_chat_message(user_query: str) -> Optional[str]:
     return None
 
 
-def _run_search_flow(user_query: str, session_id: str) -> Dict:
+async def _matcher_for(corpus: Optional[str]):
+    """Matcher du corpus demandé, figé sur un snapshot de l'index pour toute la requête (404 si inconnu, 503 si son flux est illisible)"""
+    try:
+        # Corpus déjà chargé : résolu sur la boucle, seul un premier chargement part dans le thread pool
+        matcher = corpus_registry.get(corpus, load=False) or await run_in_threadpool(corpus_registry.get, corpus)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus '{corpus}', expected one of {corpus_registry.names()}")
+    except CorpusUnavailable as e:
+        raise corpus_unavailable(e)
+    return matcher.pinned() if matcher else None
+
+
+def _run_search_flow(user_query: str, session_id: str, matcher) -> Dict:
     """Exécute le pipeline de recherche et formate la réponse contractuelle"""
     search_queries = career_assistant.generate_search_queries(user_query)
-    job_results = career_assistant.build_job_results(job_matcher, search_queries, top_k=5)
-    assistant_response = career_assistant.generate_response(user_query, job_results)
+    job_results = career_assistant.build_job_results(matcher, search_queries, top_k=5)
+    assistant_response = career_assistant.generate_response(user_query, job_results, matcher)
 
     # Si le titre existe dans le dataset, enrichir avec un message LLM conversationnel
     llm_message = None
-    if job_matcher and (job_matcher.has_job_title(user_query) or job_matcher.semantic_match_title(user_query)):
+    if matcher and (matcher.has_job_title(user_query) or matcher.semantic_match_title(user_query)):
         llm_message = _llm_chat_message(user_query)
 
     payload = {
@@ -76,7 +92,9 @@ def _run_search_flow(user_query: str, session_id: str) -> Dict:
 @router.post("/search")
 async def search(request: SearchRequest):
     """Search for jobs using natural language query"""
-    if not job_matcher:
+    # Same matcher for the whole flow, even if a reload swaps the index meanwhile
+    matcher = await _matcher_for(request.corpus)
+    if not matcher:
         raise HTTPException(status_code=500, detail="Job matcher not initialized")
 
     user_query = request.query.strip()
@@ -89,23 +107,24 @@ async def search(request: SearchRequest):
         return {"clarify": True, "question": question}
 
     career_assistant.save_session(request.session_id, user_query, "")
-    return _run_search_flow(user_query, request.session_id)
+    return _run_search_flow(user_query, request.session_id, matcher)
 
 
 @router.post("/clarify")
 async def clarify(request: ClarifyRequest):
     """Clarify ambiguous search query"""
+    matcher = await _matcher_for(request.corpus)
     session = career_assistant.get_session(request.session_id)
     # Si aucune session trouvée, traiter la réponse comme une nouvelle requête
     if not session:
         career_assistant.save_session(request.session_id, request.answer, "")
-        return _run_search_flow(request.answer, request.session_id)
+        return _run_search_flow(request.answer, request.session_id, matcher)
 
     refined_query = f"{session['original_query']} {request.answer}".strip()
 
     # Si correspondance directe ou sémantique dans le dataset, on répond directement
-    if job_matcher.has_job_title(refined_query) or job_matcher.semantic_match_title(refined_query):
-        return _run_search_flow(refined_query, request.session_id)
+    if matcher and (matcher.has_job_title(refined_query) or matcher.semantic_match_title(refined_query)):
+        return _run_search_flow(refined_query, request.session_id, matcher)
 
     # Sinon, demander une clarification supplémentaire (variée)
     question = career_assistant.build_clarification_question(refined_query)
@@ -116,10 +135,10 @@ async def clarify(request: ClarifyRequest):
 @router.get("/results")
 async def last_results(session_id: str):
     """Get last search results for a session"""
-    session = career_assistant.get_session(session_id)
-    if not session or not session.get("last_results"):
+    results = career_assistant.get_session_results(session_id)
+    if not results:
         raise HTTPException(status_code=404, detail="No results stored for this session")
-    return session["last_results"]
+    return results
 
 @router.post("/generate-resume")
 async def generate_resume(resume_data: dict):
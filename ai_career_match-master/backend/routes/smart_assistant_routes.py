@@ -3,11 +3,11 @@ Smart Assistant Routes
 AI-powered assistant with LLM-based query analysis and clarification flow
 Acts as a career coach chatbot with natural language responses
 """
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 import json
 import httpx
-from routes.job_routes import job_matcher
+from routes.job_routes import serving_matcher
 from services.llm_assistant import CareerAssistant, get_coach_response
 from utils.link_generator import LinkGenerator
 
@@ -17,10 +17,26 @@ router = APIRouter(prefix="/api", tags=["smart-assistant"])
 career_coach = CareerAssistant()
 
 
+def _search_urls(jobs: List[Dict], links: Optional[List[Dict]] = None) -> List[Dict]:
+    """Liens des offres : précalculés par le matcher (links, ou all_search_urls de /api/assistant), sinon mémoïsés"""
+    search_urls = []
+    for i, job in enumerate(jobs):
+        job_title = job.get('job_title', '')
+        if job_title:
+            urls = links[i] if links else job.get("all_search_urls") or LinkGenerator.generate_all_urls(job_title)
+            search_urls.append({
+                "job_title": job_title,
+                "stagiaires_url": urls.get("stagiaires_url", urls.get("linkedin_url")),
+                "rekrute_url": urls.get("rekrute_url")
+            })
+    return search_urls
+
+
 @router.post("/smart-assistant")
 async def smart_career_assistant(
     message: str = Query(..., description="Message à l'assistant"),
-    clarification: Optional[str] = Query(None, description="Réponse à une question de clarification")
+    clarification: Optional[str] = Query(None, description="Réponse à une question de clarification"),
+    corpus: Optional[str] = Query(None, description="Corpus d'offres (défaut : offres Maroc), voir /jobs/corpora")
 ):
     """
     Smart Assistant - AI-powered job search assistant with LLM analysis.
@@ -42,7 +58,7 @@ async def smart_career_assistant(
                 async with httpx.AsyncClient() as client:
                     response = await client.post(
                         "http://localhost:8000/api/assistant",
-                        params={"message": combined_query},
+                        params={"message": combined_query, **({"corpus": corpus} if corpus else {})},
                         timeout=30.0
                     )
                     response.raise_for_status()
@@ -63,17 +79,7 @@ async def smart_career_assistant(
                     coaching_response = coach_result.get("response", "Je vais vous aider à trouver les meilleures opportunités.")
                 
                 # Extract job links from assistant response
-                search_urls = []
-                for job in jobs:
-                    job_title = job.get('job_title', '')
-                    job_id = str(job.get('job_id', ''))
-                    if job_title:
-                        urls = LinkGenerator.generate_all_urls(job_title, job_id=job_id)
-                        search_urls.append({
-                            "job_title": job_title,
-                            "stagiaires_url": urls.get("stagiaires_url", urls.get("linkedin_url")),
-                            "rekrute_url": urls.get("rekrute_url")
-                        })
+                search_urls = _search_urls(jobs)
                 
                 # Return Smart Assistant response with coaching and job links
                 return {
@@ -130,7 +136,7 @@ async def smart_career_assistant(
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     "http://localhost:8000/api/assistant",
-                    params={"message": search_query},
+                    params={"message": search_query, **({"corpus": corpus} if corpus else {})},
                     timeout=30.0
                 )
                 response.raise_for_status()
@@ -149,17 +155,7 @@ async def smart_career_assistant(
                     "D'après mon analyse du marché, voici ce que je peux vous conseiller...")
             
             # Extract job links
-            search_urls = []
-            for job in jobs:
-                job_title = job.get('job_title', '')
-                job_id = str(job.get('job_id', ''))
-                if job_title:
-                    urls = LinkGenerator.generate_all_urls(job_title, job_id=job_id)
-                    search_urls.append({
-                        "job_title": job_title,
-                        "stagiaires_url": urls.get("stagiaires_url", urls.get("linkedin_url")),
-                        "rekrute_url": urls.get("rekrute_url")
-                    })
+            search_urls = _search_urls(jobs)
             
             return {
                 "assistant_response": coaching_response,
@@ -175,10 +171,14 @@ async def smart_career_assistant(
         except Exception as e:
             print(f"⚠️ Error calling normal assistant: {e}")
             # Fallback to direct search if assistant fails
-            matches = job_matcher.search_jobs(search_query, top_k=8)
+            # Search and records read from the same index snapshot
+            matcher = (await serving_matcher(corpus)).pinned()
+            matches = matcher.search_jobs(search_query, top_k=8)
             results = []
+            links = []
             for idx, _ in matches:
-                job_data = job_matcher.get_job_by_index(idx)
+                job_data = matcher.get_job_by_index(idx)
+                links.append(matcher.job_links(idx))
                 results.append({
                     "job_title": job_data.get('job_title', 'Titre inconnu'),
                     "category": job_data.get('category', 'Non catégorisé'),
@@ -195,16 +195,7 @@ async def smart_career_assistant(
                 job_data=results
             )
             
-            search_urls = []
-            for job in results:
-                job_title = job['job_title']
-                job_id = str(job.get('job_id', ''))
-                urls = LinkGenerator.generate_all_urls(job_title, job_id=job_id)
-                search_urls.append({
-                    "job_title": job_title,
-                    "stagiaires_url": urls.get("stagiaires_url", urls.get("linkedin_url")),
-                    "rekrute_url": urls.get("rekrute_url")
-                })
+            search_urls = _search_urls(results, links)
             
             return {
                 "assistant_response": coaching_response,
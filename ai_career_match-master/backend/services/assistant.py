@@ -1,99 +1,29 @@
-import re
+import heapq
 from datetime import datetime
 from typing import Dict, List, Set, Optional
+from services.intent_analyzer import IntentAnalyzer, load_vocabulary
 from services.matcher import JobMatcher
+from services.search.token_sets import tokenize
+from services.session_store import SessionStore, create_session_store
 from utils.link_generator import LinkGenerator
 
 class CareerAssistant:
     def __init__(self):
-        # Patterns pour comprendre l'intention utilisateur
-        self.patterns = {
-            'stage': [r'stage', r'stagi', r'intern', r'alternance', r'apprentissage'],
-            'debutant': [r'débutant', r'junior', r'premier emploi', r'sans expérience'],
-            'remote': [r'remote', r'télétravail', r'à distance', r'teletravail'],
-            'ville': [r'à (\w+)', r'sur (\w+)', r'casablanca', r'rabat', r'marrakech', r'tanger'],
-            'competences': [r'compétence en (\w+)', r'savoir (\w+)', r'connaissance en (\w+)']
-        }
-        
-        # Mapping des intentions vers des requêtes de recherche
-        self.intent_mapping = {
-            'stage': 'stage alternance',
-            'debutant': 'junior débutant',
-            'remote': 'remote télétravail',
-            'ville': ''  # Sera rempli dynamiquement
-        }
-        # État de session léger pour les flux de clarification
-        self.sessions: Dict[str, Dict] = {}
+        # Vocabulaire (data/assistant_vocabulary.json) compilé une seule fois
+        self.analyzer = IntentAnalyzer(load_vocabulary())
+        self.patterns = self.analyzer.patterns
+        self.intent_mapping = self.analyzer.intent_mapping
+        # Sessions des flux de clarification : bornées, expirées après un TTL, partageables entre workers
+        self.sessions: SessionStore = create_session_store()
     
     def analyze_query(self, user_message: str) -> Dict:
-        """Analyse le message utilisateur et extrait les intentions"""
-        user_message = user_message.lower()
-        
-        analysis = {
-            'original_message': user_message,
-            'intentions': [],
-            'competences': [],
-            'lieu': None,
-            'type_contrat': 'CDI',  # Par défaut
-            'experience_level': None,
-            'search_query': ''
-        }
-        
-        # Détection des intentions
-        for intent, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, user_message):
-                    if intent not in analysis['intentions']:
-                        analysis['intentions'].append(intent)
-        
-        # Extraction des compétences spécifiques
-        competence_keywords = ['développeur', 'web', 'mobile', 'data', 'marketing', 'design', 'comptable', 'infirmier']
-        for keyword in competence_keywords:
-            if keyword in user_message:
-                analysis['competences'].append(keyword)
-        
-        # Extraction du lieu
-        ville_match = re.search(r'à (\w+)', user_message)
-        if ville_match:
-            analysis['lieu'] = ville_match.group(1)
-        
-        # Préparer les requêtes de secours
-        fallback_queries = []
-        if analysis['lieu']:
-            fallback_queries.append(f"{user_message} {analysis['lieu']}")
-        if analysis['competences']:
-            fallback_queries.extend([f"{skill} emploi maroc" for skill in analysis['competences']])
-        analysis['fallback_queries'] = fallback_queries
-
-        # Construction de la requête de recherche optimisée
-        query_parts = []
-        
-        # Ajouter les compétences
-        if analysis['competences']:
-            query_parts.extend(analysis['competences'])
-        
-        # Ajouter les intentions spécifiques
-        for intent in analysis['intentions']:
-            if intent in self.intent_mapping and self.intent_mapping[intent]:
-                query_parts.append(self.intent_mapping[intent])
-        
-        # Construire la requête finale
-        analysis['search_query'] = ' '.join(query_parts) if query_parts else user_message
-        
-        return analysis
+        """Analyse le message utilisateur et extrait les intentions (mémoïsée par message)"""
+        return self.analyzer.analyze(user_message)
 
     # --- NOUVELLE LOGIQUE ---
     def is_ambiguous(self, user_message: str) -> bool:
         """Heuristique simple pour détecter les requêtes vagues"""
-        tokens = re.findall(r"\w+", user_message.lower())
-        if len(tokens) < 4:
-            return True
-        vague_markers = {"help", "aide", "projet", "project", "issue", "problème", "error", "besoin", "conseil"}
-        if any(t in vague_markers for t in tokens):
-            return True
-        # Absence de mots clés métier
-        skill_markers = {"developpeur", "developer", "data", "analyste", "designer", "marketing", "devops", "backend", "frontend"}
-        return not any(t in skill_markers for t in tokens)
+        return self.analyzer.is_ambiguous(user_message)
 
     def generate_search_queries(self, user_message: str, intent: Optional[str] = None) -> List[Dict]:
         """Construit au moins 5 requêtes distinctes et classées, avec liens"""
@@ -114,7 +44,7 @@ class CareerAssistant:
         add(user_message)
 
         # Boost pour python/backend si présent dans le texte
-        tokens = {t for t in re.findall(r"\w+", user_message.lower())}
+        tokens = tokenize(user_message)
         if "python" in tokens and "backend" in tokens:
             add("developpeur backend python maroc")
             add("python backend developer maroc")
@@ -150,11 +80,11 @@ class CareerAssistant:
         return queries[:8]
 
     def _with_links(self, query: str, location: Optional[str] = "Morocco") -> Dict:
-        loc = location or "Morocco"
+        urls = LinkGenerator.generate_all_urls(query, location or "Morocco")
         return {
             "query": query,
-            "google_link": LinkGenerator.generate_google_url(query, loc),
-            "indeed_link": LinkGenerator.generate_indeed_url(query, loc)
+            "google_link": urls["google_url"],
+            "indeed_link": urls["indeed_url"]
         }
 
     def build_job_results(self, job_matcher: JobMatcher, search_queries: List[Dict], top_k: int = 5) -> List[Dict]:
@@ -163,38 +93,29 @@ class CareerAssistant:
             return []
 
         aggregated: Dict[int, Dict] = {}
-        for entry in search_queries:
-            query = entry["query"]
-            matches = job_matcher.search_jobs(query, top_k)
+        # Toutes les requêtes sont vectorisées et scorées en une seule passe
+        queries = [entry["query"] for entry in search_queries]
+        for query, matches in zip(queries, job_matcher.search_jobs_many(queries, top_k)):
             for idx, score in matches:
                 job_data = job_matcher.get_job_by_index(idx)
                 job_id = int(job_data.get("job_id", idx))
                 if job_id not in aggregated or score > aggregated[job_id]["score"]:
-                    aggregated[job_id] = {"score": score, "job": job_data, "source_query": query}
+                    aggregated[job_id] = {"score": score, "job": job_data, "row": idx, "source_query": query}
 
-        ranked = sorted(aggregated.values(), key=lambda x: x["score"], reverse=True)
-
-        # Filtrer les résultats pour correspondre davantage au texte de la requête principale
+        # Filtrer les résultats pour correspondre davantage au texte de la requête principale :
+        # au moins un mot de la requête dans le titre, les compétences ou la description (ensembles de mots précalculés)
         primary_query = search_queries[0]["query"] if search_queries else ""
-        primary_tokens = {t for t in re.findall(r"\w+", primary_query.lower()) if len(t) > 2}
-
-        def is_relevant(job_dict: Dict) -> bool:
-            title = job_dict.get("job_title", "").lower()
-            skills = job_dict.get("required_skills", "").lower()
-            desc = job_dict.get("description", "").lower()
-            # Au moins un token du user query doit apparaître dans le titre ou les compétences
-            return any(tok in title or tok in skills or tok in desc for tok in primary_tokens)
-
-        filtered_ranked = [item for item in ranked if is_relevant(item["job"])]
+        primary_tokens = {t for t in tokenize(primary_query) if len(t) > 2}
+        filtered = [item for item in aggregated.values() if job_matcher.job_mentions(item["row"], primary_tokens)]
 
         # Si tout est filtré, conserver les top_k originaux pour ne pas retourner 0
-        ranked = filtered_ranked if filtered_ranked else ranked
-        ranked = ranked[: top_k]
+        # Sélection partielle par tas : seuls les top_k sont triés
+        ranked = heapq.nlargest(top_k, filtered or list(aggregated.values()), key=lambda x: x["score"])
 
         results: List[Dict] = []
         for item in ranked:
             job = item["job"]
-            urls = LinkGenerator.generate_all_urls(job.get("job_title", search_queries[0] if search_queries else ""))
+            urls = job_matcher.job_links(item["row"], primary_query)
             results.append({
                 "job_id": job.get("job_id"),
                 "job_title": job.get("job_title", ""),
@@ -225,21 +146,23 @@ class CareerAssistant:
         return variants[idx]
 
     def save_session(self, session_id: str, original_query: str, question: str):
-        self.sessions[session_id] = {
+        self.sessions.save(session_id, {
             "original_query": original_query,
             "clarify_question": question,
-            "last_results": None,
             "timestamp": datetime.utcnow().isoformat()
-        }
+        })
 
     def get_session(self, session_id: str) -> Dict | None:
+        """Requête d'origine et question posée (sans les derniers résultats)"""
         return self.sessions.get(session_id)
 
+    def get_session_results(self, session_id: str) -> Dict | None:
+        return self.sessions.get_results(session_id)
+
     def update_session_results(self, session_id: str, results: Dict):
-        if session_id in self.sessions:
-            self.sessions[session_id]["last_results"] = results
+        self.sessions.set_results(session_id, results)
     
-    def generate_response(self, user_message: str, search_results: List[Dict]) -> Dict:
+    def generate_response(self, user_message: str, search_results: List[Dict], job_matcher: Optional[JobMatcher] = None) -> Dict:
         """Génère une réponse naturelle avec les résultats - VERSION CORRIGÉE"""
         analysis = self.analyze_query(user_message)
         
@@ -267,12 +190,19 @@ class CareerAssistant:
             },
             "search_query_used": analysis['search_query'],
             "jobs": search_results,  # Garder les objets originaux pour la réponse
-            "suggestions": self._generate_suggestions(analysis, jobs_as_dicts)  # Utiliser les dicts pour l'analyse
+            "suggestions": self._generate_suggestions(analysis, jobs_as_dicts, job_matcher)  # Utiliser les dicts pour l'analyse
         }
         
         return response
     
-    def _generate_suggestions(self, analysis: Dict, jobs: List[Dict]) -> List[str]:
+    def _job_mentions(self, job_matcher: Optional[JobMatcher], job: Dict, terms: Set[str], fields: List[str]) -> bool:
+        """Mots du job précalculés par le matcher, sinon tokenisés depuis le dict du résultat"""
+        record = job_matcher.get_job_by_id(job["job_id"]) if job_matcher and job.get("job_id") is not None else None
+        if record is not None:
+            return job_matcher.job_mentions(record.row, terms, fields)
+        return any(not tokenize(job.get(field, "")).isdisjoint(terms) for field in fields)
+
+    def _generate_suggestions(self, analysis: Dict, jobs: List[Dict], job_matcher: Optional[JobMatcher] = None) -> List[str]:
         """Génère des suggestions basées sur l'analyse"""
         suggestions = []
         
@@ -289,7 +219,7 @@ class CareerAssistant:
             suggestions.append(f"Compétences détectées: {', '.join(analysis['competences'])}")
         
         # Suggestion pour les stages
-        if 'stage' in analysis['intentions'] and len([j for j in jobs if 'stage' in j.get('job_title', '').lower()]) == 0:
+        if 'stage' in analysis['intentions'] and not any(self._job_mentions(job_matcher, j, {'stage'}, ['job_title']) for j in jobs):
             suggestions.append("Pour plus de stages, visitez directement les sites des entreprises ou les plateformes spécialisées.")
         
         return suggestions
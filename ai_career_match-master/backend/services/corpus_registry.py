@@ -0,0 +1,227 @@
+"""
+Corpus Registry
+Job corpora by name (per country, per source, internships only...), each served by its own
+MatcherProvider. A corpus is loaded on first use and shared by every route; loaded corpora are
+evicted, least recently used first, when idle too long or when they exceed the memory budget.
+"""
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.matcher import JobMatcher
+from services.matcher_provider import MatcherProvider
+from services.search.job_store import JSONL_SUFFIXES
+
+CORPUS_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+FEED_SUFFIXES = (".csv",) + JSONL_SUFFIXES
+
+
+class CorpusUnavailable(RuntimeError):
+    """A corpus whose feed could not be loaded; raised again without reloading until retry_in expires"""
+
+    def __init__(self, name: str, error: Exception, retry_in: float):
+        super().__init__(f"Corpus '{name}' is unavailable: {error}")
+        self.name = name
+        self.error = error
+        self.retry_in = retry_in
+
+
+def _feed_stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def discover_corpora(corpora_dir: str, spec: str = "") -> Dict[str, str]:
+    """
+    corpus name -> feed path: every CSV / JSON Lines file of corpora_dir (named after the file),
+    then the 'name=path,name=path' spec (paths relative to corpora_dir)
+    """
+    feeds = {}
+    if os.path.isdir(corpora_dir):
+        for filename in sorted(os.listdir(corpora_dir)):
+            name, suffix = os.path.splitext(filename)
+            if suffix.lower() in FEED_SUFFIXES and CORPUS_NAME.match(name.lower()):
+                feeds[name.lower()] = os.path.join(corpora_dir, filename)
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition("=")
+        name = name.strip().lower()
+        if not sep or not CORPUS_NAME.match(name):
+            raise ValueError(f"Invalid corpus '{item.strip()}', expected name=path")
+        feeds[name] = os.path.join(corpora_dir, path.strip())
+    return feeds
+
+
+class _Entry:
+    __slots__ = ("provider", "pinned", "last_used", "load_lock", "load_error", "failed_stat", "retry_at")
+
+    def __init__(self, provider: MatcherProvider, pinned: bool = False):
+        self.provider = provider
+        self.pinned = pinned
+        self.last_used = time.monotonic()
+        self.load_lock = threading.Lock()
+        # Last failed load: its error, the feed state it failed on, when to try again
+        self.load_error: Optional[Exception] = None
+        self.failed_stat: Optional[Tuple[int, int]] = None
+        self.retry_at = 0.0
+
+
+class CorpusRegistry:
+    def __init__(self, feeds: Dict[str, str], default: Tuple[str, MatcherProvider],
+                 factory: Callable[[str], JobMatcher] = JobMatcher, memory_budget_mb: float = 1024,
+                 idle_seconds: float = 1800, compaction_interval: float = 0, watch_interval: float = 0,
+                 retry_seconds: float = 60):
+        """
+        feeds: corpus name -> feed path, loaded on demand
+        default: (name, provider) of the corpus used without a corpus parameter, already loaded and never evicted
+        retry_seconds: a corpus that failed to load is not loaded again before, unless its feed changes
+        """
+        self.default, default_provider = default
+        self.feeds = dict(feeds)
+        self.feeds[self.default] = default_provider.feed_path
+        self.factory = factory
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.idle_seconds = idle_seconds
+        self.compaction_interval = compaction_interval
+        self.watch_interval = watch_interval
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {self.default: _Entry(default_provider, pinned=True)}
+
+    def names(self) -> List[str]:
+        return sorted(self.feeds)
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                path = self.feeds[name]
+                provider = MatcherProvider(lambda: self.factory(path), path, self.compaction_interval)
+                entry = self._entries[name] = _Entry(provider)
+            entry.last_used = time.monotonic()
+            return entry
+
+    def get(self, name: Optional[str] = None, load: bool = True) -> Optional[JobMatcher]:
+        """
+        Serving matcher of a corpus (the default one when name is None), loaded on first use.
+        KeyError for an unknown corpus, CorpusUnavailable when its feed failed to load, None when
+        the default corpus failed to load (or, with load=False, when the corpus is not loaded yet).
+        """
+        name = (name or self.default).strip().lower()
+        if name not in self.feeds:
+            raise KeyError(name)
+        entry = self._entry(name)
+        matcher = entry.provider.current()
+        if matcher is None and load and not entry.pinned:
+            # One load per corpus: concurrent first requests wait for it instead of loading it again
+            with entry.load_lock:
+                matcher = entry.provider.current()
+                if matcher is None:
+                    matcher = self._load(name, entry)
+            self.evict(keep=name)
+        return matcher
+
+    def _load(self, name: str, entry: _Entry) -> JobMatcher:
+        """Load a corpus (entry.load_lock held); a failed load is not retried for the same feed before retry_at"""
+        stat = _feed_stat(self.feeds[name])
+        now = time.monotonic()
+        if entry.load_error is not None and stat == entry.failed_stat and now < entry.retry_at:
+            raise CorpusUnavailable(name, entry.load_error, entry.retry_at - now)
+        print(f"📊 Loading job corpus '{name}'...")
+        try:
+            matcher = entry.provider.load()
+        except Exception as e:
+            entry.load_error, entry.failed_stat, entry.retry_at = e, stat, now + self.retry_seconds
+            entry.provider.last_error = str(e)
+            print(f"❌ Could not load job corpus '{name}': {e}")
+            raise CorpusUnavailable(name, e, self.retry_seconds) from e
+        entry.load_error, entry.failed_stat = None, None
+        entry.provider.last_error = None
+        if self.watch_interval > 0:
+            entry.provider.start_watcher(self.watch_interval)
+        return matcher
+
+    def provider(self, name: Optional[str] = None) -> Optional[MatcherProvider]:
+        """Provider of a loaded corpus, None when it is not loaded"""
+        name = (name or self.default).strip().lower()
+        if name not in self.feeds:
+            raise KeyError(name)
+        entry = self._entries.get(name)
+        return entry.provider if entry is not None and entry.provider.current() is not None else None
+
+    def _loaded(self) -> List[Tuple[str, _Entry, int]]:
+        """(name, entry, bytes) of the loaded corpora"""
+        loaded = []
+        for name, entry in list(self._entries.items()):
+            matcher = entry.provider.current()
+            if matcher is not None:
+                loaded.append((name, entry, matcher.nbytes()))
+        return loaded
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Unload idle corpora, then the least recently used ones until the total fits the budget
+        (pinned corpora and keep excepted). In-flight requests finish on the evicted matcher.
+        """
+        evicted = []
+        now = time.monotonic()
+        with self._lock:
+            loaded = self._loaded()
+            total = sum(nbytes for _, _, nbytes in loaded)
+            for name, entry, nbytes in sorted(loaded, key=lambda item: item[1].last_used):
+                if entry.pinned or name == keep:
+                    continue
+                if now - entry.last_used > self.idle_seconds or total > self.memory_budget:
+                    del self._entries[name]
+                    entry.provider.close()
+                    total -= nbytes
+                    evicted.append(name)
+        for name in evicted:
+            print(f"🔧 Evicted job corpus '{name}'")
+        return evicted
+
+    def start_janitor(self, interval: Optional[float] = None) -> threading.Thread:
+        """Background thread evicting idle corpora"""
+        interval = interval or max(1.0, min(60.0, self.idle_seconds / 2))
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.evict()
+                except Exception as e:
+                    print(f"⚠️ Corpus eviction error: {e}")
+
+        janitor = threading.Thread(target=run, name="job-corpus-janitor", daemon=True)
+        janitor.start()
+        return janitor
+
+    def status(self) -> Dict:
+        now = time.monotonic()
+        loaded = {name: (entry, nbytes) for name, entry, nbytes in self._loaded()}
+        corpora = []
+        for name in self.names():
+            entry, nbytes = loaded.get(name, (None, 0))
+            failed = self._entries.get(name)
+            corpora.append({
+                "name": name,
+                "feed": os.path.basename(self.feeds[name]),
+                "default": name == self.default,
+                "loaded": entry is not None,
+                "idle_seconds": round(now - entry.last_used, 1) if entry is not None else None,
+                "memory_mb": round(nbytes / (1024 * 1024), 2),
+                "reload": entry.provider.status() if entry is not None else None,
+                "error": str(failed.load_error) if failed is not None and failed.load_error is not None else None,
+            })
+        return {
+            "default": self.default,
+            "memory_budget_mb": round(self.memory_budget / (1024 * 1024), 2),
+            "memory_used_mb": round(sum(nbytes for _, nbytes in loaded.values()) / (1024 * 1024), 2),
+            "corpora": corpora,
+        }
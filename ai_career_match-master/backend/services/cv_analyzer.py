@@ -3,13 +3,15 @@ from typing import List, Dict
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from utils.text_normalizer import TextNormalizer, SynonymMapper, SkillMatcher
+from utils.text_analyzer import text_analyzer
 
 class CVAnalyzer:
     def __init__(self, use_semantic_matching: bool = False):
         print("🔧 Initialisation de CVAnalyzer - Extraction stricte...")
+        # Same analyzer as the job matcher: CV and job texts are reduced to the same terms
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
-            stop_words=['le', 'la', 'les', 'de', 'des', 'du', 'et', 'en', 'au', 'aux', 'à', 'dans', 'pour'],
+            preprocessor=text_analyzer.analyze,
             ngram_range=(1, 2)
         )
         
@@ -0,0 +1,97 @@
+"""
+Intent Analyzer
+Pattern-based analysis of assistant messages. The vocabulary (intent patterns, skill keywords,
+location pattern) comes from data/assistant_vocabulary.json and is compiled once into a single
+regex, scanned with one finditer per message. Analyses are memoized per message: the routes and
+the assistant methods analyzing the same message share one analysis.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+DEFAULT_VOCABULARY_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "assistant_vocabulary.json"
+)
+ANALYSIS_CACHE_SIZE = 4096
+
+
+def load_vocabulary(path: Optional[str] = None) -> Dict:
+    path = path or os.getenv("ASSISTANT_VOCABULARY_PATH", DEFAULT_VOCABULARY_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class IntentAnalyzer:
+    def __init__(self, vocabulary: Dict, cache_size: int = ANALYSIS_CACHE_SIZE):
+        self.patterns: Dict[str, List[str]] = vocabulary["intents"]
+        self.intent_mapping: Dict[str, str] = vocabulary.get("intent_queries", {})
+        self.competence_keywords: List[str] = vocabulary.get("competence_keywords", [])
+        self.location_pattern: str = vocabulary.get("location_pattern", r"à (\w+)")
+        self.vague_markers = frozenset(vocabulary.get("vague_markers", []))
+        self.skill_markers = frozenset(vocabulary.get("skill_markers", []))
+
+        # One named group per intent / keyword / the location, each in its own lookahead: every
+        # position reports all the entries matching there, so overlapping matches ("à distance"
+        # is both remote and a city phrase, "data" inside "database") are all kept
+        self._intents = list(self.patterns)
+        entries = [(f"i{i}", "|".join(f"(?:{p})" for p in self.patterns[intent]))
+                   for i, intent in enumerate(self._intents)]
+        entries += [(f"k{i}", re.escape(keyword)) for i, keyword in enumerate(self.competence_keywords)]
+        entries.append(("loc", self.location_pattern))
+        any_entry = "|".join(f"(?:{pattern})" for _, pattern in entries)
+        self._matcher = re.compile(f"(?=(?:{any_entry}))" + "".join(
+            f"(?:(?=(?P<{name}>{pattern})))?" for name, pattern in entries))
+        self._location = re.compile(self.location_pattern)
+
+        self._analyze_cached = lru_cache(maxsize=cache_size)(self._analyze)
+
+    def _analyze(self, user_message: str) -> Dict:
+        found, location_at = set(), None
+        for match in self._matcher.finditer(user_message):
+            for name, value in match.groupdict().items():
+                if value is not None:
+                    found.add(name)
+                    if name == "loc" and location_at is None:
+                        location_at = match.start()
+        intentions = [intent for i, intent in enumerate(self._intents) if f"i{i}" in found]
+        competences = [keyword for i, keyword in enumerate(self.competence_keywords) if f"k{i}" in found]
+        # Leftmost location phrase, its capture group read with the location pattern alone
+        lieu = self._location.match(user_message, location_at).group(1) if location_at is not None else None
+
+        # Préparer les requêtes de secours
+        fallback_queries = []
+        if lieu:
+            fallback_queries.append(f"{user_message} {lieu}")
+        fallback_queries.extend(f"{skill} emploi maroc" for skill in competences)
+
+        # Compétences puis intentions spécifiques
+        query_parts = list(competences)
+        query_parts.extend(self.intent_mapping[intent] for intent in intentions if self.intent_mapping.get(intent))
+
+        return {
+            'original_message': user_message,
+            'intentions': intentions,
+            'competences': competences,
+            'lieu': lieu,
+            'type_contrat': 'CDI',  # Par défaut
+            'experience_level': None,
+            'search_query': ' '.join(query_parts) if query_parts else user_message,
+            'fallback_queries': fallback_queries,
+        }
+
+    def analyze(self, user_message: str) -> Dict:
+        """Analyse du message (memoized): a fresh copy, callers may modify it"""
+        analysis = self._analyze_cached(user_message.lower())
+        return {key: list(value) if isinstance(value, list) else value for key, value in analysis.items()}
+
+    def is_ambiguous(self, user_message: str) -> bool:
+        """Heuristique simple pour détecter les requêtes vagues"""
+        tokens = re.findall(r"\w+", user_message.lower())
+        if len(tokens) < 4:
+            return True
+        if any(t in self.vague_markers for t in tokens):
+            return True
+        # Absence de mots clés métier
+        return not any(t in self.skill_markers for t in tokens)
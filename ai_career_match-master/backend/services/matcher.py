@@ -1,117 +1,874 @@
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import re
-import string
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 import os
+import json
+import threading
+import copy
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import groupby
+from services.search import index_store, topk
+from services.search.inverted_index import InvertedIndex
+from services.search.bm25f import BM25FIndex, FIELDS, default_field_weights
+from services.search.fusion import fuse_results
+from services.search.segments import SegmentedIndex
+from services.search.title_index import TitleIndex
+from services.search.token_sets import JobTokenSets
+from services.search.result_cache import QueryResultCache
+from services.search.lsa import LSAIndex, DEFAULT_COMPONENTS, lsa_path
+from services.search.facets import FacetIndex
+from services.search.job_links import JobLinks
+from services.search.job_store import JobStore, JobRecord, read_jobs
+from services.search.spelling import SpellingCorrector
+from services.search.trace import NULL_TRACE
+from services.search.neighbors import NeighborTable, DEFAULT_NEIGHBORS, neighbors_path, build_lock
+from services.search.suggest import SuggestIndex
+from services.search.snapshot import IndexSnapshot, LAZY_FIELDS
+from services.search.journal import ChangeJournal, journal_path, checkpoint_path
+from utils.text_analyzer import text_analyzer, normalize, STOP_WORDS, TECH_TOKENS
+
+# Retrieval backends: 'exhaustive' scores every job, 'inverted' walks postings lists with WAND pruning
+SEARCH_BACKENDS = ("exhaustive", "inverted")
+# Scoring modes: 'tfidf' cosine over the combined text, 'bm25f' per-field statistics weighted at query time,
+# 'lsa' dense cosine in a TruncatedSVD latent space (catches near-synonyms)
+SCORING_MODES = ("tfidf", "bm25f", "lsa")
+# Words of job-search requests, never "corrected" toward a job term ('stage' is not a typo of 'sage')
+QUERY_WORDS = ['stage', 'stages', 'stagiaire', 'poste', 'postes', 'emploi', 'emplois', 'travail', 'offre', 'offres',
+               'cherche', 'recherche', 'chercher', 'trouver', 'veux', 'voudrais', 'aimerais', 'besoin',
+               'alternance', 'junior', 'senior', 'debutant', 'experience', 'maroc', 'casablanca', 'rabat']
+JOB_FIELDS = ['job_title', 'category', 'description', 'required_skills', 'recommended_courses', 'avg_salary_mad', 'demand_level']
+# Field weights of the TF-IDF index: times each field's text is repeated in the combined text (also
+# used by the default ranking's explain); the BM25F mode weights the same fields at query time instead
+TFIDF_FIELD_WEIGHTS = {'job_title': 3, 'required_skills': 2, 'description': 1, 'category': 1}
+
+
+# Module level so the bulk builder's worker processes produce the same features and vectorizer
+def preprocess_text(text) -> str:
+    """Clean and preprocess text for vectorization (shared analyzer: same terms at index and query time)"""
+    if pd.isna(text):
+        return ""
+
+    # Lowercase, accent folding, punctuation, FR/EN stop words, Snowball stems
+    return text_analyzer.analyze(text)
+
+
+def combine_job_features(row) -> str:
+    """Combine job features with weights for better matching"""
+    # Title and skills weighted more heavily (default ranking, delta segment, spelling, neighbors, saved artifacts)
+    return ' '.join(' '.join([preprocess_text(row[field])] * weight) for field, weight in TFIDF_FIELD_WEIGHTS.items())
+
+
+def build_vectorizer() -> TfidfVectorizer:
+    """Unfitted TF-IDF vectorizer with the matcher parameters"""
+    return TfidfVectorizer(
+        max_features=1000,
+        stop_words=None,  # removed by the analyzer
+        ngram_range=(1, 2),
+        min_df=1,
+        max_df=0.8,
+        dtype=np.float32
+    )
+
 
 class JobMatcher:
-    def __init__(self, csv_path: str):
-        self.df = pd.read_csv(csv_path)
-        self.vectorizer = None
-        self.job_vectors = None
-        self._preprocess_data()
+    def __init__(self, csv_path: str, index_dir: Optional[str] = None, rebuild_index: bool = False,
+                 backend: Optional[str] = None, scoring: Optional[str] = None):
+        self.backend = backend or os.getenv("JOB_SEARCH_BACKEND", "exhaustive")
+        if self.backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{self.backend}', expected one of {SEARCH_BACKENDS}")
+        self.scoring = scoring or os.getenv("JOB_SEARCH_SCORING", "tfidf")
+        if self.scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{self.scoring}', expected one of {SCORING_MODES}")
+        self.field_weights = default_field_weights()
+        self.csv_path = csv_path
+        index_root = index_dir or index_store.default_index_root(csv_path)
+        # Feed version (the provider reloads when it changes); the feed itself is only read
+        self.feed_key = index_store.content_hash(csv_path)
+        # Upserts and deletes are journaled next to the index artifacts and replayed on top of the feed
+        self.journal = ChangeJournal(journal_path(index_root, csv_path))
+        checkpoint = None if rebuild_index else self._load_checkpoint(index_root)
+        if checkpoint is not None:
+            # Feed + journal prefix already compacted: no replay of that prefix
+            self._store, index_key, (vectorizer, job_vectors) = checkpoint
+        else:
+            # Artifact keyed by the CSV content hash: a changed CSV gets a new index automatically
+            index_key = self.feed_key
+            artifact = index_store.artifact_path(index_root, index_key)
+            loaded = None if rebuild_index else self._load_index(artifact, index_key)
+            # Columnar records, append-only: searches read views of it through their snapshot, upserts
+            # append to it. Memory-mapped from the artifact, so the feed is only parsed by the first build
+            self._store = None if loaded is None else self._load_jobs(artifact, loaded[1].shape[0])
+            if self._store is None:
+                self._store = self._read_feed(csv_path)
+                if loaded is None or loaded[1].shape[0] != len(self._store):
+                    loaded = self._preprocess_data(self._store)
+                    self._save_index(artifact, loaded[0], loaded[1], self._store)
+                else:
+                    # Bulk-built artifact: vectors only, the records are saved on this first load
+                    self._save_jobs(artifact, self._store)
+                mapped = self._load_jobs(artifact, len(self._store))
+                if mapped is not None:
+                    self._store = mapped
+            vectorizer, job_vectors = loaded
+        index_path = index_store.artifact_path(index_root, index_key)
+
+        # Writers are serialized; readers never lock, they read one snapshot
+        self._write_lock = threading.RLock()
+        self._compaction_requested = threading.Event()
+        # Set when a reload replaced this matcher: it keeps answering in-flight requests, never compacts again
+        self._closed = threading.Event()
+        self.max_delta_rows = int(os.getenv("JOB_INDEX_MAX_DELTA", "1000"))
+        self.last_compaction: Optional[str] = None
+        # Entries are tagged with the snapshot version: results of older versions are invalidated
+        self.result_cache = QueryResultCache(
+            max_entries=int(os.getenv("JOB_QUERY_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("JOB_QUERY_CACHE_TTL", "300"))
+        )
+        # Query-side analyzer of the vectorizer (vocabulary checks of the assistant's query planner)
+        self._query_analyzer = None
+        # Dense LSA mode: built offline (python -m services.search.lsa) or on first use, then memory-mapped
+        self.lsa_components = int(os.getenv("JOB_LSA_COMPONENTS", str(DEFAULT_COMPONENTS)))
+        self.lsa_quantized = os.getenv("JOB_LSA_QUANTIZED", "0") == "1"
+        # "More like this": top-N neighbors of every job (0 disables it), memory-mapped when built
+        # offline (bulk_build, python -m services.search.neighbors), otherwise built in the background
+        self.n_neighbors = int(os.getenv("JOB_SIMILAR_NEIGHBORS", str(DEFAULT_NEIGHBORS)))
+        self._neighbor_lock = threading.Lock()
+        self._neighbor_thread: Optional[threading.Thread] = None
+        # Set on the read-only copies returned by pinned()
+        self._pinned: Optional[IndexSnapshot] = None
+
+        # Everything a search reads, replaced as a whole by every write and compaction
+        self._snapshot = self._build_snapshot(0, index_key, index_path, self._store.view(), vectorizer, job_vectors)
+        # Built eagerly when it is the default mode, otherwise on first use
+        if self.scoring == "bm25f":
+            self._get_bm25f_index(self._snapshot)
+        if self.scoring == "lsa":
+            self._get_lsa_index(self._snapshot)
+        # Writes journaled since the checkpoint (or since the feed, without one), merged by the next compaction
+        with self._write_lock:
+            if self._apply_entries(self.journal.read_new()):
+                self._compaction_requested.set()
+        self._schedule_neighbor_table()
     
     def _preprocess_text(self, text: str) -> str:
-        """Clean and preprocess text for vectorization"""
-        if pd.isna(text):
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove punctuation
-        text = text.translate(str.maketrans('', '', string.punctuation))
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
+        return preprocess_text(text)
+
     def _combine_job_features(self, row) -> str:
-        """Combine job features with weights for better matching"""
-        title_weight = 3  # Weight title more heavily
-        skills_weight = 2  # Weight skills more heavily
-        description_weight = 1
-        
-        title = ' '.join([self._preprocess_text(row['job_title'])] * title_weight)
-        skills = ' '.join([self._preprocess_text(row['required_skills'])] * skills_weight)
-        description = ' '.join([self._preprocess_text(row['description'])] * description_weight)
-        category = self._preprocess_text(row['category'])
-        
-        combined = f"{title} {skills} {description} {category}"
-        return combined
-    
-    def _preprocess_data(self):
+        return combine_job_features(row)
+
+    def _build_vectorizer(self) -> TfidfVectorizer:
+        return build_vectorizer()
+
+    def _query_vectorizer(self, vocabulary: dict, idf: np.ndarray) -> TfidfVectorizer:
+        """Fitted vectorizer of a snapshot: shared vocabulary, IDF of that snapshot (no refit)"""
+        vectorizer = self._build_vectorizer()
+        vectorizer.vocabulary_ = vocabulary
+        vectorizer.idf_ = np.asarray(idf, dtype=np.float32)
+        return vectorizer
+
+    def _preprocess_data(self, jobs: JobStore) -> Tuple[TfidfVectorizer, sparse.csr_matrix]:
         """Preprocess the dataset and create TF-IDF vectors"""
         print("📊 Preprocessing job data...")
         
-        # Combine features for each job
-        self.df['combined_features'] = self.df.apply(self._combine_job_features, axis=1)
+        # Combine features for each job (not stored, only the vectors are needed)
+        combined_features = [self._combine_job_features(job) for job in jobs]
         
         # Initialize and fit TF-IDF vectorizer
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words=['le', 'la', 'les', 'de', 'des', 'du', 'et', 'en', 'au', 'aux', 'à', 'dans', 'pour'],
-            ngram_range=(1, 2),
-            min_df=1,
-            max_df=0.8
-        )
+        vectorizer = self._build_vectorizer()
         
         # Create TF-IDF vectors
-        self.job_vectors = self.vectorizer.fit_transform(self.df['combined_features'])
-        print(f"✅ Vectorized {len(self.df)} jobs with {len(self.vectorizer.get_feature_names_out())} features")
+        job_vectors = vectorizer.fit_transform(combined_features)
+        print(f"✅ Vectorized {len(jobs)} jobs with {len(vectorizer.get_feature_names_out())} features")
+        return vectorizer, job_vectors
+
+    @staticmethod
+    def _read_feed(csv_path: str) -> JobStore:
+        """Records parsed from the feed (first build of a feed version only)"""
+        # CSV or JSON Lines feed (the bulk builder reads the same formats)
+        df = read_jobs(csv_path)
+        if 'job_id' not in df.columns:
+            # Stable ids for upserts and deletes (same value the routes used as fallback: position + 1)
+            df.insert(0, 'job_id', range(1, len(df) + 1))
+        # The DataFrame is only used to parse the feed
+        return JobStore.from_dataframe(df)
+
+    def _load_jobs(self, index_path: str, n_jobs: int) -> Optional[JobStore]:
+        """Memory-map the job records saved with an artifact, None when missing or not matching its vectors"""
+        try:
+            store = index_store.load_jobs(index_path)
+        except Exception as e:
+            print(f"⚠️ Could not load job records of {index_path}: {e}")
+            return None
+        return store if store is not None and len(store) == n_jobs else None
+
+    def _save_jobs(self, index_path: str, store: JobStore):
+        try:
+            index_store.save_jobs(index_path, store)
+        except Exception as e:
+            # Served from memory, the next worker will retry
+            print(f"⚠️ Could not save job records of {index_path}: {e}")
+
+    def _load_index(self, index_path: str, index_key: str,
+                    n_jobs: Optional[int] = None) -> Optional[Tuple[TfidfVectorizer, sparse.csr_matrix]]:
+        """Memory-map a previously built index for this CSV, if any (n_jobs: expected row count)"""
+        try:
+            artifact = index_store.load_index(index_path)
+        except Exception as e:
+            print(f"⚠️ Could not load search index {index_path}: {e}")
+            return None
+        if artifact is None or (n_jobs is not None and artifact["job_vectors"].shape[0] != n_jobs):
+            return None
+
+        vectorizer = self._build_vectorizer()
+        vectorizer.vocabulary_ = artifact["vocabulary"]
+        vectorizer.idf_ = artifact["idf"]
+        job_vectors = artifact["job_vectors"]
+        print(f"✅ Loaded search index {index_key} ({job_vectors.shape[0]} jobs, {job_vectors.shape[1]} features)")
+        return vectorizer, job_vectors
+
+    def _load_checkpoint(self, index_root: str) -> Optional[Tuple[JobStore, str, Tuple[TfidfVectorizer, sparse.csr_matrix]]]:
+        """
+        (jobs, index key, (vectorizer, vectors)) of the latest compaction of this feed, when the journal
+        still starts with the entries it includes (the journal is then read up to that point)
+        """
+        path = checkpoint_path(index_root, self.feed_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            self.journal.read_new(until=checkpoint["journal_offset"])
+            if (self.journal.offset, self.journal.digest) != (checkpoint["journal_offset"], checkpoint["journal_digest"]):
+                raise ValueError("the journal was rewritten since this checkpoint")
+            index_key = checkpoint["index_key"]
+            index_path = index_store.artifact_path(index_root, index_key)
+            loaded = self._load_index(index_path, index_key)
+            if loaded is None:
+                raise ValueError(f"artifact {index_key} is missing")
+            store = self._load_jobs(index_path, loaded[1].shape[0])
+            if store is None:
+                raise ValueError(f"job records of artifact {index_key} are missing")
+        except Exception as e:
+            print(f"⚠️ Ignoring index checkpoint {path}: {e}")
+            self.journal = ChangeJournal(self.journal.path)
+            return None
+        return store, index_key, loaded
+
+    def _save_checkpoint(self, index_path: str, vectorizer: TfidfVectorizer, idf: np.ndarray,
+                         vectors: sparse.csr_matrix, store: JobStore):
+        """Artifact and records of a compaction, then the checkpoint pointing at them (written last)"""
+        index_store.save_index(index_path, vectorizer.vocabulary_, idf, vectors,
+                               params={"csv_path": os.path.basename(self.csv_path), "n_jobs": len(store)},
+                               jobs=store)
+        path = checkpoint_path(os.path.dirname(index_path), self.feed_key)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "feed_key": self.feed_key,
+                "journal_offset": self.journal.offset,
+                "journal_digest": self.journal.digest,
+                "index_key": os.path.basename(index_path),
+            }, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _build_snapshot(self, version: int, index_key: str, index_path: str, jobs: JobStore,
+                        vectorizer: TfidfVectorizer, job_vectors: sparse.csr_matrix,
+                        base_idf: Optional[np.ndarray] = None, cache: Optional[dict] = None) -> IndexSnapshot:
+        """
+        Snapshot of a freshly built or compacted index: records and vectors only, the other
+        structures (cache: already built ones) are built from the records on first use
+        """
+        # Incremental updates: delta segment + tombstones on top of the base vectors, merged by compact()
+        segments = SegmentedIndex(job_vectors, vectorizer.idf_ if base_idf is None else base_idf)
+        return IndexSnapshot(
+            version=version,
+            index_key=index_key,
+            index_path=index_path,
+            jobs=jobs,
+            segments=segments,
+            vectorizer=vectorizer,
+            row_by_job_id={job_id: row for row, job_id in enumerate(jobs.column('job_id'))},
+            builders=self._snapshot_builders(),
+            inverted_index=InvertedIndex(job_vectors) if self.backend == "inverted" else None,
+            # Missing tables are built off the request path, see _schedule_neighbor_table
+            neighbors=self._load_neighbor_table(index_path, job_vectors.shape[0]),
+            cache=cache
+        )
+
+    def _snapshot_builders(self) -> dict:
+        return {
+            "facet_index": lambda snap: self._build_facet_index(snap.jobs),
+            "title_index": lambda snap: self._build_title_index(snap),
+            # Typeahead over titles, skills and categories
+            "suggest_index": lambda snap: self._build_suggest_index(snap),
+            # Word tokens of every job for the assistant's "does the job mention X" checks
+            "token_sets": lambda snap: JobTokenSets.build(snap.jobs),
+            # External search links, one set per distinct title
+            "links": lambda snap: JobLinks(snap.jobs.column('job_title')),
+            # Job records serialized once, reused by /jobs/all pages and streams
+            "job_json": lambda snap: [self._serialize_job(job) for job in snap.jobs],
+            # Typo correction toward the index vocabulary
+            "speller": lambda snap: self._build_speller(snap.jobs, snap.vectorizer.vocabulary_, snap.segments.doc_freq),
+        }
+
+    @staticmethod
+    def _live_column(snap: IndexSnapshot, column: str) -> List:
+        """Values of a column for the live jobs of a snapshot"""
+        values = snap.jobs.column(column)
+        if snap.segments.n_deleted:
+            values = [values[row] for row in np.flatnonzero(snap.segments.live)]
+        return values
+
+    def _field_texts(self, jobs) -> dict:
+        """Preprocessed text of each BM25F field, one entry per job (no duplication); jobs: a JobStore or job dicts"""
+        texts = {}
+        for field in FIELDS:
+            column = jobs.column(field) if isinstance(jobs, JobStore) else [str(job.get(field) or "") for job in jobs]
+            if field == "required_skills":
+                # Skills are comma-separated: keep them as separate tokens
+                column = [value.replace(",", " ") for value in column]
+            texts[field] = [self._preprocess_text(value) for value in column]
+        return texts
+
+    def _build_bm25f_index(self, jobs: JobStore) -> BM25FIndex:
+        index = BM25FIndex(self._field_texts(jobs), stop_words=None)
+        print(f"✅ BM25F index built: {len(index.vectorizer.vocabulary_)} terms over {len(FIELDS)} fields")
+        return index
+
+    def _build_title_index(self, snap: IndexSnapshot) -> TitleIndex:
+        return TitleIndex([self._preprocess_text(title) for title in self._live_column(snap, 'job_title')])
+
+    def _get_bm25f_index(self, snap: IndexSnapshot) -> BM25FIndex:
+        return snap.cached("bm25f", lambda: self._build_bm25f_index(snap.jobs))
+
+    @staticmethod
+    def _serialize_job(job: dict) -> bytes:
+        """JSON bytes of a job in the Job model layout"""
+        record = {'job_id': int(job.get('job_id') or 0)}
+        for field in JOB_FIELDS:
+            value = job.get(field)
+            record[field] = "" if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+        return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+    def _build_facet_index(self, jobs: JobStore) -> FacetIndex:
+        return FacetIndex({column: jobs.column(column) for column in ('category', 'demand_level', 'avg_salary_mad')})
+
+    def _build_suggest_index(self, snap: IndexSnapshot) -> SuggestIndex:
+        return SuggestIndex.build(*(self._live_column(snap, column)
+                                    for column in ('job_title', 'required_skills', 'category', 'demand_level')))
+
+    def _build_speller(self, jobs: JobStore, vocabulary: dict, doc_freq: np.ndarray) -> SpellingCorrector:
+        """Corrects surface words (before stemming): every job word whose stem is an index term"""
+        words = {}
+        for field in ('job_title', 'required_skills', 'description', 'category'):
+            for text in jobs.column(field):
+                for token in normalize(text).split():
+                    if token not in words:
+                        column = vocabulary.get(text_analyzer.stem(token))
+                        if column is not None:
+                            words[token] = int(doc_freq[column])
+        # Inflections of an index term ('developpeurs') already match through their stem
+        # Technology names are never corrected toward another term ('csharp' is not 'sharepoint')
+        return SpellingCorrector(words, ignore=STOP_WORDS | set(QUERY_WORDS) | set(TECH_TOKENS.values()),
+                                 is_known=lambda token: text_analyzer.stem(token) in vocabulary)
+
+    def _get_lsa_index(self, snap: Optional[IndexSnapshot] = None) -> LSAIndex:
+        snap = snap or self._current()
+        return snap.cached("lsa", lambda: self._load_lsa_index(snap))
+
+    def _load_lsa_index(self, snap: IndexSnapshot) -> LSAIndex:
+        path = lsa_path(snap.index_path, self.lsa_components)
+        index = LSAIndex.load(path)
+        if index is None or index.embeddings.shape[0] != snap.segments.n_base:
+            print(f"📊 Fitting LSA ({self.lsa_components} components)...")
+            index = LSAIndex.fit(snap.segments.base, self.lsa_components)
+            try:
+                index.save(path)
+            except Exception as e:
+                print(f"⚠️ Could not save LSA index {path}: {e}")
+        print(f"✅ LSA index ready: {index.embeddings.shape[0]} jobs x {index.n_components} dims")
+        return index
+
+    def _load_neighbor_table(self, index_path: str, n_rows: int) -> Optional[NeighborTable]:
+        """Memory-map the neighbor table of an index artifact, None when missing (never builds)"""
+        if self.n_neighbors <= 0:
+            return None
+        table = NeighborTable.load(neighbors_path(index_path, self.n_neighbors))
+        return table if table is not None and table.n_rows == n_rows else None
+
+    def build_neighbor_table(self) -> Optional[NeighborTable]:
+        """
+        Build and save the neighbor table of the serving index, then publish it. Runs in the
+        background thread (meanwhile similar_jobs scores exactly) or offline. Workers serving the
+        same artifact build it once: the others wait for the build lock, then load the saved table.
+        """
+        snap = self._current()
+        if self.n_neighbors <= 0 or snap.neighbors is not None:
+            return snap.neighbors
+        path = neighbors_path(snap.index_path, self.n_neighbors)
+        with build_lock(path):
+            table = self._load_neighbor_table(snap.index_path, snap.segments.n_base)
+            if table is None:
+                if self._pinned is None and self._snapshot.index_path != snap.index_path:
+                    # Compacted while waiting for the lock: the table of the new artifact is built instead
+                    return None
+                print(f"📊 Building neighbor table ({self.n_neighbors} per job)...")
+                table = NeighborTable.build(snap.segments.base, self.n_neighbors)
+                try:
+                    table.save(path)
+                except Exception as e:
+                    print(f"⚠️ Could not save neighbor table {path}: {e}")
+        if self._pinned is None:
+            with self._write_lock:
+                current = self._snapshot
+                # Upserts keep the base rows the table was built from; a compaction replaced them
+                if current.index_path == snap.index_path and current.neighbors is None:
+                    self._publish(current.replace(neighbors=table, carry=("bm25f", "lsa", "listing") + LAZY_FIELDS))
+        return table
+
+    def _schedule_neighbor_table(self):
+        """Start the background build when the serving snapshot has no neighbor table (one thread at a time)"""
+        if self._pinned is not None or self.n_neighbors <= 0 or self._snapshot.neighbors is not None:
+            return
+        with self._neighbor_lock:
+            if self._neighbor_thread is not None:
+                return
+
+            def run():
+                while True:
+                    try:
+                        self.build_neighbor_table()
+                    except Exception as e:
+                        print(f"❌ Neighbor table build failed: {e}")
+                        missing = False
+                    else:
+                        # A compaction published a snapshot without table during the build
+                        missing = self._snapshot.neighbors is None
+                    with self._neighbor_lock:
+                        if not missing or self._closed.is_set():
+                            self._neighbor_thread = None
+                            return
+
+            self._neighbor_thread = threading.Thread(target=run, name="job-neighbor-table", daemon=True)
+            self._neighbor_thread.start()
+
+    def _save_index(self, index_path: str, vectorizer: TfidfVectorizer, job_vectors: sparse.csr_matrix, store: JobStore):
+        """Persist the fitted vocabulary, IDF weights, job vectors and job records"""
+        try:
+            index_store.save_index(
+                index_path,
+                vectorizer.vocabulary_,
+                vectorizer.idf_,
+                job_vectors,
+                params={"csv_path": os.path.basename(self.csv_path), "n_jobs": len(store)},
+                jobs=store
+            )
+        except Exception as e:
+            # The matcher still works from memory, the next worker will retry the build
+            print(f"⚠️ Could not save search index {index_path}: {e}")
+
+    # --- Snapshots ---
+
+    def _current(self) -> IndexSnapshot:
+        """Snapshot a read works on: the pinned one, otherwise the latest published one (one reference read)"""
+        pinned = self._pinned
+        return pinned if pinned is not None else self._snapshot
+
+    def pinned(self) -> "JobMatcher":
+        """
+        Read-only copy of this matcher frozen on its current snapshot, for a whole request: rows returned
+        by a search stay valid for get_job_by_index / job_links / explain even if a compaction renumbers them.
+        """
+        view = copy.copy(self)
+        view._pinned = self._current()
+        return view
+
+    def _check_writable(self):
+        if self._pinned is not None:
+            raise TypeError("a pinned matcher is read-only")
+
+    @property
+    def index_key(self) -> str:
+        return self._current().index_key
+
+    @property
+    def index_path(self) -> str:
+        return self._current().index_path
+
+    @property
+    def index_version(self) -> int:
+        """Bumped on every write and compaction"""
+        return self._current().version
+
+    @property
+    def segments(self) -> SegmentedIndex:
+        return self._current().segments
+
+    @property
+    def jobs(self) -> JobStore:
+        return self._current().jobs
+
+    @property
+    def vectorizer(self) -> TfidfVectorizer:
+        return self._current().vectorizer
     
-    def search_jobs(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
-        """Search for jobs matching the query"""
+    def correct_query(self, query: str) -> Tuple[str, List[Dict]]:
+        """
+        Misspelled query terms replaced by the closest index terms, with the corrections applied
+        ({"original", "corrected", "distance"}). The query is returned unchanged when nothing is corrected.
+        """
+        if not query or query.strip() == "":
+            return query, []
+        corrected, corrections = self._current().speller.correct_text(normalize(query))
+        return (corrected if corrections else query), corrections
+
+    def has_known_terms(self, query: str, scoring: Optional[str] = None) -> bool:
+        """False when no analyzed term of the query is in the index vocabulary: a search cannot return anything"""
+        snap = self._current()
+        processed_query = self._preprocess_text(query or "")
+        if not processed_query:
+            return False
+        if (scoring or self.scoring) == "bm25f":
+            return len(self._get_bm25f_index(snap).query_terms(processed_query)) > 0
+        if self._query_analyzer is None:
+            self._query_analyzer = snap.vectorizer.build_analyzer()
+        vocabulary = snap.vectorizer.vocabulary_
+        return any(term in vocabulary for term in self._query_analyzer(processed_query))
+
+    def search_jobs(self, query: str, top_k: int = 5, scoring: Optional[str] = None,
+                    field_weights: Optional[dict] = None, filters: Optional[dict] = None,
+                    trace=None) -> List[Tuple[int, float]]:
+        """
+        Search for jobs matching the query.
+        scoring overrides the configured mode; field_weights (BM25F only) are applied at query time, no refit.
+        filters (see facets.normalize_filters) restrict scoring to matching jobs before ranking.
+        trace (SearchTrace) records per-stage timings and bypasses the result cache.
+        """
+        return self._search(self._current(), query, top_k, scoring, field_weights, filters, trace)
+
+    def _search(self, snap: IndexSnapshot, query: str, top_k: int, scoring: Optional[str],
+                field_weights: Optional[dict], filters: Optional[dict], trace=None) -> List[Tuple[int, float]]:
         if not query or query.strip() == "":
             return []
         
-        # Preprocess query
-        processed_query = self._preprocess_text(query)
+        scoring = scoring or ("bm25f" if field_weights else self.scoring)
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{scoring}', expected one of {SCORING_MODES}")
+        trace = trace or NULL_TRACE
         
-        # Vectorize query
-        query_vector = self.vectorizer.transform([processed_query])
+        # Preprocess query
+        with trace.stage("analysis"):
+            processed_query = self._preprocess_text(query)
+        weights = field_weights or self.field_weights
+        if trace.enabled:
+            return self._search_uncached(snap, processed_query, top_k, scoring, weights, filters, trace)
         
-        # Compute cosine similarity
-        similarities = cosine_similarity(query_vector, self.job_vectors).flatten()
+        # Popular queries are served from the cache until the index changes
+        cache_key = self._cache_key(processed_query, top_k, scoring, weights, filters)
+        cached = self.result_cache.get(cache_key, snap.version)
+        if cached is not None:
+            return list(cached)
+        results = self._search_uncached(snap, processed_query, top_k, scoring, weights, filters)
+        self.result_cache.put(cache_key, snap.version, tuple(results))
+        return results
+
+    def _cache_key(self, processed_query: str, top_k: int, scoring: str, field_weights: dict,
+                   filters: Optional[dict] = None) -> tuple:
+        weights_key = tuple(sorted(field_weights.items())) if scoring == "bm25f" else None
+        filters_key = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items())) if filters else None
+        return (processed_query, top_k, scoring, weights_key, filters_key)
+
+    def _search_uncached(self, snap: IndexSnapshot, processed_query: str, top_k: int, scoring: str,
+                         field_weights: dict, filters: Optional[dict] = None,
+                         trace=NULL_TRACE) -> List[Tuple[int, float]]:
+        segments = snap.segments
+        rows = None
+        if filters:
+            # Facet pre-filter: only these rows are scored and ranked
+            with trace.stage("filtering"):
+                rows = np.flatnonzero(snap.facet_index.mask(filters, segments.live))
+            if rows.size == 0:
+                return []
+        if scoring == "bm25f":
+            return self._bm25f_search(snap, processed_query, top_k, field_weights, rows, trace)
         
-        # Get top k matches
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # Vectorize query
+        with trace.stage("vectorization"):
+            query_vector = snap.vectorizer.transform([processed_query])
+        if query_vector.nnz == 0:
+            # No query term in the vocabulary: nothing can score above zero
+            return []
         
-        results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.01:  # Only include matches with some similarity
-                results.append((idx, similarities[idx]))
+        if scoring == "lsa":
+            return self._lsa_search(snap, query_vector, top_k, rows, trace)
+        if rows is not None:
+            # Scoring cost follows the filtered subset, whatever the backend
+            with trace.stage("scoring"):
+                scores = segments.scores_rows(query_vector, rows)
+            with trace.stage("topk"):
+                matches = topk.top_k_scores(scores, top_k, threshold=topk.MIN_SCORE)
+            return [(int(rows[idx]), score) for idx, score in matches]
+        if snap.inverted_index is not None:
+            # WAND scores and selects in the same pass: timed as scoring
+            with trace.stage("scoring"):
+                live = segments.live if segments.n_deleted else None
+                matches = snap.inverted_index.search(query_vector, top_k, threshold=topk.MIN_SCORE, live=live)
+                # Jobs added since the last compaction are not in the postings lists yet
+                delta_matches = segments.delta_top_k(query_vector, top_k, threshold=topk.MIN_SCORE)
+            return topk.top_k_pairs(matches + delta_matches, top_k) if delta_matches else matches
         
+        # Cosine similarity as a sparse dot product, then partial top-k selection
+        with trace.stage("scoring"):
+            similarities = segments.scores(query_vector)
+        with trace.stage("topk"):
+            return topk.top_k_scores(similarities, top_k, threshold=topk.MIN_SCORE)
+
+    def _lsa_search(self, snap: IndexSnapshot, query_vector, top_k: int, rows: Optional[np.ndarray] = None,
+                    trace=NULL_TRACE) -> List[Tuple[int, float]]:
+        lsa_index = self._get_lsa_index(snap)
+        segments = snap.segments
+        with trace.stage("scoring"):
+            if rows is None:
+                rows = np.flatnonzero(segments.live) if segments.n_deleted else None
+            split = segments.n_base if rows is None else int(np.searchsorted(rows, segments.n_base))
+            base_rows = None if rows is None else rows[:split]
+            scores = lsa_index.scores(query_vector, use_quantized=self.lsa_quantized, rows=base_rows)
+            delta = segments.delta_vectors()
+            if delta is not None:
+                # Jobs added since the last compaction are projected on the fly
+                if rows is not None:
+                    delta = delta[rows[split:] - segments.n_base]
+                delta_embeddings = LSAIndex._project(lsa_index.components, delta)
+                scores = np.concatenate([scores, delta_embeddings.dot(lsa_index.embed(query_vector))])
+        with trace.stage("topk"):
+            matches = topk.top_k_scores(scores, top_k, threshold=topk.MIN_SCORE)
+        if rows is None:
+            return matches
+        return [(int(rows[idx]), score) for idx, score in matches]
+
+    def _bm25f_search(self, snap: IndexSnapshot, processed_query: str, top_k: int, field_weights: dict,
+                      rows: Optional[np.ndarray] = None, trace=NULL_TRACE) -> List[Tuple[int, float]]:
+        with trace.stage("scoring"):
+            scores = self._get_bm25f_index(snap).score(processed_query, field_weights)
+        with trace.stage("topk"):
+            if rows is not None:
+                # Field statistics are per column: score everything, rank only the filtered rows
+                matches = topk.top_k_scores(scores[rows], top_k, threshold=topk.MIN_SCORE)
+                return [(int(rows[idx]), score) for idx, score in matches]
+            if snap.segments.n_deleted:
+                scores[~snap.segments.live] = 0.0
+            return topk.top_k_scores(scores, top_k, threshold=topk.MIN_SCORE)
+
+    def explain(self, query: str, index: int, scoring: Optional[str] = None,
+                field_weights: Optional[dict] = None) -> Dict:
+        """
+        Why a job scores what it does for a query: contribution of each query term,
+        split by field when the scoring mode allows it (contributions sum to the score).
+        """
+        snap = self._current()
+        scoring = scoring or ("bm25f" if field_weights else self.scoring)
+        processed_query = self._preprocess_text(query)
+        if scoring == "bm25f":
+            terms = self._get_bm25f_index(snap).explain(processed_query, index, field_weights or self.field_weights)
+        else:
+            query_vector = snap.vectorizer.transform([processed_query])
+            if scoring == "lsa":
+                terms = self._explain_lsa(snap, query_vector, index)
+            else:
+                terms = self._explain_tfidf(snap, query_vector, index)
+        terms.sort(key=lambda term: term["contribution"], reverse=True)
+        return {
+            "scoring": scoring,
+            "analyzed_query": processed_query,
+            "score": round(sum(term["contribution"] for term in terms), 6),
+            "terms": terms,
+        }
+
+    def _explain_tfidf(self, snap: IndexSnapshot, query_vector, index: int) -> List[Dict]:
+        """Cosine = sum of q_t * d_t; each term split by its weighted occurrences per field"""
+        job_vector = snap.segments.row_vector(index)
+        doc_weights = dict(zip(job_vector.indices.tolist(), job_vector.data.tolist()))
+        features = snap.vectorizer.get_feature_names_out()
+        analyzer = snap.vectorizer.build_analyzer()
+        job = snap.jobs.record(index)
+        # Same multipliers as _combine_job_features
+        field_counts = {
+            field: (multiplier, Counter(analyzer(self._preprocess_text(job.get(field, "")))))
+            for field, multiplier in TFIDF_FIELD_WEIGHTS.items()
+        }
+        terms = []
+        for column, query_weight in zip(query_vector.indices.tolist(), query_vector.data.tolist()):
+            term = features[column]
+            contribution = query_weight * doc_weights.get(column, 0.0)
+            occurrences = {field: multiplier * counts[term] for field, (multiplier, counts) in field_counts.items() if counts[term]}
+            total = sum(occurrences.values())
+            terms.append({
+                "term": term,
+                "query_weight": round(query_weight, 6),
+                "contribution": round(contribution, 6),
+                "fields": {field: round(contribution * n / total, 6) for field, n in occurrences.items()} if total else {},
+            })
+        return terms
+
+    def _explain_lsa(self, snap: IndexSnapshot, query_vector, index: int) -> List[Dict]:
+        """The projection is linear: score = sum_t q_t * (C[:, t] . e_d) / |q C^T|, no field split"""
+        lsa_index = self._get_lsa_index(snap)
+        components = np.asarray(lsa_index.components)
+        if index < lsa_index.embeddings.shape[0]:
+            job_embedding = np.asarray(lsa_index.embeddings[index])
+        else:
+            job_embedding = LSAIndex._project(components, snap.segments.row_vector(index))[0]
+        projected = np.asarray(sparse.csr_matrix(query_vector, dtype=np.float32).dot(components.T)).ravel()
+        norm = float(np.linalg.norm(projected)) or 1.0
+        features = snap.vectorizer.get_feature_names_out()
+        return [{
+            "term": features[column],
+            "query_weight": round(query_weight, 6),
+            "contribution": round(float(query_weight * components[:, column].dot(job_embedding)) / norm, 6),
+            "fields": {},
+        } for column, query_weight in zip(query_vector.indices.tolist(), query_vector.data.tolist())]
+    
+    def search_jobs_many(self, queries: List[str], top_k: int = 5, scoring: Optional[str] = None,
+                         field_weights: Optional[dict] = None, filters: Optional[dict] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Per-query results for several queries at once, same order as queries (all from the same snapshot).
+        TF-IDF mode vectorizes all queries in one transform and scores them with a single sparse product.
+        """
+        snap = self._current()
+        scoring = scoring or ("bm25f" if field_weights else self.scoring)
+        if scoring != "tfidf" or snap.inverted_index is not None or filters:
+            # Per-query algorithms (BM25F columns, WAND cursors, LSA mat-vec, filtered subsets): no shared sparse product to gain
+            return [self._search(snap, q, top_k, scoring, field_weights, filters) for q in queries]
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{scoring}', expected one of {SCORING_MODES}")
+
+        results: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        version = snap.version
+        processed = {}
+        for i, q in enumerate(queries):
+            if not q or not q.strip():
+                continue
+            processed_query = self._preprocess_text(q)
+            cached = self.result_cache.get(self._cache_key(processed_query, top_k, scoring, None), version)
+            if cached is not None:
+                results[i] = list(cached)
+            else:
+                processed[i] = processed_query
+        if not processed:
+            return results
+
+        positions = list(processed)
+        query_vectors = snap.vectorizer.transform([processed[i] for i in positions])
+        # (queries x jobs) sparse scores: only jobs sharing a term with a query are stored
+        scores = snap.segments.score_matrix(query_vectors)
+        for i, matches in zip(positions, topk.top_k_sparse_rows(scores, top_k, threshold=topk.MIN_SCORE)):
+            results[i] = matches
+            self.result_cache.put(self._cache_key(processed[i], top_k, scoring, None), version, tuple(matches))
         return results
+
+    def search_jobs_batch(self, queries: List[str], top_k: int = 5, aggregation: str = "max",
+                          limit: Optional[int] = None, scoring: Optional[str] = None,
+                          field_weights: Optional[dict] = None, filters: Optional[dict] = None) -> List[Tuple[int, float]]:
+        """
+        Search several queries in one pass and merge them into a single (idx, score) ranking.
+        aggregation: 'max', 'sum' or 'rrf' (reciprocal-rank fusion); limit caps the merged list.
+        """
+        per_query = self.search_jobs_many(queries, top_k, scoring=scoring, field_weights=field_weights, filters=filters)
+        return fuse_results(per_query, aggregation=aggregation, limit=limit)
     
-    def get_job_by_index(self, index: int) -> dict:
-        """Get job data by index"""
-        return self.df.iloc[index].to_dict()
+    def get_job_by_index(self, index: int) -> JobRecord:
+        """Get job data by index (read-only dict-like view, .to_dict() for a copy)"""
+        return self._current().jobs.record(index)
+
+    def get_job_by_id(self, job_id: int) -> Optional[JobRecord]:
+        """Live job with this job_id, None when unknown or deleted"""
+        snap = self._current()
+        row = snap.row_by_job_id.get(int(job_id))
+        if row is None:
+            return None
+        return snap.jobs.record(row)
+    
+    def job_mentions(self, index: int, terms: Iterable[str], fields: Optional[Sequence[str]] = None) -> bool:
+        """True when the job's title, skills or description (or the given fields) contain one of the lowercased words"""
+        token_sets = self._current().token_sets
+        return token_sets.mentions(index, token_sets.lookup(terms), fields)
+
+    def job_links(self, index: int, fallback_title: Optional[str] = None) -> Dict[str, str]:
+        """Precomputed external search URLs of a job (fallback_title used for a job without title)"""
+        return self._current().links.get(index, fallback_title)
+
+    def similar_jobs(self, job_id: int, top_k: int = 10) -> Optional[List[Tuple[int, float]]]:
+        """
+        Most similar live jobs to a job, as (row, score), None for an unknown job.
+        Jobs of the last build are a neighbor table lookup once the table is built (plus the small delta segment);
+        jobs upserted since then are scored once against the corpus until the next compaction.
+        """
+        snap = self._current()
+        row = snap.row_by_job_id.get(int(job_id))
+        segments, table = snap.segments, snap.neighbors
+        if row is None:
+            return None
+        vector = segments.row_vector(row)
+        if table is not None and row < table.n_rows and row < segments.n_base:
+            candidates = table.lookup(row) + segments.delta_top_k(vector, top_k + 1)
+        else:
+            candidates = topk.top_k_scores(segments.scores(vector), top_k + 1)
+        live = segments.live
+        matches = [(other, score) for other, score in candidates
+                   if other != row and other < len(live) and live[other]]
+        # Highest score first, lowest row first on ties (same order as the search results)
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:top_k]
     
     def get_all_jobs(self) -> List[dict]:
         """Get all jobs"""
-        return self.df.to_dict('records')
+        snap = self._current()
+        # Rows of deleted jobs stay in place (tombstoned) until the next compaction
+        return [snap.jobs.record(row).to_dict() for row in np.flatnonzero(snap.segments.live)]
+
+    def job_listing(self) -> Tuple[np.ndarray, np.ndarray, List[bytes]]:
+        """
+        (job ids sorted, matching rows, serialized jobs) of the live catalogue, built once per
+        snapshot: a page is a searchsorted + slice on the job_id cursor.
+        """
+        snap = self._current()
+        return snap.cached("listing", lambda: self._build_listing(snap))
+
+    @staticmethod
+    def _build_listing(snap: IndexSnapshot) -> Tuple[np.ndarray, np.ndarray, List[bytes]]:
+        row_by_job_id = snap.row_by_job_id
+        ids = np.fromiter(row_by_job_id.keys(), dtype=np.int64, count=len(row_by_job_id))
+        rows = np.fromiter(row_by_job_id.values(), dtype=np.int64, count=len(row_by_job_id))
+        order = np.argsort(ids, kind="stable")
+        return ids[order], rows[order], snap.job_json
     
     def get_jobs_by_category(self, category: str) -> List[dict]:
         """Get jobs by category"""
-        category_jobs = self.df[self.df['category'].str.lower() == category.lower()]
-        return category_jobs.to_dict('records')
+        snap = self._current()
+        rows = np.flatnonzero(snap.facet_index.mask({'category': [category]}, snap.segments.live))
+        return [snap.jobs.record(row).to_dict() for row in rows]
     
     def get_categories(self) -> List[str]:
         """Get all available categories"""
-        return self.df['category'].unique().tolist()
+        snap = self._current()
+        return snap.facet_index.values('category', snap.facet_index.mask(None, snap.segments.live))
+
+    def facet_counts(self, filters: Optional[dict] = None) -> Dict:
+        """Category / demand level counts and salary bounds over the live jobs matching filters"""
+        snap = self._current()
+        return snap.facet_index.counts(snap.facet_index.mask(filters, snap.segments.live))
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Typeahead completions of a prefix (jobs deleted since the last build count until the next compaction)"""
+        return self._current().suggest_index.suggest(prefix, limit)
 
     def has_job_title(self, query: str) -> bool:
         """Check if a query matches a known job title in the dataset"""
         if not query or query.strip() == "":
             return False
-        q = self._preprocess_text(query)
-        titles = self.df['job_title'].fillna("").apply(self._preprocess_text)
-        return titles.str.contains(q, regex=False).any()
+        return self._current().title_index.contains(self._preprocess_text(query))
 
     def semantic_match_title(self, query: str, threshold: float = 0.6) -> bool:
         """
@@ -120,10 +877,294 @@ class JobMatcher:
         """
         if not query or query.strip() == "":
             return False
-        titles = self.df['job_title'].fillna("").apply(self._preprocess_text).tolist()
-        # Reuse vectorizer on titles only (small corpus)
-        vectorizer = TfidfVectorizer(stop_words=None, ngram_range=(1, 2))
-        title_vectors = vectorizer.fit_transform(titles)
-        q_vec = vectorizer.transform([self._preprocess_text(query)])
-        sims = cosine_similarity(q_vec, title_vectors).flatten()
-        return float(sims.max()) >= threshold
\ No newline at end of file
+        # Title vectorizer and vectors are built once with the index
+        return self._current().title_index.best_similarity(self._preprocess_text(query)) >= threshold
+
+    # --- Incremental ingestion ---
+
+    @property
+    def job_count(self) -> int:
+        """Number of live jobs"""
+        return self._current().segments.n_live
+
+    def _publish(self, snapshot: IndexSnapshot):
+        """Single reference swap: searches already running keep the snapshot they started with"""
+        self._snapshot = snapshot
+        if snapshot.segments.n_delta >= self.max_delta_rows:
+            self._compaction_requested.set()
+        self._schedule_neighbor_table()
+
+    def upsert_jobs(self, records: List[dict]) -> List[Dict]:
+        """
+        Insert or replace jobs without refitting: the records are journaled, then vectorized with
+        the fitted vocabulary into the delta segment and document frequencies are updated.
+        Records with a known job_id replace the existing job, the others get a new id.
+        """
+        if not records:
+            return []
+        self._check_writable()
+        with self._write_lock, self.journal.locked():
+            # Other workers' writes first: new ids are assigned over the current catalogue
+            self._apply_entries(self.journal.read_new())
+            next_id = max(self._snapshot.row_by_job_id, default=0) + 1
+            entries = []
+            for record in records:
+                job = {field: str(record.get(field) or "") for field in JOB_FIELDS}
+                job_id = record.get('job_id')
+                if job_id is None:
+                    job_id = next_id
+                    next_id += 1
+                job['job_id'] = int(job_id)
+                next_id = max(next_id, job['job_id'] + 1)
+                entries.append({"op": "upsert", "job": job})
+            self.journal.append(entries)
+            # Journal locked: the entries read back are exactly these
+            return self._apply_entries(self.journal.read_new())
+
+    def upsert_job(self, record: dict) -> Dict:
+        return self.upsert_jobs([record])[0]
+
+    def delete_job(self, job_id: int) -> bool:
+        """Tombstone a job; its row is dropped at the next compaction"""
+        self._check_writable()
+        with self._write_lock, self.journal.locked():
+            self._apply_entries(self.journal.read_new())
+            if int(job_id) not in self._snapshot.row_by_job_id:
+                return False
+            self.journal.append([{"op": "delete", "job_id": int(job_id)}])
+            return self._apply_entries(self.journal.read_new())[0]
+
+    def sync_journal(self) -> int:
+        """Apply the writes journaled by other workers since the last read, returns how many"""
+        if self._pinned is not None or self._closed.is_set():
+            return 0
+        with self._write_lock:
+            return len(self._apply_entries(self.journal.read_new()))
+
+    def _apply_entries(self, entries: List[Dict]) -> List:
+        """Journal entries in order, one snapshot per run of upserts; upsert results / delete booleans"""
+        results = []
+        for op, group in groupby(entries, key=lambda entry: entry.get("op")):
+            group = list(group)
+            if op == "upsert":
+                results += self._apply_upserts([entry["job"] for entry in group])
+            elif op == "delete":
+                results += [self._apply_delete(int(entry["job_id"])) for entry in group]
+            else:
+                print(f"⚠️ Skipped {len(group)} journal entries with unknown op '{op}'")
+        return results
+
+    def _apply_upserts(self, jobs: List[dict]) -> List[Dict]:
+        snap = self._snapshot
+        # One transform for the whole batch; dividing by the IDF gives rows proportional to term counts
+        weighted = snap.vectorizer.transform([self._combine_job_features(job) for job in jobs])
+        unweighted = sparse.csr_matrix(weighted.multiply(1.0 / np.asarray(snap.vectorizer.idf_)[None, :]))
+        payloads = [self._serialize_job(job) for job in jobs]
+        titles = [self._preprocess_text(job['job_title']) for job in jobs]
+        # Title words the fitted vocabulary does not know: the next compaction refits it
+        vocabulary = snap.vectorizer.vocabulary_
+        new_terms = {term for title in titles for term in title.split() if len(term) > 1 and term not in vocabulary}
+
+        row_by_job_id = dict(snap.row_by_job_id)
+        results, deleted_rows = [], []
+        for i, job in enumerate(jobs):
+            job_id = int(job['job_id'])
+            previous_row = row_by_job_id.get(job_id)
+            if previous_row is not None:
+                deleted_rows.append(previous_row)
+            row_by_job_id[job_id] = snap.n_rows + i
+            results.append({"job_id": job_id, "created": previous_row is None})
+        segments = snap.segments.apply(unweighted, deleted_rows)
+
+        # Structures already built are extended, the others get built from the records on first use
+        cache = {}
+        facet_index, title_index, bm25f_index = snap.peek("facet_index"), snap.peek("title_index"), snap.peek("bm25f")
+        suggest_index = snap.peek("suggest_index")
+        if facet_index is not None:
+            cache["facet_index"] = facet_index.extended(jobs)
+        if title_index is not None:
+            cache["title_index"] = title_index.with_titles(titles)
+        if suggest_index is not None:
+            cache["suggest_index"] = suggest_index.with_jobs(jobs)
+        if bm25f_index is not None:
+            # Per-field statistics of the new rows, scored with the build's IDF until the next compaction
+            cache["bm25f"] = bm25f_index.with_rows(self._field_texts(jobs))
+
+        # Append-only structures past the rows of the published snapshot, which never reads them
+        token_sets, links, job_json = snap.peek("token_sets"), snap.peek("links"), snap.peek("job_json")
+        for job, payload in zip(jobs, payloads):
+            self._store.append(job)
+            if token_sets is not None:
+                token_sets.append(job)
+            if links is not None:
+                links.append(job['job_title'])
+            if job_json is not None:
+                job_json.append(payload)
+        self._publish(snap.replace(
+            jobs=self._store.view(),
+            segments=segments,
+            vectorizer=self._query_vectorizer(vocabulary, segments.idf()),
+            row_by_job_id=row_by_job_id,
+            new_terms=snap.new_terms | new_terms,
+            carry=("lsa", "speller", "token_sets", "links", "job_json"),
+            cache=cache
+        ))
+        return results
+
+    def _apply_delete(self, job_id: int) -> bool:
+        snap = self._snapshot
+        row = snap.row_by_job_id.get(job_id)
+        if row is None:
+            return False
+        row_by_job_id = dict(snap.row_by_job_id)
+        del row_by_job_id[job_id]
+        segments = snap.segments.apply(deleted_rows=[row])
+        self._publish(snap.replace(
+            segments=segments,
+            vectorizer=self._query_vectorizer(snap.vectorizer.vocabulary_, segments.idf()),
+            row_by_job_id=row_by_job_id,
+            carry=("bm25f", "lsa") + LAZY_FIELDS
+        ))
+        return True
+
+    def compact(self) -> bool:
+        """
+        Merge the delta segment and drop tombstoned rows: the job vectors are re-weighted with the
+        refreshed IDF (or the vocabulary refitted when upserts brought new title terms), saved with
+        a checkpoint of the journal, then a new snapshot is swapped in. The feed is left untouched.
+        """
+        self._check_writable()
+        with self._write_lock:
+            # Writes of the other workers are part of the compaction (and of its checkpoint)
+            self._apply_entries(self.journal.read_new())
+            snap = self._snapshot
+            segments = snap.segments
+            if not segments.dirty or self._closed.is_set():
+                return False
+            print(f"🔧 Compacting search index: {segments.n_delta} new, {segments.n_deleted} deleted")
+            vectors, idf, kept_rows = segments.compact()
+            store = snap.jobs.take(kept_rows)
+            refit = bool(snap.new_terms)
+            if refit:
+                # Same vocabulary and vectors as a full rebuild from these jobs
+                print(f"📊 Refitting the vocabulary: {len(snap.new_terms)} new title terms")
+                vectorizer, vectors = self._preprocess_data(store)
+                idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+            else:
+                vectorizer = self._query_vectorizer(snap.vectorizer.vocabulary_, idf)
+
+            # Keyed by feed, journal prefix and vocabulary: workers compacting the same writes share it
+            index_key = index_store.derived_key(self.feed_key, self.journal.digest,
+                                                index_store.vocabulary_digest(vectorizer.vocabulary_))
+            index_path = index_store.artifact_path(os.path.dirname(snap.index_path), index_key)
+            try:
+                self._save_checkpoint(index_path, vectorizer, idf, vectors, store)
+                artifact = index_store.load_index(index_path)
+                if artifact is not None:
+                    vectors = artifact["job_vectors"]
+                    # Records memory-mapped as well: only the upserts after this compaction stay in memory
+                    mapped = self._load_jobs(index_path, len(store))
+                    if mapped is not None:
+                        store = mapped
+            except Exception as e:
+                print(f"⚠️ Could not save search index {index_path}: {e}")
+
+            # Optional backends already in use are rebuilt for the new snapshot, the others stay lazy
+            cache = {}
+            if snap.peek("bm25f") is not None:
+                cache["bm25f"] = self._build_bm25f_index(store)
+            lsa_index = snap.peek("lsa")
+            if lsa_index is not None and not refit:
+                # Re-project with the fitted components: no SVD refit at compaction
+                cache["lsa"] = LSAIndex.from_components(np.asarray(lsa_index.components), vectors)
+                try:
+                    cache["lsa"].save(lsa_path(index_path, self.lsa_components))
+                except Exception as e:
+                    print(f"⚠️ Could not save LSA index: {e}")
+            token_sets, links, job_json = snap.peek("token_sets"), snap.peek("links"), snap.peek("job_json")
+            if token_sets is not None:
+                cache["token_sets"] = token_sets.take(kept_rows)
+            if links is not None:
+                cache["links"] = links.take(kept_rows)
+            if job_json is not None:
+                cache["job_json"] = [job_json[row] for row in kept_rows]
+            compacted = self._build_snapshot(
+                snap.version + 1, index_key, index_path, store.view(), vectorizer, vectors, base_idf=idf, cache=cache
+            )
+            if lsa_index is not None and refit:
+                # New vocabulary, new latent space
+                self._get_lsa_index(compacted)
+
+            # The compacted store becomes the one upserts append to, then one swap serves it
+            self._store = store
+            self._publish(compacted)
+            self.last_compaction = datetime.now(timezone.utc).isoformat()
+            print(f"✅ Search index compacted: {len(store)} jobs")
+            return True
+
+    def start_compaction_worker(self, interval: float) -> threading.Thread:
+        """Background thread compacting every interval seconds, or earlier when the delta grows too large"""
+        def run():
+            while not self._closed.is_set():
+                self._compaction_requested.wait(interval)
+                self._compaction_requested.clear()
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"❌ Search index compaction failed: {e}")
+
+        worker = threading.Thread(target=run, name="job-index-compaction", daemon=True)
+        worker.start()
+        return worker
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the records, payloads and indexes (memory-mapped arrays included)"""
+        snap = self._current()
+        # Computed once per index version and set of structures built so far (they are lazy)
+        built = [name for name in snap.built() if not name.startswith("nbytes")]
+        return snap.cached("nbytes:" + ",".join(built), lambda: self._nbytes(snap))
+
+    def _nbytes(self, snap: IndexSnapshot) -> int:
+        base = snap.segments.base
+        arrays = [base.data, base.indices, base.indptr]
+        if snap.inverted_index is not None:
+            arrays += [snap.inverted_index.doc_ids, snap.inverted_index.weights, snap.inverted_index.max_weights]
+        if snap.neighbors is not None:
+            arrays += [snap.neighbors.rows, snap.neighbors.scores]
+        lsa_index = snap.peek("lsa")
+        if lsa_index is not None:
+            arrays += [a for a in (lsa_index.embeddings, lsa_index.quantized, lsa_index.scales) if a is not None]
+        total = snap.jobs.nbytes() + sum(int(np.asarray(a).nbytes) for a in arrays)
+        job_json = snap.peek("job_json")
+        if job_json is not None:
+            total += sum(len(payload) for payload in job_json[:snap.n_rows])
+        # Structures not built yet hold nothing
+        for name in ("suggest_index", "token_sets", "links"):
+            structure = snap.peek(name)
+            if structure is not None:
+                total += structure.nbytes()
+        return total
+
+    def close(self):
+        """Retire this matcher (replaced by a reload): stops the compaction worker, the feed is left untouched"""
+        self._closed.set()
+        self._compaction_requested.set()
+
+    def index_stats(self) -> Dict:
+        snap = self._current()
+        segments = snap.segments
+        lsa_index = snap.peek("lsa")
+        return {
+            "version": snap.index_key,
+            "revision": snap.version,
+            "live_jobs": segments.n_live,
+            "pending_upserts": segments.n_delta,
+            "pending_deletes": segments.n_deleted,
+            "journal_offset": self.journal.offset,
+            "new_terms": len(snap.new_terms),
+            "last_compaction": self.last_compaction,
+            "lsa": {
+                "components": lsa_index.n_components,
+                "quantized": self.lsa_quantized,
+            } if lsa_index is not None else None,
+        }
@@ -0,0 +1,162 @@
+"""
+Matcher Provider
+Holds the JobMatcher serving requests. A reload (admin endpoint or feed watcher) builds the new
+matcher in a background thread while the current one keeps serving, then swaps the reference.
+Requests take current() once, so they finish on the index they started with. The watcher also
+replays the upserts / deletes other workers journaled, so every worker converges on the same jobs.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from services.matcher import JobMatcher
+from services.search import index_store
+
+
+class MatcherProvider:
+    def __init__(self, factory: Callable[[], JobMatcher], feed_path: str, compaction_interval: float = 0):
+        """
+        factory: builds a matcher from the current feed (loads the index artifact when it exists)
+        compaction_interval: started on every matcher put in service, 0 disables it
+        """
+        self.factory = factory
+        self.feed_path = feed_path
+        self.compaction_interval = compaction_interval
+        self._matcher: Optional[JobMatcher] = None
+        self.generation = 0
+        self.loaded_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._feed_stat: Optional[Tuple[int, int]] = None      # feed state the serving matcher was built from
+        self._pending_stat: Optional[Tuple[int, int]] = None   # changed feed state seen by the watcher
+
+    def current(self) -> Optional[JobMatcher]:
+        """Matcher to use for a whole request (a single reference read, never half-swapped)"""
+        return self._matcher
+
+    def __bool__(self) -> bool:
+        return self._matcher is not None
+
+    def __getattr__(self, name):
+        # Call sites written against the matcher itself keep working (each access sees the current one)
+        matcher = self.__dict__.get("_matcher")
+        if matcher is None:
+            raise AttributeError(name)
+        return getattr(matcher, name)
+
+    @property
+    def reloading(self) -> bool:
+        thread = self._reload_thread
+        return thread is not None and thread.is_alive()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.feed_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> JobMatcher:
+        """Synchronous build, used at startup"""
+        self._feed_stat = self._stat()
+        matcher = self.factory()
+        self._swap(matcher)
+        return matcher
+
+    def _swap(self, matcher: JobMatcher):
+        if self._stopped.is_set():
+            # Provider closed while this build was running
+            matcher.close()
+            return
+        if self.compaction_interval > 0:
+            matcher.start_compaction_worker(self.compaction_interval)
+        previous = self._matcher
+        self._matcher = matcher
+        self.generation += 1
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+        if previous is not None:
+            # Its writes are journaled, the new matcher replayed them.
+            # Freed once the last in-flight request using it returns
+            previous.close()
+        print(f"✅ Job index generation {self.generation} in service ({matcher.index_key}, {matcher.job_count} jobs)")
+
+    def _build(self):
+        self._feed_stat = self._stat()
+        print(f"🔧 Building job index from {os.path.basename(self.feed_path)} in the background...")
+        try:
+            matcher = self.factory()
+        except Exception as e:
+            # The current matcher keeps serving
+            self.last_error = str(e)
+            print(f"❌ Job index reload failed: {e}")
+            return
+        self.last_error = None
+        self._swap(matcher)
+
+    def reload(self, wait: bool = False) -> bool:
+        """Start a background rebuild, False when one is already running. wait: return once it is in service."""
+        with self._reload_lock:
+            started = not self.reloading
+            if started:
+                self._reload_thread = threading.Thread(target=self._build, name="job-index-reload", daemon=True)
+                self._reload_thread.start()
+            thread = self._reload_thread
+        if wait:
+            thread.join()
+        return started
+
+    def feed_changed(self) -> bool:
+        """True when the feed content differs from the serving index and has stopped changing"""
+        stat = self._stat()
+        if stat is None or stat == self._feed_stat:
+            return False
+        if stat != self._pending_stat:
+            # Still being written (copy in progress): wait for the next poll
+            self._pending_stat = stat
+            return False
+        matcher = self._matcher
+        if matcher is not None and index_store.content_hash(self.feed_path) == matcher.feed_key:
+            # Touched, content unchanged
+            self._feed_stat = stat
+            return False
+        return True
+
+    def start_watcher(self, interval: float) -> threading.Thread:
+        """
+        Background thread polling the feed every interval seconds, reloading when it changed,
+        and the journal, applying the writes of the other workers
+        """
+        def run():
+            while not self._stopped.wait(interval):
+                try:
+                    if not self.reloading and self.feed_changed():
+                        self.reload()
+                    matcher = self._matcher
+                    if matcher is not None:
+                        matcher.sync_journal()
+                except Exception as e:
+                    print(f"⚠️ Job feed watcher error: {e}")
+
+        watcher = threading.Thread(target=run, name="job-feed-watcher", daemon=True)
+        watcher.start()
+        return watcher
+
+    def close(self):
+        """Stop the watcher and retire the serving matcher (in-flight requests still finish on it)"""
+        self._stopped.set()
+        matcher, self._matcher = self._matcher, None
+        if matcher is not None:
+            matcher.close()
+
+    def status(self) -> Dict:
+        matcher = self._matcher
+        return {
+            "generation": self.generation,
+            "version": matcher.index_key if matcher is not None else None,
+            "loaded_at": self.loaded_at,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,188 @@
+"""
+Query Planner
+Search cascade of /api/assistant (main query, fallbacks, general queries, broader query) planned up
+front: stages that cannot return anything (empty, or no term of the index vocabulary) are skipped,
+the main query runs first, then the stages the cascade still needs run together as one batched
+search, trimmed to what fits in the latency budget. The plan reports every stage and the timings.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.matcher import JobMatcher
+from services.search.trace import SearchTrace
+
+DEFAULT_BUDGET_MS = 250.0
+GENERAL_QUERIES = ("technologie", "informatique", "digital")
+MIN_RESULTS = 8
+# Fewer main results than this: the fallback queries are needed
+FALLBACK_BELOW = 5
+
+
+class QueryStage:
+    __slots__ = ("name", "kind", "query", "top_k", "status", "reason", "wave", "matches", "used")
+
+    def __init__(self, name: str, kind: str, query: str, top_k: int):
+        self.name = name
+        self.kind = kind          # main / fallback / general / broader
+        self.query = query
+        self.top_k = top_k
+        self.status = "planned"   # planned -> ran / skipped
+        self.reason: Optional[str] = None
+        self.wave: Optional[str] = None
+        self.matches: List[Tuple[int, float]] = []
+        self.used = False         # results taken by the cascade
+
+    def skip(self, reason: str):
+        self.status, self.reason = "skipped", reason
+
+    def as_dict(self) -> Dict:
+        return {
+            "stage": self.name,
+            "query": self.query,
+            "top_k": self.top_k,
+            "status": self.status,
+            "reason": self.reason,
+            "wave": self.wave,
+            "results": len(self.matches),
+            "used": self.used,
+        }
+
+
+class QueryPlanner:
+    def __init__(self, matcher: JobMatcher, budget_ms: Optional[float] = None, min_results: int = MIN_RESULTS):
+        """budget_ms: latency budget of the whole search, spelling correction included (0 disables it)"""
+        self.matcher = matcher
+        self.budget_ms = DEFAULT_BUDGET_MS if budget_ms is None else budget_ms
+        self.min_results = min_results
+        self.trace = SearchTrace()
+        self._started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000.0
+
+    def plan(self, search_query: str, fallback_queries: List[str], broader_query: str) -> List[QueryStage]:
+        """Cascade stages in their original order, the hopeless ones already skipped"""
+        with self.trace.stage("planning"):
+            stages = [QueryStage("main", "main", search_query, 10)]
+            stages += [QueryStage(f"fallback_{i}", "fallback", q, 5) for i, q in enumerate(fallback_queries, start=1)]
+            stages += [QueryStage(f"general_{i}", "general", q, 3) for i, q in enumerate(GENERAL_QUERIES, start=1)]
+            stages.append(QueryStage("broader", "broader", broader_query, self.min_results * 2))
+            known: Dict[str, bool] = {}
+            for stage in stages:
+                query = (stage.query or "").strip()
+                if not query:
+                    stage.skip("empty query")
+                    continue
+                if query not in known:
+                    known[query] = self.matcher.has_known_terms(query)
+                if not known[query]:
+                    stage.skip("no query term in the index vocabulary")
+        return stages
+
+    def _run_wave(self, name: str, stages: List[QueryStage]):
+        """One batched search for the stages (same query searched once), sliced per stage"""
+        if not stages:
+            return
+        queries = list(dict.fromkeys(stage.query for stage in stages))
+        with self.trace.stage(name):
+            try:
+                batch = self.matcher.search_jobs_many(queries, top_k=max(stage.top_k for stage in stages))
+            except Exception as e:
+                print(f"⚠️ Error with batched search: {e}")
+                batch = [[] for _ in queries]
+        matches_by_query = dict(zip(queries, batch))
+        for stage in stages:
+            stage.status, stage.wave = "ran", name
+            stage.matches = matches_by_query[stage.query][:stage.top_k]
+
+    def _needed(self, stages: List[QueryStage], main_hits: int) -> List[QueryStage]:
+        """Stages the cascade can still use after the main query, in cascade order"""
+        needed = []
+        for stage in stages:
+            if stage.status != "planned":
+                continue
+            if stage.kind == "fallback" and main_hits >= FALLBACK_BELOW:
+                stage.skip("main query found enough results")
+            elif stage.kind == "general" and main_hits > 0:
+                stage.skip("main query found results")
+            elif stage.kind == "broader" and main_hits >= self.min_results:
+                stage.skip("main query found enough results")
+            else:
+                needed.append(stage)
+        return needed
+
+    def _within_budget(self, needed: List[QueryStage], main_wave_ms: float) -> List[QueryStage]:
+        """Keep the first stages whose estimated cost (one main query each) fits in the remaining budget"""
+        if self.budget_ms <= 0 or not needed:
+            return needed
+        remaining = self.budget_ms - self.elapsed_ms()
+        # A batch costs less than its queries searched one by one: the estimate is conservative
+        allowed = len(needed) if main_wave_ms <= 0 else int(remaining // main_wave_ms)
+        for stage in needed[max(allowed, 0):]:
+            stage.skip("latency budget exhausted")
+        return needed[:max(allowed, 0)]
+
+    def execute(self, stages: List[QueryStage]) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]], List[str]]:
+        """Run the plan and merge it like the original cascade: (all matches, top matches, tried queries)"""
+        main = stages[0]
+        if main.status == "planned":
+            self._run_wave("wave_main", [main])
+        main_wave_ms = self.trace.timings.get("wave_main", 0.0) * 1000.0
+        self._run_wave("wave_cascade", self._within_budget(self._needed(stages, len(main.matches)), main_wave_ms))
+
+        with self.trace.stage("merge"):
+            all_matches: List[Tuple[int, float]] = []
+            tried_queries: List[str] = []
+
+            # 1. Main query
+            if main.status == "ran":
+                tried_queries.append(main.query)
+                main.used = True
+                all_matches.extend(main.matches)
+            print(f"✅ Main query found: {len(main.matches)} results")
+
+            # 2. Fallbacks if not enough results
+            if len(all_matches) < FALLBACK_BELOW:
+                for stage in stages:
+                    if stage.kind != "fallback" or stage.status != "ran":
+                        continue
+                    tried_queries.append(stage.query)
+                    stage.used = True
+                    existing_indices = {idx for idx, _ in all_matches}
+                    all_matches.extend((idx, score) for idx, score in stage.matches if idx not in existing_indices)
+                    print(f"✅ Fallback '{stage.query}': {len(stage.matches)} results")
+
+            # 3. If still nothing, very general search
+            if len(all_matches) == 0:
+                for stage in stages:
+                    if stage.kind != "general" or stage.status != "ran":
+                        continue
+                    tried_queries.append(stage.query)
+                    stage.used = True
+                    all_matches.extend(stage.matches)
+                    if stage.matches:
+                        print(f"✅ General search '{stage.query}': {len(stage.matches)} results")
+                        break
+
+            # Sorted by score, every candidate kept (at least min_results when available)
+            all_matches.sort(key=lambda x: x[1], reverse=True)
+            top_matches = list(all_matches)
+
+            # 4. Not enough: complete with the broader search
+            broader = stages[-1]
+            if len(top_matches) < self.min_results and broader.status == "ran":
+                broader.used = True
+                existing_indices = {idx for idx, _ in top_matches}
+                for idx, score in broader.matches:
+                    if idx not in existing_indices and len(top_matches) < self.min_results:
+                        top_matches.append((idx, score))
+                top_matches.sort(key=lambda x: x[1], reverse=True)
+        return all_matches, top_matches, tried_queries
+
+    def report(self, stages: List[QueryStage]) -> Dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 3),
+            "stages": [stage.as_dict() for stage in stages],
+            "timings_ms": self.trace.as_dict(),
+        }
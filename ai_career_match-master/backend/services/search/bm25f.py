@@ -0,0 +1,177 @@
+"""
+BM25F Ranking
+Per-field term statistics (title, skills, description, category) with field weights and length normalization applied at query time.
+Jobs added after the build are scored from small delta matrices with the build's vocabulary, IDF and average lengths.
+"""
+import copy
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from services.search import topk
+
+FIELDS = ("job_title", "required_skills", "description", "category")
+
+# Same relative weights as the old title x3 / skills x2 text duplication
+DEFAULT_FIELD_WEIGHTS = {"job_title": 3.0, "required_skills": 2.0, "description": 1.0, "category": 1.0}
+DEFAULT_FIELD_B = {"job_title": 0.5, "required_skills": 0.5, "description": 0.75, "category": 0.0}
+DEFAULT_K1 = 1.2
+
+
+def parse_field_weights(spec: Optional[str]) -> Optional[Dict[str, float]]:
+    """Parse 'job_title:3,required_skills:2' into a weight dict (unlisted fields keep their default)"""
+    if not spec or not spec.strip():
+        return None
+    weights = dict(DEFAULT_FIELD_WEIGHTS)
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        field, sep, value = part.partition(":")
+        field = field.strip()
+        if not sep or field not in FIELDS:
+            raise ValueError(f"Invalid field weight '{part.strip()}', expected <field>:<weight> with field in {FIELDS}")
+        weight = float(value)
+        if weight < 0:
+            raise ValueError(f"Field weight for '{field}' must be >= 0")
+        weights[field] = weight
+    return weights
+
+
+def default_field_weights() -> Dict[str, float]:
+    """Field weights from JOB_BM25F_WEIGHTS, falling back to the defaults"""
+    return parse_field_weights(os.getenv("JOB_BM25F_WEIGHTS")) or dict(DEFAULT_FIELD_WEIGHTS)
+
+
+class BM25FIndex:
+    def __init__(self, field_texts: Dict[str, Sequence[str]], stop_words: List[str],
+                 k1: float = DEFAULT_K1, field_b: Optional[Dict[str, float]] = None):
+        self.k1 = k1
+        self.field_b = field_b or dict(DEFAULT_FIELD_B)
+
+        # One vocabulary shared by all fields, each token counted once per field
+        self.vectorizer = CountVectorizer(stop_words=stop_words, ngram_range=(1, 2), dtype=np.float32)
+        self.vectorizer.fit(text for field in FIELDS for text in field_texts[field])
+        self.analyzer: Callable[[str], List[str]] = self.vectorizer.build_analyzer()
+
+        self.field_tf: Dict[str, sparse.csc_matrix] = {}
+        self.field_inv_norm: Dict[str, np.ndarray] = {}
+        self.avg_len: Dict[str, float] = {}
+        presence = None
+        for field in FIELDS:
+            # Column-major: a query only reads the columns of its own terms
+            tf = sparse.csc_matrix(self.vectorizer.transform(field_texts[field]))
+            self.field_tf[field] = tf
+            lengths = np.asarray(tf.sum(axis=1)).ravel()
+            self.avg_len[field] = lengths.mean() if lengths.size and lengths.mean() > 0 else 1.0
+            self.field_inv_norm[field] = self._inv_norm(field, lengths)
+            field_presence = (tf > 0).astype(np.int32)
+            presence = field_presence if presence is None else presence.maximum(field_presence)
+
+        self.n_base = presence.shape[0]
+        doc_freq = np.asarray(presence.sum(axis=0)).ravel()
+        self.idf = np.log(1.0 + (self.n_base - doc_freq + 0.5) / (doc_freq + 0.5))
+        # Rows added by with_rows(), until the next full build
+        self.delta_tf: Optional[Dict[str, sparse.csc_matrix]] = None
+        self.delta_inv_norm: Optional[Dict[str, np.ndarray]] = None
+
+    @property
+    def n_docs(self) -> int:
+        return self.n_base + (0 if self.delta_tf is None else self.delta_tf[FIELDS[0]].shape[0])
+
+    def _inv_norm(self, field: str, lengths: np.ndarray) -> np.ndarray:
+        b = self.field_b.get(field, 0.75)
+        return (1.0 / (1.0 - b + b * lengths / self.avg_len[field])).astype(np.float32)
+
+    def with_rows(self, field_texts: Dict[str, Sequence[str]]) -> "BM25FIndex":
+        """
+        New index with rows n_docs, n_docs + 1, ... appended (upserts), this one left untouched.
+        Vocabulary, IDF and average field lengths stay those of the build: terms it does not know
+        score nothing until the index is rebuilt.
+        """
+        index = copy.copy(self)
+        index.delta_tf, index.delta_inv_norm = {}, {}
+        for field in FIELDS:
+            tf = sparse.csc_matrix(self.vectorizer.transform(field_texts[field]))
+            if self.delta_tf is not None:
+                tf = sparse.vstack([self.delta_tf[field], tf], format="csc")
+            index.delta_tf[field] = tf
+            index.delta_inv_norm[field] = self._inv_norm(field, np.asarray(tf.sum(axis=1)).ravel())
+        return index
+
+    def query_terms(self, query: str) -> np.ndarray:
+        vocabulary = self.vectorizer.vocabulary_
+        term_ids = {vocabulary[token] for token in self.analyzer(query) if token in vocabulary}
+        return np.array(sorted(term_ids), dtype=np.int64)
+
+    def score(self, query: str, field_weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Normalized BM25F score of every job: sum over query terms of
+        idf * tf~ / (k1 + tf~), with tf~ = sum_f w_f * tf_f / norm_f, divided by sum(idf)
+        so scores stay in [0, 1) like the cosine scores of the TF-IDF mode.
+        """
+        term_ids = self.query_terms(query)
+        if term_ids.size == 0:
+            return np.zeros(self.n_docs, dtype=np.float32)
+        weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        scores = self._score_rows(self.field_tf, self.field_inv_norm, self.n_base, term_ids, weights)
+        if self.delta_tf is not None:
+            delta = self._score_rows(self.delta_tf, self.delta_inv_norm, self.n_docs - self.n_base, term_ids, weights)
+            scores = np.concatenate([scores, delta])
+        return scores
+
+    def _score_rows(self, field_tf: Dict[str, sparse.csc_matrix], field_inv_norm: Dict[str, np.ndarray],
+                    n_rows: int, term_ids: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+        pseudo_tf = None
+        for field in FIELDS:
+            weight = weights.get(field, 0.0)
+            if weight <= 0:
+                continue
+            columns = field_tf[field][:, term_ids]
+            columns = sparse.csc_matrix(columns.multiply((weight * field_inv_norm[field])[:, None]))
+            pseudo_tf = columns if pseudo_tf is None else pseudo_tf + columns
+        if pseudo_tf is None or pseudo_tf.nnz == 0:
+            return np.zeros(n_rows, dtype=np.float32)
+
+        pseudo_tf = sparse.csc_matrix(pseudo_tf)
+        idf = self.idf[term_ids]
+        column_of_value = np.repeat(np.arange(len(term_ids)), np.diff(pseudo_tf.indptr))
+        saturated = pseudo_tf.copy()
+        saturated.data = idf[column_of_value] * saturated.data / (self.k1 + saturated.data)
+        scores = np.asarray(saturated.sum(axis=1)).ravel()
+        return scores / idf.sum()
+
+    def explain(self, query: str, doc: int, field_weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Per-term contribution of one job's score, each split across fields in proportion to their pseudo-tf"""
+        term_ids = self.query_terms(query)
+        if term_ids.size == 0 or doc >= self.n_docs:
+            return []
+        weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        field_tf, field_inv_norm, row = self.field_tf, self.field_inv_norm, doc
+        if doc >= self.n_base:
+            field_tf, field_inv_norm, row = self.delta_tf, self.delta_inv_norm, doc - self.n_base
+        features = self.vectorizer.get_feature_names_out()
+        idf_sum = self.idf[term_ids].sum()
+        terms = []
+        for term_id in term_ids:
+            parts = {}
+            for field in FIELDS:
+                weight = weights.get(field, 0.0)
+                tf = field_tf[field][row, term_id]
+                if weight > 0 and tf:
+                    parts[field] = float(weight * tf * field_inv_norm[field][row])
+            pseudo_tf = sum(parts.values())
+            contribution = float(self.idf[term_id] * pseudo_tf / (self.k1 + pseudo_tf) / idf_sum) if pseudo_tf else 0.0
+            terms.append({
+                "term": features[term_id],
+                "idf": round(float(self.idf[term_id]), 6),
+                "contribution": round(contribution, 6),
+                "fields": {field: round(contribution * part / pseudo_tf, 6) for field, part in parts.items()},
+            })
+        return terms
+
+    def search(self, query: str, top_k: int, field_weights: Optional[Dict[str, float]] = None,
+               threshold: float = topk.MIN_SCORE) -> List[Tuple[int, float]]:
+        return topk.top_k_scores(self.score(query, field_weights), top_k, threshold=threshold)
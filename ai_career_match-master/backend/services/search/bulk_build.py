@@ -0,0 +1,228 @@
+"""
+Bulk Index Build
+Out-of-core TF-IDF build for large job feeds (CSV or JSON Lines). The feed is streamed in chunks
+analyzed by a process pool; per-chunk term statistics are merged into the vocabulary and IDF, then
+the chunks are vectorized in parallel and written shard by shard into the artifact JobMatcher loads.
+Peak memory depends on the chunk size and the vocabulary, not on the number of jobs.
+"""
+import os
+import shutil
+import tempfile
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from numbers import Integral
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from services.matcher import build_vectorizer, combine_job_features
+from services.search import index_store
+from services.search.job_store import read_jobs
+from services.search.neighbors import DEFAULT_NEIGHBORS, NeighborTable, neighbors_path
+
+CHUNK_ROWS = 20000
+# Columns read by combine_job_features, the rest of the feed is never loaded by the workers
+FEATURE_COLUMNS = ('job_title', 'required_skills', 'description', 'category')
+
+
+def _read_chunks(feed_path: str, chunk_rows: int) -> Iterator[List[dict]]:
+    for chunk in read_jobs(feed_path, chunksize=chunk_rows):
+        rows = chunk.reindex(columns=list(FEATURE_COLUMNS)).itertuples(index=False, name=None)
+        yield [dict(zip(FEATURE_COLUMNS, values)) for values in rows]
+
+
+def _spill_path(work_dir: str, number: int) -> str:
+    return os.path.join(work_dir, f"chunk-{number:06d}.txt")
+
+
+def _shard_path(work_dir: str, number: int) -> str:
+    return os.path.join(work_dir, f"shard-{number:06d}.npz")
+
+
+def _analyze_chunk(number: int, jobs: List[dict], work_dir: str) -> Tuple[int, int, List[str], np.ndarray, np.ndarray]:
+    """
+    Worker, first pass: analyzed texts spilled to disk (the second pass does not re-analyze),
+    plus the chunk's terms with their document and total frequencies
+    """
+    texts = [combine_job_features(job) for job in jobs]
+    with open(_spill_path(work_dir, number), "w", encoding="utf-8") as f:
+        for text in texts:
+            f.write(text)
+            f.write("\n")
+
+    # Same tokenization as the TF-IDF vectorizer, raw counts only
+    vectorizer = build_vectorizer()
+    counter = CountVectorizer(lowercase=vectorizer.lowercase, token_pattern=vectorizer.token_pattern,
+                              ngram_range=vectorizer.ngram_range, dtype=np.int64)
+    try:
+        counts = counter.fit_transform(texts)
+    except ValueError:
+        # No term at all in this chunk
+        empty = np.zeros(0, dtype=np.int64)
+        return number, len(texts), [], empty, empty
+    terms = counter.get_feature_names_out().tolist()
+    doc_freq = np.bincount(counts.indices, minlength=len(terms))
+    term_freq = np.asarray(counts.sum(axis=0)).ravel()
+    return number, len(texts), terms, doc_freq, term_freq
+
+
+_worker_vectorizer = None
+
+
+def _init_vectorizer(vocabulary: Dict[str, int], idf: np.ndarray):
+    """Worker initializer, second pass: the fitted vocabulary is sent once per process"""
+    global _worker_vectorizer
+    _worker_vectorizer = build_vectorizer()
+    _worker_vectorizer.vocabulary_ = vocabulary
+    _worker_vectorizer.idf_ = idf
+
+
+def _vectorize_chunk(number: int, work_dir: str) -> Tuple[int, int, int]:
+    """Worker, second pass: TF-IDF vectors of a spilled chunk saved as a CSR shard"""
+    spill = _spill_path(work_dir, number)
+    with open(spill, "r", encoding="utf-8") as f:
+        texts = [line[:-1] for line in f]
+    vectors = _worker_vectorizer.transform(texts)
+    vectors.sort_indices()
+    sparse.save_npz(_shard_path(work_dir, number), vectors, compressed=False)
+    os.remove(spill)
+    return number, vectors.shape[0], vectors.nnz
+
+
+def _bounded_map(executor: ProcessPoolExecutor, fn, tasks: Iterable[tuple], max_pending: int) -> Iterator:
+    """Results of fn(*task) in completion order, with at most max_pending tasks in flight"""
+    pending = set()
+    for task in tasks:
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(executor.submit(fn, *task))
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+class TermStats:
+    """Document and total frequency of every term, merged chunk by chunk"""
+
+    def __init__(self):
+        self.column_by_term: Dict[str, int] = {}
+        self.doc_freq = array("q")
+        self.term_freq = array("q")
+        self.n_docs = 0
+
+    def merge(self, n_docs: int, terms: List[str], doc_freq: np.ndarray, term_freq: np.ndarray):
+        self.n_docs += n_docs
+        for term, df, tf in zip(terms, doc_freq.tolist(), term_freq.tolist()):
+            column = self.column_by_term.get(term)
+            if column is None:
+                self.column_by_term[term] = len(self.doc_freq)
+                self.doc_freq.append(df)
+                self.term_freq.append(tf)
+            else:
+                self.doc_freq[column] += df
+                self.term_freq[column] += tf
+
+    def select(self, vectorizer) -> Tuple[Dict[str, int], np.ndarray]:
+        """
+        Vocabulary and IDF the vectorizer would have fitted on the whole feed: same max_df / min_df
+        pruning, max_features by total frequency (same tie order) and smoothed IDF
+        """
+        terms = sorted(self.column_by_term)
+        order = np.array([self.column_by_term[term] for term in terms], dtype=np.int64)
+        dfs = np.frombuffer(self.doc_freq, dtype=np.int64)[order]
+        tfs = np.frombuffer(self.term_freq, dtype=np.int64)[order].astype(vectorizer.dtype)
+
+        max_df, min_df = vectorizer.max_df, vectorizer.min_df
+        max_doc_count = max_df if isinstance(max_df, Integral) else max_df * self.n_docs
+        min_doc_count = min_df if isinstance(min_df, Integral) else min_df * self.n_docs
+        mask = (dfs <= max_doc_count) & (dfs >= min_doc_count)
+        limit = vectorizer.max_features
+        if limit is not None and mask.sum() > limit:
+            mask_inds = (-tfs[mask]).argsort()[:limit]
+            new_mask = np.zeros(len(dfs), dtype=bool)
+            new_mask[np.where(mask)[0][mask_inds]] = True
+            mask = new_mask
+        kept = np.where(mask)[0]
+        if len(kept) == 0:
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        vocabulary = {terms[i]: column for column, i in enumerate(kept)}
+        df = dfs[kept].astype(vectorizer.dtype)
+        df += float(vectorizer.smooth_idf)
+        idf = np.full_like(df, fill_value=self.n_docs + int(vectorizer.smooth_idf), dtype=vectorizer.dtype)
+        idf /= df
+        np.log(idf, out=idf)
+        idf += 1.0
+        return vocabulary, idf
+
+
+def build_index(feed_path: str, index_dir: Optional[str] = None, chunk_rows: Optional[int] = None,
+                workers: Optional[int] = None, rebuild: bool = False) -> str:
+    """Build the index artifact of a job feed, returns its path (the one JobMatcher looks up)"""
+    chunk_rows = chunk_rows or int(os.getenv("JOB_BULK_CHUNK_ROWS", str(CHUNK_ROWS)))
+    workers = workers or int(os.getenv("JOB_BULK_WORKERS", "0")) or os.cpu_count() or 1
+    index_key = index_store.content_hash(feed_path)
+    index_path = index_store.artifact_path(index_dir or index_store.default_index_root(feed_path), index_key)
+    if not rebuild and os.path.exists(os.path.join(index_path, index_store.META_FILE)):
+        print(f"✅ Search index {index_key} already built")
+        return index_path
+
+    vectorizer = build_vectorizer()
+    # Spilled texts and shards next to the artifact: same disk, no copy across filesystems
+    parent = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(parent, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".bulk-", dir=parent)
+    max_pending = 2 * workers
+    try:
+        print(f"📊 Analyzing {os.path.basename(feed_path)} in chunks of {chunk_rows} jobs ({workers} workers)...")
+        stats = TermStats()
+        n_chunks = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tasks = ((number, jobs, work_dir) for number, jobs in enumerate(_read_chunks(feed_path, chunk_rows)))
+            for number, n_docs, terms, doc_freq, term_freq in _bounded_map(executor, _analyze_chunk, tasks, max_pending):
+                stats.merge(n_docs, terms, doc_freq, term_freq)
+                n_chunks += 1
+        vocabulary, idf = stats.select(vectorizer)
+        print(f"✅ {stats.n_docs} jobs, {len(stats.column_by_term)} terms -> {len(vocabulary)} features")
+
+        shard_sizes = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_vectorizer,
+                                 initargs=(vocabulary, idf)) as executor:
+            tasks = ((number, work_dir) for number in range(n_chunks))
+            for number, n_rows, nnz in _bounded_map(executor, _vectorize_chunk, tasks, max_pending):
+                shard_sizes[number] = (n_rows, nnz)
+
+        # Shards are read back one at a time, in feed order
+        shards = (sparse.load_npz(_shard_path(work_dir, number)) for number in range(n_chunks))
+        index_store.save_index_shards(
+            index_path, vocabulary, idf, shards,
+            n_rows=sum(n_rows for n_rows, _ in shard_sizes.values()),
+            nnz=sum(nnz for _, nnz in shard_sizes.values()),
+            params={"csv_path": os.path.basename(feed_path), "n_jobs": stats.n_docs, "builder": "bulk"}
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"✅ Index written to {index_path}")
+
+    # Similar-jobs table from the memory-mapped vectors, block by block
+    n_neighbors = int(os.getenv("JOB_SIMILAR_NEIGHBORS", str(DEFAULT_NEIGHBORS)))
+    if n_neighbors > 0:
+        job_vectors = index_store.load_index(index_path)["job_vectors"]
+        NeighborTable.build(job_vectors, n_neighbors).save(neighbors_path(index_path, n_neighbors))
+        print(f"✅ Neighbor table written ({n_neighbors} per job)")
+    return index_path
+
+
+if __name__ == "__main__":
+    # Offline build: python -m services.search.bulk_build [feed_path]
+    # (JOB_BULK_CHUNK_ROWS / JOB_BULK_WORKERS, JOB_INDEX_DIR for the output root)
+    import sys
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    feed = sys.argv[1] if len(sys.argv) > 1 else os.path.join(backend_dir, "data", "jobs_morocco.csv")
+    build_index(feed, rebuild=True)
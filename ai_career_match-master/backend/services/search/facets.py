@@ -0,0 +1,150 @@
+"""
+Facet Index
+Per-row facet codes (category, demand level) with a sorted row-id list per value, plus numeric
+salary bounds parsed once from avg_salary_mad, so filters become a boolean row mask before ranking.
+Immutable: upserts get a new FacetIndex from extended(), searches keep the one they started with.
+"""
+import copy
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FACET_FIELDS = ("category", "demand_level")
+
+_SALARY_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def normalize_facet(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def parse_salary_range(value) -> Tuple[float, float]:
+    """'8000-15000' -> (8000.0, 15000.0), '9000' -> (9000.0, 9000.0), unparseable -> (nan, nan)"""
+    numbers = [float(n.replace(",", ".")) for n in _SALARY_NUMBER.findall(str(value or "").replace(" ", ""))]
+    if not numbers:
+        return float("nan"), float("nan")
+    return min(numbers), max(numbers)
+
+
+class _Facet:
+    def __init__(self, values: Iterable):
+        self.labels: List[str] = []           # first raw spelling seen, in order of appearance
+        self.code_by_value: Dict[str, int] = {}
+        codes = [self._code(v) for v in values]
+        self.codes = np.array(codes, dtype=np.int32)
+        order = np.argsort(self.codes, kind="stable")
+        bounds = np.searchsorted(self.codes[order], np.arange(len(self.labels) + 1))
+        # Sorted row ids per value: a filter is a union of a few short lists, not a column scan
+        self.rows: List[np.ndarray] = [order[bounds[c]:bounds[c + 1]].astype(np.int32) for c in range(len(self.labels))]
+
+    def _code(self, value) -> int:
+        key = normalize_facet(value)
+        code = self.code_by_value.get(key)
+        if code is None:
+            code = len(self.labels)
+            self.code_by_value[key] = code
+            self.labels.append(str(value or "").strip())
+        return code
+
+    def extended(self, first_row: int, values: List) -> "_Facet":
+        """New facet with rows first_row, first_row + 1, ... appended (this one is left untouched)"""
+        facet = copy.copy(self)
+        facet.labels = list(self.labels)
+        facet.code_by_value = dict(self.code_by_value)
+        facet.rows = list(self.rows)
+        codes = [facet._code(value) for value in values]
+        facet.rows.extend(np.empty(0, dtype=np.int32) for _ in range(len(facet.labels) - len(facet.rows)))
+        facet.codes = np.concatenate([self.codes, np.array(codes, dtype=np.int32)])
+        for code in set(codes):
+            new_rows = [first_row + i for i, c in enumerate(codes) if c == code]
+            facet.rows[code] = np.concatenate([facet.rows[code], np.array(new_rows, dtype=np.int32)])
+        return facet
+
+    def mask(self, values: List[str], n_rows: int) -> np.ndarray:
+        mask = np.zeros(n_rows, dtype=bool)
+        for value in values:
+            code = self.code_by_value.get(normalize_facet(value))
+            if code is not None:
+                mask[self.rows[code]] = True
+        return mask
+
+    def counts(self, mask: np.ndarray) -> Dict[str, int]:
+        counts = np.bincount(self.codes[mask], minlength=len(self.labels))
+        return {self.labels[c]: int(counts[c]) for c in np.argsort(-counts, kind="stable") if counts[c]}
+
+
+class FacetIndex:
+    def __init__(self, records: Dict[str, Iterable]):
+        """records: column name -> values, one per row (category, demand_level, avg_salary_mad)"""
+        self.facets = {field: _Facet(records[field]) for field in FACET_FIELDS}
+        bounds = [parse_salary_range(v) for v in records["avg_salary_mad"]]
+        self.salary_min = np.array([b[0] for b in bounds], dtype=np.float64)
+        self.salary_max = np.array([b[1] for b in bounds], dtype=np.float64)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.salary_min)
+
+    def extended(self, jobs: List[dict]) -> "FacetIndex":
+        """New index with rows appended after the build (upserts), rows n_rows, n_rows + 1, ..."""
+        index = copy.copy(self)
+        index.facets = {field: facet.extended(self.n_rows, [job.get(field) for job in jobs])
+                        for field, facet in self.facets.items()}
+        bounds = [parse_salary_range(job.get("avg_salary_mad")) for job in jobs]
+        index.salary_min = np.concatenate([self.salary_min, np.array([b[0] for b in bounds], dtype=np.float64)])
+        index.salary_max = np.concatenate([self.salary_max, np.array([b[1] for b in bounds], dtype=np.float64)])
+        return index
+
+    def values(self, field: str, mask: np.ndarray) -> List[str]:
+        """Values present in the masked rows, in order of first appearance"""
+        facet = self.facets[field]
+        counts = np.bincount(facet.codes[mask], minlength=len(facet.labels))
+        return [label for label, count in zip(facet.labels, counts) if count]
+
+    def mask(self, filters: Optional[dict], live: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Rows matching every filter (values of one facet are OR-ed) and the live mask.
+        filters: category / demand_level (lists of values), salary_min / salary_max (a job matches
+        when its salary range overlaps the requested one).
+        """
+        n_rows = self.n_rows
+        mask = np.ones(n_rows, dtype=bool) if live is None else live.copy()
+        if not filters:
+            return mask
+        for field in FACET_FIELDS:
+            if filters.get(field):
+                mask &= self.facets[field].mask(filters[field], n_rows)
+        # NaN bounds (unparsed salary) never compare true: such jobs drop out of salary filters
+        if filters.get("salary_min") is not None:
+            mask &= self.salary_max >= float(filters["salary_min"])
+        if filters.get("salary_max") is not None:
+            mask &= self.salary_min <= float(filters["salary_max"])
+        return mask
+
+    def counts(self, mask: np.ndarray) -> Dict:
+        """Facet value counts over the rows in mask"""
+        result = {field: self.facets[field].counts(mask) for field in FACET_FIELDS}
+        salary_min, salary_max = self.salary_min[mask], self.salary_max[mask]
+        known = ~np.isnan(salary_min)
+        result["salary"] = {
+            "min": float(salary_min[known].min()) if known.any() else None,
+            "max": float(salary_max[known].max()) if known.any() else None,
+        }
+        result["total"] = int(mask.sum())
+        return result
+
+
+def normalize_filters(category: Optional[List[str]] = None, demand_level: Optional[List[str]] = None,
+                      salary_min: Optional[float] = None, salary_max: Optional[float] = None) -> Optional[dict]:
+    """Filter dict in canonical form (also used as part of the result-cache key), None when empty"""
+    filters = {}
+    if category:
+        filters["category"] = sorted({normalize_facet(c) for c in category if normalize_facet(c)})
+    if demand_level:
+        filters["demand_level"] = sorted({normalize_facet(d) for d in demand_level if normalize_facet(d)})
+    if salary_min is not None:
+        filters["salary_min"] = float(salary_min)
+    if salary_max is not None:
+        filters["salary_max"] = float(salary_max)
+    return {k: v for k, v in filters.items() if v not in ([], None)} or None
@@ -0,0 +1,36 @@
+"""
+Result Fusion
+Merges the per-query (index, score) lists of a batched search into one ranking
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.search.topk import top_k_pairs
+
+AGGREGATIONS = ("max", "sum", "rrf")
+
+# Usual reciprocal-rank-fusion constant: dampens the weight of the very first ranks
+RRF_K = 60
+
+
+def fuse_results(result_lists: Sequence[List[Tuple[int, float]]], aggregation: str = "max",
+                 limit: Optional[int] = None, rrf_k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    max: best score of a job over all queries
+    sum: scores added up, jobs found by several queries go up
+    rrf: sum of 1 / (rrf_k + rank), only ranks matter, not raw scores
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{aggregation}', expected one of {AGGREGATIONS}")
+
+    fused: Dict[int, float] = defaultdict(float)
+    for results in result_lists:
+        for rank, (idx, score) in enumerate(results, start=1):
+            if aggregation == "max":
+                fused[idx] = max(fused[idx], score)
+            elif aggregation == "sum":
+                fused[idx] += score
+            else:
+                fused[idx] += 1.0 / (rrf_k + rank)
+
+    return top_k_pairs(fused.items(), limit if limit is not None else len(fused))
@@ -0,0 +1,208 @@
+"""
+Search Index Store
+Persists the fitted TF-IDF vocabulary, IDF weights and job vectors on disk so workers memory-map them instead of refitting,
+and the job records next to them so workers memory-map those instead of parsing the feed
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from scipy import sparse
+
+from services.search.job_store import JobStore
+
+# Bump when the on-disk layout or the vectorizer parameters change
+INDEX_FORMAT_VERSION = 3
+
+META_FILE = "meta.json"
+ARRAY_FILES = ("idf", "data", "indices", "indptr")
+
+
+def default_index_root(csv_path: str) -> str:
+    """Directory holding the index artifacts (JOB_INDEX_DIR or data/index next to the CSV)"""
+    return os.getenv("JOB_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(csv_path)), "index"))
+
+
+def content_hash(csv_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the CSV content and the index format, used as artifact key"""
+    digest = hashlib.sha256(f"format-{INDEX_FORMAT_VERSION}".encode("utf-8"))
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def derived_key(*parts: str) -> str:
+    """Artifact key of an index derived from other content (feed, journal prefix, vocabulary)"""
+    digest = hashlib.sha256(f"format-{INDEX_FORMAT_VERSION}".encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+
+def vocabulary_digest(vocabulary: Dict[str, int]) -> str:
+    return hashlib.sha256("\n".join(_terms(vocabulary)).encode("utf-8")).hexdigest()[:20]
+
+
+def artifact_path(index_root: str, key: str) -> str:
+    return os.path.join(index_root, key)
+
+
+def jobs_path(index_path: str) -> str:
+    """Job records of an artifact, stored next to it (a bulk-built artifact gets them on first load)"""
+    return f"{index_path}-jobs"
+
+
+def _terms(vocabulary: Dict[str, int]) -> List[str]:
+    """Terms ordered by column so the vocabulary is a plain list on disk"""
+    terms = [None] * len(vocabulary)
+    for term, col in vocabulary.items():
+        terms[int(col)] = term
+    return terms
+
+
+def _index_dtype(nnz: int):
+    # Same dtype for indices and indptr, otherwise scipy copies them on load
+    return np.int32 if nnz < np.iinfo(np.int32).max else np.int64
+
+
+def _publish(path: str, write_arrays: Callable[[str], None], meta: Dict) -> str:
+    """
+    Write the artifact into a temporary directory then rename it into place,
+    so concurrent workers never see a half-written index.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    try:
+        write_arrays(tmp_dir)
+        with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(dict(meta, format=INDEX_FORMAT_VERSION), f, ensure_ascii=False)
+        try:
+            os.rename(tmp_dir, path)
+        except OSError:
+            # Another worker already published the same artifact
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return path
+
+
+def save_jobs(path: str, jobs: JobStore) -> str:
+    """Publish the job records of the artifact at path as flat arrays"""
+    return _publish(jobs_path(path), jobs.save, jobs.layout())
+
+
+def load_jobs(path: str) -> Optional[JobStore]:
+    """Memory-map the job records of an artifact, None when they are missing or from another format"""
+    records = jobs_path(path)
+    meta_path = os.path.join(records, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != INDEX_FORMAT_VERSION:
+        return None
+    return JobStore.load(records, meta)
+
+
+def save_index(path: str, vocabulary: Dict[str, int], idf: np.ndarray,
+               job_vectors: sparse.csr_matrix, params: Optional[Dict] = None,
+               jobs: Optional[JobStore] = None) -> str:
+    """Publish a fitted vocabulary, IDF weights and job vectors held in memory (and the job records)"""
+    job_vectors = sparse.csr_matrix(job_vectors)
+    job_vectors.sort_indices()
+    index_dtype = _index_dtype(job_vectors.nnz)
+
+    def write_arrays(tmp_dir: str):
+        np.save(os.path.join(tmp_dir, "idf.npy"), np.asarray(idf, dtype=np.float64))
+        np.save(os.path.join(tmp_dir, "data.npy"), job_vectors.data.astype(np.float32))
+        np.save(os.path.join(tmp_dir, "indices.npy"), job_vectors.indices.astype(index_dtype))
+        np.save(os.path.join(tmp_dir, "indptr.npy"), job_vectors.indptr.astype(index_dtype))
+
+    if jobs is not None:
+        # Records first: an artifact is only used once published, its records are then already there
+        save_jobs(path, jobs)
+    meta = {"shape": list(job_vectors.shape), "terms": _terms(vocabulary), "params": params or {}}
+    return _publish(path, write_arrays, meta)
+
+
+def save_index_shards(path: str, vocabulary: Dict[str, int], idf: np.ndarray,
+                      shards: Iterable[sparse.csr_matrix], n_rows: int, nnz: int,
+                      params: Optional[Dict] = None) -> str:
+    """
+    Publish job vectors given as consecutive row shards (n_rows and nnz in total). Each shard is
+    copied into memory-mapped output arrays, so only one shard is held in memory at a time.
+    """
+    index_dtype = _index_dtype(nnz)
+
+    def write_arrays(tmp_dir: str):
+        np.save(os.path.join(tmp_dir, "idf.npy"), np.asarray(idf, dtype=np.float64))
+        data = open_memmap(os.path.join(tmp_dir, "data.npy"), mode="w+", dtype=np.float32, shape=(nnz,))
+        indices = open_memmap(os.path.join(tmp_dir, "indices.npy"), mode="w+", dtype=index_dtype, shape=(nnz,))
+        indptr = open_memmap(os.path.join(tmp_dir, "indptr.npy"), mode="w+", dtype=index_dtype, shape=(n_rows + 1,))
+        indptr[0] = 0
+        row, offset = 0, 0
+        for shard in shards:
+            shard = sparse.csr_matrix(shard)
+            shard.sort_indices()
+            data[offset:offset + shard.nnz] = shard.data
+            indices[offset:offset + shard.nnz] = shard.indices
+            indptr[row + 1:row + shard.shape[0] + 1] = shard.indptr[1:] + offset
+            row += shard.shape[0]
+            offset += shard.nnz
+        if row != n_rows or offset != nnz:
+            raise ValueError(f"shards hold {row} rows / {offset} values, expected {n_rows} / {nnz}")
+        for array in (data, indices, indptr):
+            array.flush()
+        del data, indices, indptr
+
+    meta = {"shape": [n_rows, len(vocabulary)], "terms": _terms(vocabulary), "params": params or {}}
+    return _publish(path, write_arrays, meta)
+
+
+def load_index(path: str) -> Optional[Dict]:
+    """
+    Memory-map a saved artifact. Returns None when it is missing or from another format,
+    otherwise a dict with 'vocabulary', 'idf', 'job_vectors' and 'params'.
+    """
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != INDEX_FORMAT_VERSION:
+        return None
+
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAY_FILES}
+    # Pages are only read on first access, the OS page cache is shared between workers
+    job_vectors = sparse.csr_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]),
+        shape=tuple(meta["shape"]),
+        copy=False,
+    )
+    return {
+        "vocabulary": {term: col for col, term in enumerate(meta["terms"])},
+        "idf": np.asarray(arrays["idf"]),
+        "job_vectors": job_vectors,
+        "params": meta.get("params", {}),
+    }
+
+
+if __name__ == "__main__":
+    # Build step: python -m services.search.index_store [csv_path]
+    import sys
+    from services.matcher import JobMatcher
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(backend_dir, "data", "jobs_morocco.csv")
+    matcher = JobMatcher(csv, rebuild_index=True)
+    matcher.build_neighbor_table()
+    print(f"✅ Index written to {matcher.index_path}")
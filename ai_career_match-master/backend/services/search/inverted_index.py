@@ -0,0 +1,124 @@
+"""
+Inverted Index Backend
+Term -> postings lists over the TF-IDF job vectors, with WAND dynamic pruning so selective queries only touch a few postings
+"""
+import heapq
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from services.search.topk import MIN_SCORE
+
+# Doc id of a cursor past the end of its postings list
+_EXHAUSTED = np.iinfo(np.int64).max
+
+
+class _TermCursor:
+    """Iterator over one query term's postings list"""
+    __slots__ = ("docs", "weights", "pos", "size", "query_weight", "upper_bound")
+
+    def __init__(self, docs: np.ndarray, weights: np.ndarray, query_weight: float, max_weight: float):
+        self.docs = docs
+        self.weights = weights
+        self.pos = 0
+        self.size = len(docs)
+        self.query_weight = query_weight
+        # Best contribution this term can add to any document
+        self.upper_bound = query_weight * max_weight
+
+    @property
+    def doc(self) -> int:
+        return int(self.docs[self.pos]) if self.pos < self.size else _EXHAUSTED
+
+    def contribution(self) -> float:
+        return self.query_weight * float(self.weights[self.pos])
+
+    def next(self):
+        self.pos += 1
+
+    def skip_to(self, doc_id: int):
+        """Jump to the first posting >= doc_id (binary search, no scan)"""
+        self.pos = bisect_left(self.docs, doc_id, lo=self.pos)
+
+
+class InvertedIndex:
+    def __init__(self, job_vectors: sparse.csr_matrix):
+        # Column-major copy of the job vectors = one postings list per term, doc ids sorted
+        postings = sparse.csc_matrix(job_vectors)
+        postings.sort_indices()
+        self.indptr = postings.indptr
+        self.doc_ids = postings.indices
+        self.weights = postings.data
+        self.n_docs = job_vectors.shape[0]
+
+        # Per-term max weight, used for the WAND upper bounds
+        self.max_weights = np.zeros(postings.shape[1], dtype=np.float64)
+        non_empty = np.flatnonzero(np.diff(self.indptr))
+        if non_empty.size:
+            self.max_weights[non_empty] = np.maximum.reduceat(self.weights, self.indptr[non_empty])
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def search(self, query_vector: sparse.spmatrix, top_k: int, threshold: float = MIN_SCORE,
+               live: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        WAND top-k: a document is only scored when the upper bounds of the terms
+        reaching it can beat the current k-th best score. live masks out deleted documents.
+        """
+        query_vector = sparse.csr_matrix(query_vector)
+        cursors = []
+        for term_id, query_weight in zip(query_vector.indices, query_vector.data):
+            docs, weights = self.postings(int(term_id))
+            if len(docs):
+                cursors.append(_TermCursor(docs, weights, float(query_weight), self.max_weights[term_id]))
+        if top_k <= 0 or not cursors:
+            return []
+
+        heap: List[Tuple[float, int]] = []  # min-heap of (score, -doc) for the current top-k
+        theta = threshold
+
+        while True:
+            cursors.sort(key=lambda c: c.doc)
+
+            # Pivot: first term where the accumulated upper bounds beat theta
+            bound = 0.0
+            pivot = None
+            for i, cursor in enumerate(cursors):
+                if cursor.doc == _EXHAUSTED:
+                    break
+                bound += cursor.upper_bound
+                if bound > theta:
+                    pivot = i
+                    break
+            if pivot is None:
+                break
+
+            pivot_doc = cursors[pivot].doc
+            if cursors[0].doc == pivot_doc:
+                # Every term up to the pivot sits on pivot_doc: score it fully
+                score = 0.0
+                for cursor in cursors:
+                    if cursor.doc != pivot_doc:
+                        break
+                    score += cursor.contribution()
+                    cursor.next()
+                if score > theta and (live is None or live[pivot_doc]):
+                    entry = (score, -pivot_doc)
+                    if len(heap) < top_k:
+                        heapq.heappush(heap, entry)
+                    else:
+                        heapq.heappushpop(heap, entry)
+                    if len(heap) == top_k:
+                        theta = max(threshold, heap[0][0])
+            else:
+                # Documents before pivot_doc cannot make it: skip the lagging lists
+                for cursor in cursors[:pivot]:
+                    if cursor.doc < pivot_doc:
+                        cursor.skip_to(pivot_doc)
+
+        ranked = sorted(heap, reverse=True)
+        return [(-neg_doc, float(score)) for score, neg_doc in ranked]
@@ -0,0 +1,60 @@
+"""
+Job Links
+External search links (Stagiaires.ma, LinkedIn, Indeed, Google, Rekrute) of every job, computed
+once per distinct title when the index is built: rows keep a title code, like the job store's
+dictionary-encoded columns. Routes read them instead of URL-encoding the same titles per request.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from utils.link_generator import LinkGenerator
+
+
+class JobLinks:
+    def __init__(self, titles: Iterable = ()):
+        self.titles: List[str] = []
+        self.urls: List[Dict[str, str]] = []
+        self.code_by_title: Dict[str, int] = {}
+        self.codes = array("i")
+        for title in titles:
+            self.append(title)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def append(self, title) -> int:
+        """Links of a new job row (the next row of the job store), returns its row"""
+        title = str(title or "")
+        code = self.code_by_title.get(title)
+        if code is None:
+            code = len(self.titles)
+            self.titles.append(title)
+            self.urls.append(LinkGenerator.build_all_urls(title))
+            self.code_by_title[title] = code
+        self.codes.append(code)
+        return len(self.codes) - 1
+
+    def take(self, rows: Iterable[int]) -> "JobLinks":
+        """New links with the given rows, in that order (URLs of the kept titles reused)"""
+        links = JobLinks()
+        for row in rows:
+            code = self.codes[row]
+            new_code = links.code_by_title.get(self.titles[code])
+            if new_code is None:
+                new_code = len(links.titles)
+                links.titles.append(self.titles[code])
+                links.urls.append(self.urls[code])
+                links.code_by_title[self.titles[code]] = new_code
+            links.codes.append(new_code)
+        return links
+
+    def get(self, row: int, fallback_title: Optional[str] = None) -> Dict[str, str]:
+        """URLs of a job (a new dict); a job without title gets the links of fallback_title when given"""
+        code = self.codes[row]
+        if not self.titles[code] and fallback_title:
+            return LinkGenerator.generate_all_urls(fallback_title)
+        return dict(self.urls[code])
+
+    def nbytes(self) -> int:
+        return (self.codes.itemsize * len(self.codes) + sum(len(title) for title in self.titles)
+                + sum(len(url) for urls in self.urls for url in urls.values()))
@@ -0,0 +1,325 @@
+"""
+Job Store
+Columnar job records: ids in a contiguous int64 array, free text as one UTF-8 buffer + offsets
+per column, low-cardinality columns dictionary-encoded. Rows are read through JobRecord views.
+Columns are append-only: a view() sees the rows stored when it was taken, whatever is appended later.
+A store saved with save() is reopened memory-mapped by load(): the feed is only parsed by the first build.
+"""
+import copy
+import os
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+# Few distinct values: stored once, rows keep a code
+CATEGORICAL_COLUMNS = ("category", "demand_level", "avg_salary_mad")
+# Job feeds are CSV files, or JSON Lines (one job object per line) with these suffixes
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def is_jsonl(path: str) -> bool:
+    return path.lower().endswith(JSONL_SUFFIXES)
+
+
+def read_jobs(path: str, chunksize: Optional[int] = None):
+    """Job feed as a DataFrame, or an iterator of DataFrames of chunksize rows"""
+    if is_jsonl(path):
+        return pd.read_json(path, lines=True, dtype=False, chunksize=chunksize)
+    return pd.read_csv(path, chunksize=chunksize)
+
+
+def write_jobs(df: pd.DataFrame, path: str, jsonl: bool = False):
+    if jsonl:
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _to_text(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value)
+
+
+def _tail(values, dtype) -> np.ndarray:
+    """Copy of an in-memory buffer (a numpy view would stop it from growing)"""
+    return np.frombuffer(bytes(values), dtype=dtype)
+
+
+def _save_parts(path: str, parts: List[np.ndarray], dtype):
+    """Concatenation of parts saved as one .npy file, copied part by part (never joined in memory)"""
+    out = open_memmap(path, mode="w+", dtype=dtype, shape=(sum(len(part) for part in parts),))
+    start = 0
+    for part in parts:
+        out[start:start + len(part)] = part
+        start += len(part)
+    out.flush()
+    del out
+
+
+class _IdColumn:
+    __slots__ = ("base", "tail")
+
+    def __init__(self, base: Optional[np.ndarray] = None):
+        # Rows of a saved store (memory-mapped, read-only), then the rows appended since
+        self.base = np.zeros(0, dtype=np.int64) if base is None else base
+        self.tail = array("q")
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.tail)
+
+    def __getitem__(self, row: int) -> int:
+        n_base = len(self.base)
+        return int(self.base[row]) if row < n_base else self.tail[row - n_base]
+
+    def head(self, n_rows: int) -> List[int]:
+        n_base = len(self.base)
+        return self.base[:n_rows].tolist() + list(self.tail[:max(n_rows - n_base, 0)])
+
+    def append(self, value):
+        self.tail.append(value)
+
+    def save(self, directory: str, name: str, n_rows: int):
+        n_base = min(len(self.base), n_rows)
+        _save_parts(os.path.join(directory, f"{name}.npy"),
+                    [self.base[:n_base], _tail(self.tail[:n_rows - n_base], np.int64)], np.int64)
+
+    def nbytes(self) -> int:
+        return int(self.base.nbytes) + self.tail.itemsize * len(self.tail)
+
+
+class _TextColumn:
+    __slots__ = ("base_data", "base_offsets", "data", "offsets")
+
+    def __init__(self, values: Iterable = (), base_data: Optional[np.ndarray] = None,
+                 base_offsets: Optional[np.ndarray] = None):
+        # Saved rows (memory-mapped UTF-8 buffer + offsets), then the rows appended since
+        self.base_data = np.zeros(0, dtype=np.uint8) if base_data is None else base_data
+        self.base_offsets = np.zeros(1, dtype=np.int64) if base_offsets is None else base_offsets
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        for value in values:
+            self.append(value)
+
+    @property
+    def n_base(self) -> int:
+        return len(self.base_offsets) - 1
+
+    def __len__(self) -> int:
+        return self.n_base + len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        n_base = self.n_base
+        if row < n_base:
+            return self.base_data[self.base_offsets[row]:self.base_offsets[row + 1]].tobytes().decode("utf-8")
+        row -= n_base
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def append(self, value):
+        self.data += _to_text(value).encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def save(self, directory: str, name: str, n_rows: int):
+        n_base = min(self.n_base, n_rows)
+        n_tail = n_rows - n_base
+        base_end = int(self.base_offsets[n_base])
+        tail_offsets = _tail(self.offsets[1:n_tail + 1], np.int64) + base_end
+        _save_parts(os.path.join(directory, f"{name}.offsets.npy"),
+                    [self.base_offsets[:n_base + 1], tail_offsets], np.int64)
+        _save_parts(os.path.join(directory, f"{name}.data.npy"),
+                    [self.base_data[:base_end], _tail(self.data[:self.offsets[n_tail]], np.uint8)], np.uint8)
+
+    def nbytes(self) -> int:
+        return (int(self.base_data.nbytes) + int(self.base_offsets.nbytes)
+                + len(self.data) + self.offsets.itemsize * len(self.offsets))
+
+
+class _CategoricalColumn:
+    __slots__ = ("labels", "code_by_label", "base_codes", "codes")
+
+    def __init__(self, values: Iterable = (), labels: Optional[List[str]] = None,
+                 base_codes: Optional[np.ndarray] = None):
+        self.labels: List[str] = list(labels or [])
+        self.code_by_label: Dict[str, int] = {label: code for code, label in enumerate(self.labels)}
+        # Saved rows (memory-mapped int32 codes), then the rows appended since
+        self.base_codes = np.zeros(0, dtype=np.int32) if base_codes is None else base_codes
+        self.codes = array("i")
+        for value in values:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return len(self.base_codes) + len(self.codes)
+
+    def __getitem__(self, row: int) -> str:
+        n_base = len(self.base_codes)
+        return self.labels[self.base_codes[row] if row < n_base else self.codes[row - n_base]]
+
+    def append(self, value):
+        label = _to_text(value)
+        code = self.code_by_label.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.code_by_label[label] = code
+            self.labels.append(label)
+        self.codes.append(code)
+
+    def save(self, directory: str, name: str, n_rows: int):
+        n_base = min(len(self.base_codes), n_rows)
+        _save_parts(os.path.join(directory, f"{name}.codes.npy"),
+                    [self.base_codes[:n_base], _tail(self.codes[:n_rows - n_base], np.int32)], np.int32)
+
+    def nbytes(self) -> int:
+        return (int(self.base_codes.nbytes) + self.codes.itemsize * len(self.codes)
+                + sum(len(label.encode("utf-8")) for label in self.labels))
+
+
+class JobRecord(Mapping):
+    """Read-only dict-like view of one stored job: values are decoded on access, nothing is copied"""
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "JobStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def __getitem__(self, key: str):
+        return self._store.value(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.columns)
+
+    def __len__(self) -> int:
+        return len(self._store.columns)
+
+    def to_dict(self) -> dict:
+        return {column: self._store.value(self._row, column) for column in self._store.columns}
+
+    def __repr__(self) -> str:
+        return f"JobRecord({self.to_dict()!r})"
+
+
+class JobStore:
+    def __init__(self, columns: List[str]):
+        """columns: column names in CSV order, job_id included"""
+        self.columns = list(columns)
+        self.job_ids = _IdColumn()
+        self._columns = {
+            column: _CategoricalColumn() if column in CATEGORICAL_COLUMNS else _TextColumn()
+            for column in self.columns if column != "job_id"
+        }
+        # Row count of a view, None for the writable store
+        self._n_rows: Optional[int] = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "JobStore":
+        store = cls(list(df.columns))
+        store.job_ids.tail.extend(int(job_id) for job_id in df["job_id"])
+        for column, values in store._columns.items():
+            for value in df[column].tolist():
+                values.append(value)
+        return store
+
+    def _file_name(self, column: str) -> str:
+        # By position: column names come from the feed header
+        return "job_id" if column == "job_id" else f"column-{self.columns.index(column)}"
+
+    def layout(self) -> Dict:
+        """Columns, row count and categorical labels: what load() needs besides the saved arrays"""
+        return {
+            "columns": self.columns,
+            "n_rows": len(self),
+            "labels": {column: list(values.labels) for column, values in self._columns.items()
+                       if isinstance(values, _CategoricalColumn)},
+        }
+
+    def save(self, directory: str):
+        """Write every column as flat .npy arrays (ids, UTF-8 buffers + offsets, category codes)"""
+        n_rows = len(self)
+        self.job_ids.save(directory, self._file_name("job_id"), n_rows)
+        for column, values in self._columns.items():
+            values.save(directory, self._file_name(column), n_rows)
+
+    @classmethod
+    def load(cls, directory: str, layout: Dict) -> "JobStore":
+        """Store over the saved arrays, memory-mapped: rows are decoded on access, upserts append in memory"""
+        store = cls(layout["columns"])
+
+        def mapped(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        store.job_ids = _IdColumn(mapped(store._file_name("job_id")))
+        for column in store._columns:
+            name = store._file_name(column)
+            if column in CATEGORICAL_COLUMNS:
+                store._columns[column] = _CategoricalColumn(labels=layout["labels"][column],
+                                                            base_codes=mapped(f"{name}.codes"))
+            else:
+                store._columns[column] = _TextColumn(base_data=mapped(f"{name}.data"),
+                                                     base_offsets=mapped(f"{name}.offsets"))
+        if len(store) != layout["n_rows"]:
+            raise ValueError(f"saved job store holds {len(store)} rows, expected {layout['n_rows']}")
+        return store
+
+    def to_dataframe(self) -> pd.DataFrame:
+        data = {column: self.column(column) for column in self.columns}
+        return pd.DataFrame(data, columns=self.columns)
+
+    def __len__(self) -> int:
+        return len(self.job_ids) if self._n_rows is None else self._n_rows
+
+    def view(self) -> "JobStore":
+        """Read-only store of the rows written so far (the columns are shared, nothing is copied)"""
+        view = copy.copy(self)
+        view._n_rows = len(self)
+        return view
+
+    def __iter__(self) -> Iterator[JobRecord]:
+        return (JobRecord(self, row) for row in range(len(self)))
+
+    def value(self, row: int, column: str):
+        if column == "job_id":
+            return self.job_ids[row]
+        values = self._columns.get(column)
+        if values is None:
+            raise KeyError(column)
+        return values[row]
+
+    def record(self, row: int) -> JobRecord:
+        if not 0 <= row < len(self):
+            raise IndexError(f"job row {row} out of range")
+        return JobRecord(self, row)
+
+    def column(self, column: str) -> List:
+        """All values of a column, e.g. to build an index"""
+        if column == "job_id":
+            return self.job_ids.head(len(self))
+        if column not in self._columns:
+            return [""] * len(self)
+        values = self._columns[column]
+        return [values[row] for row in range(len(self))]
+
+    def append(self, job: dict) -> int:
+        """Add a job (missing columns stored empty), returns its row"""
+        if self._n_rows is not None:
+            raise TypeError("a job store view is read-only")
+        for column, values in self._columns.items():
+            values.append(job.get(column, ""))
+        self.job_ids.append(int(job["job_id"]))
+        return len(self) - 1
+
+    def take(self, rows: Iterable[int]) -> "JobStore":
+        """New store with the given rows, in that order"""
+        store = JobStore(self.columns)
+        for row in rows:
+            store.append(self.record(int(row)))
+        return store
+
+    def nbytes(self) -> int:
+        return self.job_ids.nbytes() + sum(values.nbytes() for values in self._columns.values())
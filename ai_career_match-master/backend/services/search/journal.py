@@ -0,0 +1,81 @@
+"""
+Change Journal
+Append-only JSON Lines log of the job upserts and deletes, kept next to the index artifacts: the
+feed file is never rewritten. Every worker appends its writes and replays the others' from the
+offset it has read so far; a compaction checkpoint (artifact + journal offset) spares a restart
+the replay of the whole log.
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+
+def journal_path(index_root: str, feed_path: str) -> str:
+    return os.path.join(index_root, f"{os.path.basename(feed_path)}.journal.jsonl")
+
+
+def checkpoint_path(index_root: str, feed_key: str) -> str:
+    """Latest compaction of a feed version: artifact key and the journal prefix it includes"""
+    return os.path.join(index_root, f"checkpoint-{feed_key}.json")
+
+
+class ChangeJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0                  # bytes of complete entries read so far
+        self._digest = hashlib.sha256()  # of those bytes: identifies the prefix a checkpoint includes
+        self._lock = threading.Lock()
+
+    @property
+    def digest(self) -> str:
+        return self._digest.hexdigest()[:20]
+
+    @contextmanager
+    def locked(self):
+        """Exclusive access for read-then-append sequences (job id assignment), across workers when possible"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, entries: List[Dict]):
+        """Write entries in one append (never interleaved with another worker's lines)"""
+        if not entries:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def read_new(self, until: Optional[int] = None) -> List[Dict]:
+        """Complete entries written since the last read, by any worker (until: stop at this offset)"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read() if until is None else f.read(max(until - self.offset, 0))
+        except FileNotFoundError:
+            return []
+        # A line still being written by another worker is read at the next call
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        self._digest.update(data[:end])
+        return [json.loads(line) for line in data[:end].splitlines() if line.strip()]
@@ -0,0 +1,132 @@
+"""
+LSA Dense Retrieval
+TruncatedSVD over the TF-IDF job vectors: jobs stored as a contiguous float32 embedding matrix
+(plus an optional int8-quantized copy), queries answered with one matrix-vector product
+"""
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from services.search import topk
+
+DEFAULT_COMPONENTS = 128
+# Rows dequantized per block in int8 mode: bounds the float32 temporary to ~BLOCK_ROWS x k
+BLOCK_ROWS = 65536
+
+
+class LSAIndex:
+    def __init__(self, components: np.ndarray, embeddings: np.ndarray,
+                 quantized: Optional[np.ndarray] = None, scales: Optional[np.ndarray] = None):
+        self.components = components    # (k x vocabulary), projects a TF-IDF vector into the latent space
+        self.embeddings = embeddings    # (jobs x k) float32, rows L2-normalized
+        self.quantized = quantized      # (jobs x k) int8
+        self.scales = scales            # per-row dequantization scale
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, job_vectors: sparse.csr_matrix, n_components: int = DEFAULT_COMPONENTS) -> "LSAIndex":
+        n_components = max(1, min(n_components, job_vectors.shape[1] - 1, job_vectors.shape[0] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        svd.fit(job_vectors)
+        components = np.ascontiguousarray(svd.components_, dtype=np.float32)
+        return cls.from_components(components, job_vectors)
+
+    @classmethod
+    def from_components(cls, components: np.ndarray, job_vectors: sparse.csr_matrix) -> "LSAIndex":
+        """Project (new) job vectors with already fitted components, no SVD refit"""
+        embeddings = cls._project(components, job_vectors)
+        quantized, scales = quantize(embeddings)
+        return cls(components, embeddings, quantized, scales)
+
+    @staticmethod
+    def _project(components: np.ndarray, vectors: sparse.spmatrix) -> np.ndarray:
+        projected = np.asarray(sparse.csr_matrix(vectors, dtype=np.float32).dot(components.T))
+        return np.ascontiguousarray(normalize(projected, norm="l2"), dtype=np.float32)
+
+    def embed(self, query_vector: sparse.spmatrix) -> np.ndarray:
+        return self._project(self.components, query_vector)[0]
+
+    def scores(self, query_vector: sparse.spmatrix, use_quantized: bool = False,
+               rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine scores in the latent space: one BLAS mat-vec over the embedding matrix.
+        rows restricts scoring to a subset (scores returned in the same order).
+        """
+        query = self.embed(query_vector)
+        if not use_quantized or self.quantized is None:
+            embeddings = self.embeddings if rows is None else self.embeddings[rows]
+            return embeddings.dot(query)
+
+        quantized = self.quantized if rows is None else self.quantized[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty(quantized.shape[0], dtype=np.float32)
+        for start in range(0, quantized.shape[0], BLOCK_ROWS):
+            block = quantized[start:start + BLOCK_ROWS].astype(np.float32)
+            scores[start:start + BLOCK_ROWS] = block.dot(query)
+        return scores * scales
+
+    def search(self, query_vector: sparse.spmatrix, top_k: int, threshold: float = topk.MIN_SCORE,
+               use_quantized: bool = False) -> List[Tuple[int, float]]:
+        return topk.top_k_scores(self.scores(query_vector, use_quantized), top_k, threshold=threshold)
+
+    def save(self, path: str) -> str:
+        """Same publish-by-rename scheme as the TF-IDF index artifact"""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".building-lsa-", dir=parent)
+        try:
+            np.save(os.path.join(tmp_dir, "components.npy"), self.components)
+            np.save(os.path.join(tmp_dir, "embeddings.npy"), self.embeddings)
+            np.save(os.path.join(tmp_dir, "quantized.npy"), self.quantized)
+            np.save(os.path.join(tmp_dir, "scales.npy"), self.scales)
+            try:
+                os.rename(tmp_dir, path)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LSAIndex"]:
+        """Memory-map a saved LSA index, None when missing"""
+        if not os.path.exists(os.path.join(path, "scales.npy")):
+            return None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                  for name in ("components", "embeddings", "quantized", "scales")}
+        return cls(np.asarray(arrays["components"]), arrays["embeddings"], arrays["quantized"], arrays["scales"])
+
+
+def quantize(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: row ~= quantized * scale"""
+    max_abs = np.abs(embeddings).max(axis=1) if embeddings.size else np.zeros(embeddings.shape[0])
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def lsa_path(index_path: str, n_components: int) -> str:
+    """LSA artifact stored next to the TF-IDF artifact it was built from"""
+    return f"{index_path}-lsa{n_components}"
+
+
+if __name__ == "__main__":
+    # Offline build: python -m services.search.lsa [csv_path]
+    import sys
+    from services.matcher import JobMatcher
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(backend_dir, "data", "jobs_morocco.csv")
+    matcher = JobMatcher(csv)
+    matcher._get_lsa_index()
+    print(f"✅ LSA index written to {lsa_path(matcher.index_path, matcher.lsa_components)}")
@@ -0,0 +1,128 @@
+"""
+Neighbor Table
+Top-N most similar jobs of every job, precomputed from the TF-IDF vectors block of rows by block
+of rows (the n x n similarity matrix never exists), stored as int32 rows and float16 scores so a
+"more like this" lookup is one array row
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from services.search import topk
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are only serialized within the process
+    fcntl = None
+
+DEFAULT_NEIGHBORS = 20
+# Similarities computed per block (rows x jobs): bounds the product to ~BLOCK_CELLS stored scores
+BLOCK_CELLS = 1 << 24
+
+
+class NeighborTable:
+    def __init__(self, rows: np.ndarray, scores: np.ndarray):
+        self.rows = rows        # (jobs x N) int32 neighbor rows, best first, -1 padded
+        self.scores = scores    # (jobs x N) float16 cosine scores, 0 padded
+
+    @property
+    def n_rows(self) -> int:
+        return self.rows.shape[0]
+
+    @property
+    def n_neighbors(self) -> int:
+        return self.rows.shape[1]
+
+    @classmethod
+    def build(cls, job_vectors: sparse.csr_matrix, n_neighbors: int = DEFAULT_NEIGHBORS,
+              threshold: float = topk.MIN_SCORE) -> "NeighborTable":
+        vectors = sparse.csr_matrix(job_vectors)
+        n = vectors.shape[0]
+        rows = np.full((n, n_neighbors), -1, dtype=np.int32)
+        scores = np.zeros((n, n_neighbors), dtype=np.float16)
+        transposed = vectors.T.tocsc()
+        block_rows = max(1, BLOCK_CELLS // max(n, 1))
+        for start in range(0, n, block_rows):
+            # Vectors are L2-normalized: a sparse product gives the cosine similarities of the block
+            block = vectors[start:start + block_rows].dot(transposed)
+            # One extra candidate: the job itself comes out first
+            for offset, matches in enumerate(topk.top_k_sparse_rows(block, n_neighbors + 1, threshold)):
+                row = start + offset
+                matches = [(other, score) for other, score in matches if other != row][:n_neighbors]
+                if matches:
+                    rows[row, :len(matches)] = [other for other, _ in matches]
+                    scores[row, :len(matches)] = [score for _, score in matches]
+        return cls(rows, scores)
+
+    def lookup(self, row: int) -> List[Tuple[int, float]]:
+        """(row, score) neighbors of a job row, best first"""
+        neighbors = self.rows[row]
+        count = int(np.count_nonzero(neighbors >= 0))
+        return [(int(other), float(score)) for other, score in zip(neighbors[:count], self.scores[row, :count])]
+
+    def save(self, path: str) -> str:
+        """Same publish-by-rename scheme as the TF-IDF index artifact"""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".building-neighbors-", dir=parent)
+        try:
+            np.save(os.path.join(tmp_dir, "rows.npy"), self.rows)
+            np.save(os.path.join(tmp_dir, "scores.npy"), self.scores)
+            try:
+                os.rename(tmp_dir, path)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> Optional["NeighborTable"]:
+        """Memory-map a saved table, None when missing"""
+        if not os.path.exists(os.path.join(path, "scores.npy")):
+            return None
+        return cls(np.load(os.path.join(path, "rows.npy"), mmap_mode="r"),
+                   np.load(os.path.join(path, "scores.npy"), mmap_mode="r"))
+
+
+def neighbors_path(index_path: str, n_neighbors: int) -> str:
+    """Neighbor table stored next to the TF-IDF artifact it was built from"""
+    return f"{index_path}-neighbors{n_neighbors}"
+
+
+@contextmanager
+def build_lock(path: str):
+    """
+    Exclusive right to build the table at path, across worker processes when possible: workers
+    sharing an artifact wait for the first build, then load the table it saved
+    """
+    if fcntl is None:
+        yield
+        return
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    # One lock file per index directory, not one per artifact left behind by every compaction
+    with open(os.path.join(parent, ".neighbors.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+if __name__ == "__main__":
+    # Offline build: python -m services.search.neighbors [csv_path]
+    import sys
+    from services.matcher import JobMatcher
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(backend_dir, "data", "jobs_morocco.csv")
+    matcher = JobMatcher(csv)
+    matcher.build_neighbor_table()
+    print(f"✅ Neighbor table written to {neighbors_path(matcher.index_path, matcher.n_neighbors)}")
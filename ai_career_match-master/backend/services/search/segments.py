@@ -0,0 +1,164 @@
+"""
+Index Segments
+Base segment (memory-mapped TF-IDF vectors) + small in-memory delta segment + tombstones,
+with maintained document frequencies so IDF is refreshed without refitting.
+Immutable: a write returns a new SegmentedIndex, searches keep reading the one they started with.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from services.search import topk
+
+
+class SegmentedIndex:
+    def __init__(self, base: sparse.csr_matrix, base_idf: np.ndarray):
+        self.base = base
+        # IDF the base rows were weighted with, needed to re-weight them at compaction
+        self.base_idf = np.asarray(base_idf, dtype=np.float64)
+        self.n_features = base.shape[1]
+
+        # TF-IDF weights are > 0 exactly where the term occurs: non-zeros per column = document frequency
+        self.doc_freq = np.bincount(np.asarray(base.indices), minlength=self.n_features).astype(np.int64)
+        self.live = np.ones(base.shape[0], dtype=bool)
+        self.n_deleted = 0
+
+        # Delta rows are stored unweighted (proportional to term counts), weighted with the current IDF
+        self._delta_rows: Optional[sparse.csr_matrix] = None
+        self._delta_vectors: Optional[sparse.csr_matrix] = None
+
+    @property
+    def n_base(self) -> int:
+        return self.base.shape[0]
+
+    @property
+    def n_delta(self) -> int:
+        return 0 if self._delta_rows is None else self._delta_rows.shape[0]
+
+    @property
+    def n_rows(self) -> int:
+        return self.n_base + self.n_delta
+
+    @property
+    def n_live(self) -> int:
+        return self.n_rows - self.n_deleted
+
+    @property
+    def dirty(self) -> bool:
+        return self.n_delta > 0 or self.n_deleted > 0
+
+    def idf(self) -> np.ndarray:
+        """Smoothed IDF as computed by TfidfVectorizer, from the maintained document frequencies"""
+        n = max(self.n_live, 0)
+        return np.log((1.0 + n) / (1.0 + self.doc_freq)) + 1.0
+
+    def apply(self, unweighted_rows: Optional[sparse.csr_matrix] = None,
+              deleted_rows: Iterable[int] = ()) -> "SegmentedIndex":
+        """
+        New index with the rows appended (rows n_rows, n_rows + 1, ...) then the rows tombstoned;
+        deleted_rows may name rows appended by the same call (a job upserted twice in one batch)
+        """
+        appended = None
+        if unweighted_rows is not None and unweighted_rows.shape[0]:
+            appended = sparse.csr_matrix(unweighted_rows, dtype=np.float32)
+        segments = object.__new__(SegmentedIndex)
+        segments.base, segments.base_idf, segments.n_features = self.base, self.base_idf, self.n_features
+        segments.doc_freq = self.doc_freq.copy()
+        segments.live = self.live.copy()
+        segments.n_deleted = self.n_deleted
+        segments._delta_rows = self._delta_rows
+        if appended is not None:
+            segments._delta_rows = appended if self._delta_rows is None else \
+                sparse.vstack([self._delta_rows, appended], format="csr")
+            segments.live = np.concatenate([segments.live, np.ones(appended.shape[0], dtype=bool)])
+            segments.doc_freq += np.bincount(appended.indices, minlength=self.n_features)
+        for row in deleted_rows:
+            if row < segments.n_rows and segments.live[row]:
+                segments.live[row] = False
+                segments.n_deleted += 1
+                segments.doc_freq[segments._row_terms(row)] -= 1
+        # Weighted once per write with the refreshed IDF, never on the search path
+        segments._delta_vectors = None
+        if segments._delta_rows is not None:
+            weighted = segments._delta_rows.multiply(segments.idf().astype(np.float32)[None, :])
+            segments._delta_vectors = normalize(sparse.csr_matrix(weighted, dtype=np.float32), norm="l2")
+        return segments
+
+    def _row_terms(self, row_index: int) -> np.ndarray:
+        if row_index < self.n_base:
+            start, end = self.base.indptr[row_index], self.base.indptr[row_index + 1]
+            return np.asarray(self.base.indices[start:end])
+        delta = self._delta_rows
+        row_index -= self.n_base
+        return delta.indices[delta.indptr[row_index]:delta.indptr[row_index + 1]]
+
+    def delta_vectors(self) -> Optional[sparse.csr_matrix]:
+        """Delta rows weighted with the IDF of this index and L2-normalized"""
+        return self._delta_vectors
+
+    def row_vector(self, row_index: int) -> sparse.csr_matrix:
+        """Weighted, normalized vector of a base or delta row"""
+        if row_index < self.n_base:
+            return self.base[row_index]
+        return self._delta_vectors[row_index - self.n_base]
+
+    def scores(self, query_vector: sparse.spmatrix) -> np.ndarray:
+        """Cosine scores of one query against every row, tombstoned rows at 0"""
+        scores = topk.sparse_scores(self.base, query_vector)
+        delta = self._delta_vectors
+        if delta is not None:
+            scores = np.concatenate([scores, topk.sparse_scores(delta, query_vector)])
+        if self.n_deleted:
+            scores[~self.live] = 0.0
+        return scores
+
+    def scores_rows(self, query_vector: sparse.spmatrix, rows: np.ndarray) -> np.ndarray:
+        """Cosine scores of one query against the given (sorted) rows only, e.g. a facet-filtered subset"""
+        split = np.searchsorted(rows, self.n_base)
+        base_rows, delta_rows = rows[:split], rows[split:]
+        scores = topk.sparse_scores(self.base[base_rows], query_vector)
+        if delta_rows.size:
+            scores = np.concatenate([scores, topk.sparse_scores(self._delta_vectors[delta_rows - self.n_base], query_vector)])
+        return scores
+
+    def delta_top_k(self, query_vector: sparse.spmatrix, k: int, threshold: float = topk.MIN_SCORE) -> List[Tuple[int, float]]:
+        """Top-k over the delta rows only (row indices offset past the base segment)"""
+        delta = self._delta_vectors
+        if delta is None:
+            return []
+        scores = topk.sparse_scores(delta, query_vector)
+        if self.n_deleted:
+            scores[~self.live[self.n_base:]] = 0.0
+        return [(self.n_base + idx, score) for idx, score in topk.top_k_scores(scores, k, threshold)]
+
+    def score_matrix(self, queries: sparse.csr_matrix) -> sparse.csr_matrix:
+        """(queries x rows) sparse scores, tombstoned rows dropped"""
+        scores = queries.dot(self.base.T)
+        delta = self._delta_vectors
+        if delta is not None:
+            scores = sparse.hstack([scores, queries.dot(delta.T)], format="csr")
+        scores = sparse.csr_matrix(scores)
+        if self.n_deleted:
+            scores = scores.multiply(self.live[None, :].astype(scores.dtype)).tocsr()
+            scores.eliminate_zeros()
+        return scores
+
+    def compact(self) -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Merge live base and delta rows into one segment weighted with the refreshed IDF.
+        Returns (vectors, idf, kept_rows) where kept_rows maps new row -> old row.
+        """
+        idf = self.idf()
+        kept_rows = np.flatnonzero(self.live)
+
+        # Undo the base IDF: rows become proportional to term counts, like the delta rows
+        base_unweighted = sparse.csr_matrix(self.base, dtype=np.float64).multiply(1.0 / self.base_idf[None, :])
+        parts = [sparse.csr_matrix(base_unweighted)]
+        if self._delta_rows is not None:
+            parts.append(self._delta_rows)
+        merged = sparse.vstack(parts, format="csr")[kept_rows]
+
+        vectors = normalize(sparse.csr_matrix(merged.multiply(idf[None, :])), norm="l2")
+        return sparse.csr_matrix(vectors, dtype=np.float32), idf, kept_rows
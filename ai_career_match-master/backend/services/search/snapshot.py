@@ -0,0 +1,89 @@
+"""
+Index Snapshot
+Everything a search reads (records, segments, query vectorizer, facets, title / suggest indexes,
+token sets, links, payloads, optional backends) held by one object. Writers build a new snapshot
+and publish it with a single reference swap, so a request reads one consistent snapshot from
+start to end whatever is upserted or compacted meanwhile.
+Append-only structures (job store columns, token sets, links, payloads) are shared between the
+snapshots of one compaction generation: a snapshot only reads its first n_rows rows, which never
+change once written. Everything else is replaced, never modified.
+Only what every search needs (records, vectors, row ids) exists when a snapshot is published; the
+other structures are built on first use from its records, then extended by the writes.
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional
+
+# Structures built on first use by the builder of the same name
+LAZY_FIELDS = ("facet_index", "title_index", "suggest_index", "token_sets", "links", "job_json", "speller")
+
+
+class IndexSnapshot:
+    def __init__(self, version: int, index_key: str, index_path: str, jobs, segments, vectorizer,
+                 row_by_job_id: Dict[int, int], builders: Dict[str, Callable[["IndexSnapshot"], Any]],
+                 inverted_index=None, neighbors=None, cache: Optional[Dict] = None,
+                 new_terms: FrozenSet[str] = frozenset()):
+        self.version = version
+        self.index_key = index_key
+        self.index_path = index_path
+        self.jobs = jobs                    # JobStore view, n_rows rows
+        self.segments = segments            # SegmentedIndex
+        self.vectorizer = vectorizer        # fitted vocabulary, IDF of this snapshot
+        self.row_by_job_id = row_by_job_id  # live jobs only
+        self.inverted_index = inverted_index
+        self.neighbors = neighbors
+        # Title terms of upserted jobs missing from the vocabulary: the next compaction refits it
+        self.new_terms = new_terms
+        # Structures built on first use (LAZY_FIELDS, BM25F, LSA, the /jobs/all listing), at most once per snapshot
+        self._builders = builders
+        self._cache: Dict[str, Any] = dict(cache or {})
+        self._locks: Dict[str, threading.Lock] = {}
+
+    facet_index = property(lambda self: self._lazy("facet_index"))
+    title_index = property(lambda self: self._lazy("title_index"))
+    suggest_index = property(lambda self: self._lazy("suggest_index"))
+    token_sets = property(lambda self: self._lazy("token_sets"))    # append-only
+    links = property(lambda self: self._lazy("links"))              # append-only
+    job_json = property(lambda self: self._lazy("job_json"))        # append-only
+    speller = property(lambda self: self._lazy("speller"))
+
+    def _lazy(self, name: str) -> Any:
+        return self.cached(name, lambda: self._builders[name](self))
+
+    @property
+    def n_rows(self) -> int:
+        return self.segments.n_rows
+
+    def cached(self, name: str, build: Callable[[], Any]) -> Any:
+        """Value of a lazily built structure; concurrent first callers wait for a single build"""
+        value = self._cache.get(name)
+        if value is None:
+            with self._locks.setdefault(name, threading.Lock()):
+                value = self._cache.get(name)
+                if value is None:
+                    value = self._cache[name] = build()
+        return value
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Lazily built structure if it exists, None otherwise (never builds)"""
+        return self._cache.get(name)
+
+    def built(self) -> tuple:
+        """Names of the lazily built structures this snapshot holds"""
+        return tuple(sorted(name for name, value in list(self._cache.items()) if value is not None))
+
+    def replace(self, carry: Iterable[str] = (), cache: Optional[Dict] = None, **changes) -> "IndexSnapshot":
+        """
+        Next version of this snapshot with the given fields replaced. carry: lazily built
+        structures still valid for it, cache: updated ones (the others are rebuilt on first use).
+        """
+        snapshot = copy.copy(self)
+        for name, value in changes.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise AttributeError(name)
+            setattr(snapshot, name, value)
+        snapshot.version = self.version + 1
+        snapshot._cache = {name: self._cache[name] for name in carry if self._cache.get(name) is not None}
+        snapshot._cache.update(cache or {})
+        snapshot._locks = {}
+        return snapshot
@@ -0,0 +1,110 @@
+"""
+Spelling Correction
+SymSpell-style corrector over the index vocabulary: every term's deletions (up to MAX_EDIT_DISTANCE)
+are precomputed, so a misspelled query token is corrected with a few dictionary lookups
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.text_analyzer import fold_accents
+
+MAX_EDIT_DISTANCE = 2
+# Shorter tokens are only corrected by one edit, the shortest not at all
+LONG_TOKEN_LENGTH = 8
+MIN_TOKEN_LENGTH = 5
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Every string obtained by removing up to max_distance characters"""
+    deletes = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        deletes |= frontier
+    return deletes
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (transpositions count as one edit), max_distance + 1 when above"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SpellingCorrector:
+    def __init__(self, term_frequencies: Dict[str, int], max_distance: int = MAX_EDIT_DISTANCE,
+                 ignore: Iterable[str] = (), is_known: Optional[Callable[[str], bool]] = None):
+        """
+        term_frequencies: index term -> number of jobs containing it (ties between candidates)
+        is_known: extra check for tokens that match without being a listed term (e.g. same stem)
+        """
+        self.max_distance = max_distance
+        self.ignore = {fold_accents(word) for word in ignore}
+        self.is_known = is_known
+        # Terms are compared accent-folded: 'developpeur' and 'développeur' are the same key
+        self.terms: Dict[str, Tuple[str, int]] = {}
+        for term, frequency in term_frequencies.items():
+            key = fold_accents(term)
+            if key not in self.terms or frequency > self.terms[key][1]:
+                self.terms[key] = (term, frequency)
+
+        self.deletes: Dict[str, List[str]] = {}
+        for key in self.terms:
+            for deleted in _deletes(key, max_distance):
+                self.deletes.setdefault(deleted, []).append(key)
+
+    def correct(self, token: str) -> Optional[Tuple[str, int]]:
+        """(index term, distance) for a token missing from the index, None when known or nothing is close enough"""
+        if len(token) < MIN_TOKEN_LENGTH or not token.isalpha():
+            return None
+        key = fold_accents(token)
+        if key in self.terms:
+            # Same word up to accents ('developpeur'): the index spelling, no edit
+            term = self.terms[key][0]
+            return None if term == token else (term, 0)
+        if key in self.ignore or (self.is_known is not None and self.is_known(token)):
+            return None
+        max_distance = min(self.max_distance, 1 if len(key) < LONG_TOKEN_LENGTH else 2)
+
+        # A term within max_distance shares at least one deletion variant with the token
+        candidates = set(self.deletes.get(key, ()))
+        for deleted in _deletes(key, max_distance):
+            if deleted in self.terms:
+                candidates.add(deleted)
+            candidates.update(self.deletes.get(deleted, ()))
+
+        best = None
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            # Closest first, then the most frequent term
+            rank = (distance, -self.terms[candidate][1], candidate)
+            if best is None or rank < best:
+                best = rank
+        if best is None:
+            return None
+        return self.terms[best[2]][0], best[0]
+
+    def correct_text(self, text: str) -> Tuple[str, List[Dict]]:
+        """Text with unknown tokens replaced, plus the corrections applied"""
+        corrections = []
+        tokens = text.split()
+        for i, token in enumerate(tokens):
+            correction = self.correct(token)
+            if correction is not None:
+                term, distance = correction
+                corrections.append({"original": token, "corrected": term, "distance": distance})
+                tokens[i] = term
+        return " ".join(tokens), corrections
@@ -0,0 +1,134 @@
+"""
+Suggest Index
+Typeahead over job titles, skills and categories: every word suffix of every normalized label in
+one sorted array, so the completions of a prefix are a contiguous range found with two bisections.
+Entries are numbered best first (job count weighted by demand level), so the best completions of a
+range are its smallest entry ids. Jobs upserted since the build go to a small pending index merged
+at query time; deleted jobs keep counting until the next build.
+"""
+import copy
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+
+from utils.text_analyzer import normalize
+
+SUGGEST_KINDS = ("title", "skill", "category")
+MAX_SUGGESTIONS = 20
+# Prefixes this short match a large part of the array: their answers are precomputed
+PRECOMPUTED_PREFIX_LENGTH = 2
+DEMAND_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+
+
+class SuggestIndex:
+    def __init__(self, labels: List[str], kinds: List[str], weights: List[float]):
+        """Entries sorted best first: display label, kind and weight of each"""
+        self.labels = labels
+        self.kinds = kinds
+        self.weights = np.asarray(weights, dtype=np.float32)
+
+        # Word suffixes: 'full' finds 'Développeur Full Stack' as well as 'dev' does
+        pairs = []
+        self.entry_by_key: Dict[tuple, int] = {}
+        for entry_id, (label, kind) in enumerate(zip(labels, kinds)):
+            words = normalize(label).split()
+            pairs.extend((" ".join(words[i:]), entry_id) for i in range(len(words)))
+            self.entry_by_key[(kind, " ".join(words))] = entry_id
+        pairs.sort()
+        self.keys: List[str] = [key for key, _ in pairs]
+        self.entry_ids = np.array([entry_id for _, entry_id in pairs], dtype=np.int32)
+
+        self._precomputed: Dict[str, np.ndarray] = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            for prefix in {key[:length] for key in self.keys if len(key) >= length}:
+                self._precomputed[prefix] = self._best(prefix, MAX_SUGGESTIONS)
+
+        # Upserted jobs (title, skills, category, demand level) and their index, until the next build
+        self.pending_jobs: tuple = ()
+        self.pending: "SuggestIndex" = None
+
+    @classmethod
+    def build(cls, titles: Iterable, skills: Iterable, categories: Iterable, demand_levels: Iterable) -> "SuggestIndex":
+        """One entry per distinct normalized title / skill / category, weighted by the demand of its jobs"""
+        weights: Dict[tuple, float] = {}
+        spellings: Dict[tuple, Counter] = {}
+
+        def add(kind: str, value, weight: float):
+            label = str(value or "").strip()
+            key = (kind, normalize(label))
+            if key[1]:
+                weights[key] = weights.get(key, 0.0) + weight
+                spellings.setdefault(key, Counter())[label] += 1
+
+        for title, job_skills, category, demand in zip(titles, skills, categories, demand_levels):
+            weight = DEMAND_WEIGHTS.get(str(demand or "").strip().lower(), 1.0)
+            add("title", title, weight)
+            for skill in {s.strip() for s in str(job_skills or "").split(",")}:
+                add("skill", skill, weight)
+            add("category", category, weight)
+
+        # Most common spelling shown; best first, then alphabetical
+        entries = sorted(
+            ((spellings[key].most_common(1)[0][0], key[0], weight) for key, weight in weights.items()),
+            key=lambda entry: (-entry[2], normalize(entry[0]), SUGGEST_KINDS.index(entry[1]))
+        )
+        return cls([e[0] for e in entries], [e[1] for e in entries], [e[2] for e in entries])
+
+    def with_jobs(self, jobs: Iterable[Mapping]) -> "SuggestIndex":
+        """New index counting upserted jobs as well (this one is left untouched)"""
+        new_jobs = tuple((job.get('job_title'), job.get('required_skills'), job.get('category'), job.get('demand_level'))
+                         for job in jobs)
+        if not new_jobs:
+            return self
+        index = copy.copy(self)
+        index.pending_jobs = self.pending_jobs + new_jobs
+        index.pending = SuggestIndex.build(*zip(*index.pending_jobs))
+        return index
+
+    def _best(self, key: str, limit: int) -> np.ndarray:
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + "\uffff", lo)
+        # Sorted unique ids = best entries first, each once (several of its words may match)
+        return np.unique(self.entry_ids[lo:hi])[:limit]
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Best completions of a typed prefix: {'text', 'type', 'score'}"""
+        key = normalize(prefix)
+        if not key or limit <= 0:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        best = self._precomputed.get(key)
+        best = best[:limit] if best is not None else self._best(key, limit)
+        entries = [(self.labels[i], self.kinds[i], float(self.weights[i])) for i in best]
+        if self.pending is not None:
+            entries = self._merge_pending(key, entries, limit)
+        return [{"text": label, "type": kind, "score": weight} for label, kind, weight in entries]
+
+    def _merge_pending(self, key: str, entries: List[tuple], limit: int) -> List[tuple]:
+        """
+        Best entries with the pending jobs' weights added: an entry outside the base top `limit`
+        can only overtake it with pending weight, so every pending match is a candidate
+        """
+        merged = {(kind, normalize(label)): [label, kind, weight] for label, kind, weight in entries}
+        pending = self.pending
+        for i in pending._best(key, len(pending.labels)):
+            label, kind, weight = pending.labels[i], pending.kinds[i], float(pending.weights[i])
+            entry_key = (kind, normalize(label))
+            entry = merged.get(entry_key)
+            if entry is not None:
+                entry[2] += weight
+                continue
+            base_id = self.entry_by_key.get(entry_key)
+            if base_id is not None:
+                label, weight = self.labels[base_id], weight + float(self.weights[base_id])
+            merged[entry_key] = [label, kind, weight]
+        ranked = sorted(merged.values(), key=lambda entry: (-entry[2], normalize(entry[0]), SUGGEST_KINDS.index(entry[1])))
+        return [tuple(entry) for entry in ranked[:limit]]
+
+    def nbytes(self) -> int:
+        return (sum(len(key) for key in self.keys) + sum(len(label) for label in self.labels)
+                + self.entry_ids.nbytes + self.weights.nbytes
+                + sum(best.nbytes for best in self._precomputed.values())
+                + (self.pending.nbytes() if self.pending is not None else 0))
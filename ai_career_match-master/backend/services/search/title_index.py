@@ -0,0 +1,94 @@
+"""
+Title Index
+Normalized job titles with a fitted title vectorizer and a sorted suffix array,
+built once with the main index for has_job_title / semantic_match_title
+"""
+import copy
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, List
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class TitleIndex:
+    def __init__(self, titles: List[str]):
+        """titles: preprocessed job titles, one per job (duplicates allowed)"""
+        unique_titles = sorted({t for t in titles if t})
+        self.titles = set(unique_titles)
+
+        # Offsets of every suffix of the titles (joined by \x00), sorted: any substring of a
+        # title is a prefix of one of them -> binary search instead of a scan
+        self.text = "\x00".join(unique_titles) + "\x00"
+        suffixes, start = [], 0
+        for title in unique_titles:
+            suffixes.extend((title[i:], start + i) for i in range(len(title)))
+            start += len(title) + 1
+        suffixes.sort()
+        self.suffixes = np.array([offset for _, offset in suffixes], dtype=np.int64)
+        # Titles added after the build (upserts), checked linearly and scored with the
+        # fitted title vectorizer until the next rebuild
+        self.pending: tuple = ()
+        self.pending_vectors = None
+
+        # Fitted on every title like the old per-call vectorizer (same IDF), vectors kept per unique title
+        self.vectorizer = TfidfVectorizer(stop_words=None, ngram_range=(1, 2))
+        self.title_vectors = None
+        if unique_titles:
+            self.vectorizer.fit(titles)
+            # Column-major: a query only reads the postings of its own terms
+            self.title_vectors = sparse.csc_matrix(self.vectorizer.transform(unique_titles))
+            self._analyzer = self.vectorizer.build_analyzer()
+            self._vocabulary = self.vectorizer.vocabulary_
+            self._idf = self.vectorizer.idf_
+
+    def with_titles(self, titles: Iterable[str]) -> "TitleIndex":
+        """New index with upserted titles pending (this one is left untouched)"""
+        new_titles = [title for title in titles if title and title not in self.titles]
+        if not new_titles:
+            return self
+        index = copy.copy(self)
+        index.pending = self.pending + tuple(new_titles)
+        if self.title_vectors is not None:
+            vectors = sparse.csr_matrix(self.vectorizer.transform(new_titles))
+            if self.pending_vectors is not None:
+                vectors = sparse.vstack([self.pending_vectors, vectors], format="csr")
+            index.pending_vectors = vectors
+        return index
+
+    def contains(self, query: str) -> bool:
+        """True when the query appears anywhere in a title"""
+        if not query:
+            return False
+        if query in self.titles:
+            return True
+        text, length = self.text, len(query)
+        pos = bisect_left(self.suffixes, query, key=lambda offset: text[offset:offset + length])
+        if pos < len(self.suffixes) and text[self.suffixes[pos]:self.suffixes[pos] + length] == query:
+            return True
+        return any(query in title for title in self.pending)
+
+    def best_similarity(self, query: str) -> float:
+        """Highest cosine similarity between the query and a title"""
+        if self.title_vectors is None or not query:
+            return 0.0
+        # Query weights computed directly (tf * idf, L2-normalized), cheaper than a vectorizer.transform call
+        term_counts = Counter(t for t in self._analyzer(query) if t in self._vocabulary)
+        if not term_counts:
+            return 0.0
+        term_ids = [self._vocabulary[t] for t in term_counts]
+        weights = np.array(list(term_counts.values()), dtype=np.float64) * self._idf[term_ids]
+        weights /= np.linalg.norm(weights)
+
+        # Both sides are L2-normalized: cosine = dot product over the query postings only
+        tv = self.title_vectors
+        scores = np.zeros(tv.shape[0])
+        for term_id, weight in zip(term_ids, weights):
+            start, end = tv.indptr[term_id], tv.indptr[term_id + 1]
+            scores[tv.indices[start:end]] += weight * tv.data[start:end]
+        best = float(scores.max())
+        if self.pending_vectors is not None:
+            best = max(best, float(self.pending_vectors[:, term_ids].dot(weights).max()))
+        return best
@@ -0,0 +1,83 @@
+"""
+Job Token Sets
+Lowercased word tokens of the title, skills and description of every job, stored as sorted term
+ids per job and per field (offsets + one id array, like the job store's text columns). Built with
+the index, extended by upserts: "does this job mention X" becomes a set intersection instead of
+lowercasing and scanning the job texts on every request.
+"""
+import re
+from array import array
+from collections.abc import Mapping
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence
+
+TOKEN_FIELDS = ("job_title", "required_skills", "description")
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text) -> FrozenSet[str]:
+    """Distinct lowercased words, the same tokens the assistant extracts from queries"""
+    return frozenset(_WORD.findall(str(text or "").lower()))
+
+
+class JobTokenSets:
+    def __init__(self, fields: Sequence[str] = TOKEN_FIELDS):
+        self.fields = tuple(fields)
+        self.term_ids: Dict[str, int] = {}
+        self._ids = {field: array("i") for field in self.fields}
+        self._offsets = {field: array("q", [0]) for field in self.fields}
+
+    @classmethod
+    def build(cls, jobs: Iterable[Mapping], fields: Sequence[str] = TOKEN_FIELDS) -> "JobTokenSets":
+        token_sets = cls(fields)
+        for job in jobs:
+            token_sets.append(job)
+        return token_sets
+
+    def __len__(self) -> int:
+        return len(self._offsets[self.fields[0]]) - 1
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.term_ids)
+        return term_id
+
+    def append(self, job: Mapping) -> int:
+        """Tokens of a new job row (the next row of the job store), returns its row"""
+        for field in self.fields:
+            ids = self._ids[field]
+            ids.extend(sorted(self._term_id(term) for term in tokenize(job.get(field))))
+            self._offsets[field].append(len(ids))
+        return len(self) - 1
+
+    def take(self, rows: Iterable[int]) -> "JobTokenSets":
+        """New token sets with the given rows, in that order (compaction: no re-tokenization)"""
+        token_sets = JobTokenSets(self.fields)
+        token_sets.term_ids = dict(self.term_ids)
+        rows = list(rows)
+        for field in self.fields:
+            ids, offsets = self._ids[field], self._offsets[field]
+            new_ids, new_offsets = token_sets._ids[field], token_sets._offsets[field]
+            for row in rows:
+                new_ids.extend(ids[offsets[row]:offsets[row + 1]])
+                new_offsets.append(len(new_ids))
+        return token_sets
+
+    def lookup(self, terms: Iterable[str]) -> FrozenSet[int]:
+        """Term ids of lowercased tokens; a token no job contains has none"""
+        return frozenset(self.term_ids[term] for term in terms if term in self.term_ids)
+
+    def mentions(self, row: int, term_ids: FrozenSet[int], fields: Optional[Sequence[str]] = None) -> bool:
+        """True when one of the fields of the job contains one of the terms"""
+        if not term_ids:
+            return False
+        for field in fields or self.fields:
+            offsets = self._offsets[field]
+            if not term_ids.isdisjoint(self._ids[field][offsets[row]:offsets[row + 1]]):
+                return True
+        return False
+
+    def nbytes(self) -> int:
+        return (sum(ids.itemsize * len(ids) for ids in self._ids.values())
+                + sum(offsets.itemsize * len(offsets) for offsets in self._offsets.values())
+                + sum(len(term) for term in self.term_ids))
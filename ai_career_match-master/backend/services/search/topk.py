@@ -0,0 +1,63 @@
+"""
+Top-k Retrieval
+Sparse scoring against L2-normalized job vectors and partial top-k selection (no full sort over the corpus)
+"""
+import heapq
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Matches under this score are considered noise
+MIN_SCORE = 0.01
+
+
+def sparse_scores(job_vectors: sparse.csr_matrix, query_vector: sparse.spmatrix) -> np.ndarray:
+    """
+    Cosine scores of one query against every job.
+    Rows and query are L2-normalized by the TF-IDF vectorizer, so a dot product is enough.
+    """
+    q = np.asarray(query_vector.toarray(), dtype=job_vectors.dtype).ravel()
+    # CSR mat-vec: one pass over the non-zeros, O(nnz)
+    return job_vectors.dot(q)
+
+
+def top_k_scores(scores: np.ndarray, k: int, threshold: float = MIN_SCORE) -> List[Tuple[int, float]]:
+    """
+    Best k (index, score) pairs with score > threshold, best first.
+    O(n) filtering + argpartition, then only the k survivors are sorted: O(n + k log k).
+    """
+    if k <= 0 or scores.size == 0:
+        return []
+    candidates = np.flatnonzero(scores > threshold)
+    return _select(candidates, scores[candidates], k)
+
+
+def top_k_sparse_rows(scores: sparse.csr_matrix, k: int, threshold: float = MIN_SCORE) -> List[List[Tuple[int, float]]]:
+    """top_k_scores for each row of a sparse (queries x jobs) score matrix, reading only the stored scores"""
+    scores = sparse.csr_matrix(scores)
+    results = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        values = scores.data[start:end]
+        keep = values > threshold
+        results.append(_select(scores.indices[start:end][keep], values[keep], k) if k > 0 else [])
+    return results
+
+
+def _select(candidates: np.ndarray, values: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Partial selection of the k best values, then a sort of those k only"""
+    if candidates.size > k:
+        kth = values[np.argpartition(values, candidates.size - k)[candidates.size - k]]
+        # Keep every tie of the k-th score so the cut below is deterministic
+        best = np.flatnonzero(values >= kth)
+        candidates, values = candidates[best], values[best]
+
+    # Highest score first, lowest index first on ties
+    order = np.lexsort((candidates, -values))[:k]
+    return [(int(candidates[i]), float(values[i])) for i in order]
+
+
+def top_k_pairs(pairs: Iterable[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+    """Best k of an already scored (index, score) list, via a bounded heap"""
+    return heapq.nlargest(k, pairs, key=lambda pair: pair[1])
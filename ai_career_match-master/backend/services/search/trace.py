@@ -0,0 +1,66 @@
+"""
+Search Trace
+Per-stage wall-clock timings of one search. Searches run with NULL_TRACE by default,
+whose stages are a shared no-op context manager, so the instrumentation costs nothing measurable.
+"""
+import time
+from typing import Dict
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: "SearchTrace", name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SearchTrace:
+    enabled = True
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}   # stage -> seconds, in execution order
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Timings in milliseconds, with their total"""
+        timings = {name: round(seconds * 1000.0, 3) for name, seconds in self.timings.items()}
+        timings["total"] = round(sum(self.timings.values()) * 1000.0, 3)
+        return timings
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def add(self, name: str, seconds: float):
+        pass
+
+
+NULL_TRACE = _NullTrace()
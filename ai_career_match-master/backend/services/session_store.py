@@ -0,0 +1,244 @@
+"""
+Session Store
+Assistant sessions (clarification flow + last results), bounded in size and evicted after a TTL.
+The small session fields are kept as is, the last results (search payloads, ATS responses with
+their PDF) are stored as compressed JSON and only decoded by /api/results.
+Two backends: in-process memory, or a SQLite file in WAL mode shared by all uvicorn workers.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_SECONDS = 86400.0
+# SQLite: expired / excess sessions purged every N writes of a process
+PURGE_EVERY = 200
+# Fast level: same ratio as the default on these payloads (the PDF is already base64 of compressed data)
+COMPRESSION_LEVEL = 1
+SESSION_FIELDS = ("original_query", "clarify_question", "timestamp")
+
+
+def encode_results(results: Any) -> bytes:
+    return zlib.compress(json.dumps(results, ensure_ascii=False, default=str).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decode_results(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8")) if blob else None
+
+
+class SessionStore(ABC):
+    """Interface: sessions are dicts of SESSION_FIELDS, the results are stored apart"""
+
+    @abstractmethod
+    def save(self, session_id: str, session: Dict):
+        """Create or replace a session, dropping its results"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def set_results(self, session_id: str, results: Any) -> bool:
+        """Attach results to an existing session, False when it does not exist (or expired)"""
+
+    @abstractmethod
+    def get_results(self, session_id: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # session_id -> [session, compressed results, written_at], least recently written first
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, written_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - written_at > self.ttl_seconds
+
+    def _live(self, session_id: str) -> Optional[list]:
+        entry = self._entries.get(session_id)
+        if entry is not None and self._expired(entry[2], time.monotonic()):
+            del self._entries[session_id]
+            self.expirations += 1
+            return None
+        return entry
+
+    def _touch(self, session_id: str, entry: list):
+        now = time.monotonic()
+        entry[2] = now
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        # Oldest writes first: expired sessions are at the front
+        while self._entries:
+            oldest_id, oldest = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_sessions:
+                self.evictions += 1
+            elif self._expired(oldest[2], now):
+                self.expirations += 1
+            else:
+                break
+            del self._entries[oldest_id]
+
+    def save(self, session_id: str, session: Dict):
+        with self._lock:
+            self._touch(session_id, [{field: session.get(field) for field in SESSION_FIELDS}, None, 0.0])
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._live(session_id)
+            return dict(entry[0]) if entry is not None else None
+
+    def set_results(self, session_id: str, results: Any) -> bool:
+        blob = encode_results(results)
+        with self._lock:
+            entry = self._live(session_id)
+            if entry is None:
+                return False
+            entry[1] = blob
+            self._touch(session_id, entry)
+            return True
+
+    def get_results(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(session_id)
+            blob = entry[1] if entry is not None else None
+        return decode_results(blob)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "results_bytes": sum(len(entry[1] or b"") for entry in self._entries.values()),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SqliteSessionStore(SessionStore):
+    def __init__(self, path: str, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # sqlite3 connections are per thread (request threadpool, event loop)
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                original_query TEXT,
+                clarify_question TEXT,
+                timestamp TEXT,
+                results BLOB,
+                written_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_written_at ON sessions (written_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: every statement is its own short transaction, readers never block on WAL
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cutoff(self) -> float:
+        """Sessions written before this wall-clock time are expired (shared by all processes)"""
+        return time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+
+    def _wrote(self, conn: sqlite3.Connection):
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge(conn)
+
+    def purge(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Delete expired sessions, then the least recently written ones beyond max_sessions"""
+        conn = conn or self._connection()
+        deleted = conn.execute("DELETE FROM sessions WHERE written_at <= ?", (self._cutoff(),)).rowcount
+        deleted += conn.execute(
+            "DELETE FROM sessions WHERE session_id IN "
+            "(SELECT session_id FROM sessions ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        ).rowcount
+        return deleted
+
+    def save(self, session_id: str, session: Dict):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, original_query, clarify_question, timestamp, results, written_at) "
+            "VALUES (?, ?, ?, ?, NULL, ?)",
+            (session_id, *(session.get(field) for field in SESSION_FIELDS), time.time())
+        )
+        self._wrote(conn)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT original_query, clarify_question, timestamp FROM sessions WHERE session_id = ? AND written_at > ?",
+            (session_id, self._cutoff())
+        ).fetchone()
+        return dict(zip(SESSION_FIELDS, row)) if row is not None else None
+
+    def set_results(self, session_id: str, results: Any) -> bool:
+        conn = self._connection()
+        updated = conn.execute(
+            "UPDATE sessions SET results = ?, written_at = ? WHERE session_id = ? AND written_at > ?",
+            (encode_results(results), time.time(), session_id, self._cutoff())
+        ).rowcount
+        self._wrote(conn)
+        return updated > 0
+
+    def get_results(self, session_id: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT results FROM sessions WHERE session_id = ? AND written_at > ?",
+            (session_id, self._cutoff())
+        ).fetchone()
+        return decode_results(row[0]) if row is not None else None
+
+    def stats(self) -> Dict:
+        size, results_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(results)), 0) FROM sessions WHERE written_at > ?",
+            (self._cutoff(),)
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": size,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "results_bytes": results_bytes,
+        }
+
+
+def create_session_store() -> SessionStore:
+    """Backend from ASSISTANT_SESSION_BACKEND: 'memory' (default) or 'sqlite' (multi-worker deployments)"""
+    max_sessions = int(os.getenv("ASSISTANT_SESSION_MAX", str(DEFAULT_MAX_SESSIONS)))
+    ttl_seconds = float(os.getenv("ASSISTANT_SESSION_TTL", str(DEFAULT_TTL_SECONDS)))
+    backend = os.getenv("ASSISTANT_SESSION_BACKEND", "memory").strip().lower()
+    if backend == "sqlite":
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.getenv("ASSISTANT_SESSION_DB", os.path.join(backend_dir, "data", "sessions.db"))
+        return SqliteSessionStore(path, max_sessions, ttl_seconds)
+    if backend != "memory":
+        raise ValueError(f"Unknown session backend '{backend}', expected 'memory' or 'sqlite'")
+    return MemorySessionStore(max_sessions, ttl_seconds)
@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.matcher import build_vectorizer, combine_job_features
+from services.search import bulk_build, index_store
+from services.search.job_store import read_jobs, write_jobs
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs_morocco.csv")
+
+
+@pytest.fixture(autouse=True)
+def _no_neighbor_table(monkeypatch):
+    monkeypatch.setenv("JOB_SIMILAR_NEIGHBORS", "0")
+
+
+def _in_memory_fit(feed_path):
+    jobs = read_jobs(feed_path)
+    vectorizer = build_vectorizer()
+    vectors = vectorizer.fit_transform([combine_job_features(row) for _, row in jobs.iterrows()])
+    vectors.sort_indices()
+    return vectorizer, vectors
+
+
+def _assert_same_index(index_path, vectorizer, vectors):
+    index = index_store.load_index(index_path)
+    assert index["vocabulary"] == vectorizer.vocabulary_
+    assert index["idf"].tobytes() == np.asarray(vectorizer.idf_, dtype=np.float64).tobytes()
+    built = index["job_vectors"]
+    assert built.shape == vectors.shape
+    assert np.asarray(built.indptr).tolist() == vectors.indptr.tolist()
+    assert np.asarray(built.indices).tolist() == vectors.indices.tolist()
+    assert np.asarray(built.data).tobytes() == vectors.data.astype(np.float32).tobytes()
+
+
+@pytest.mark.parametrize("chunk_rows, workers", [(7, 2), (1000, 1)])
+def test_bulk_build_matches_in_memory_fit(tmp_path, chunk_rows, workers):
+    feed = str(tmp_path / "jobs.csv")
+    shutil.copy(CSV_PATH, feed)
+    vectorizer, vectors = _in_memory_fit(feed)
+    # The feed is larger than max_features: the pruning has to pick the same terms
+    assert len(vectorizer.vocabulary_) == vectorizer.max_features
+
+    index_path = bulk_build.build_index(feed, index_dir=str(tmp_path / "index"), chunk_rows=chunk_rows, workers=workers)
+    _assert_same_index(index_path, vectorizer, vectors)
+    assert index_store.load_index(index_path)["params"]["n_jobs"] == vectors.shape[0]
+
+
+def test_bulk_build_jsonl_feed(tmp_path):
+    feed = str(tmp_path / "jobs.jsonl")
+    write_jobs(pd.read_csv(CSV_PATH), feed, jsonl=True)
+    vectorizer, vectors = _in_memory_fit(feed)
+    index_path = bulk_build.build_index(feed, index_dir=str(tmp_path / "index"), chunk_rows=10, workers=2)
+    _assert_same_index(index_path, vectorizer, vectors)
+
+
+def test_term_stats_merge_matches_fit():
+    texts = ["python data python", "data engineer", "java engineer", "python java", "sql"]
+    vectorizer = build_vectorizer()
+    vectorizer.set_params(max_features=4, max_df=0.5)
+    vectorizer.fit(texts)
+
+    stats = bulk_build.TermStats()
+    for chunk in (texts[:2], texts[2:3], texts[3:]):
+        counts = bulk_build.CountVectorizer(ngram_range=vectorizer.ngram_range, dtype=np.int64).fit(chunk)
+        matrix = counts.transform(chunk)
+        stats.merge(len(chunk), counts.get_feature_names_out().tolist(),
+                    np.bincount(matrix.indices, minlength=matrix.shape[1]), np.asarray(matrix.sum(axis=0)).ravel())
+    vocabulary, idf = stats.select(vectorizer)
+    assert vocabulary == vectorizer.vocabulary_
+    assert idf.tobytes() == vectorizer.idf_.tobytes()
@@ -0,0 +1,96 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from services import corpus_registry as registry_module
+from services.corpus_registry import CorpusRegistry, CorpusUnavailable
+from services.matcher_provider import MatcherProvider
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # clock[0]: monotonic seconds seen by the registry
+    clock = [1000.0]
+    monkeypatch.setattr(registry_module.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def _registry(tmp_path, factory, retry_seconds=60):
+    feed = tmp_path / "broken.csv"
+    feed.write_text("job_title\n")
+    default = MatcherProvider(lambda: None, str(tmp_path / "default.csv"))
+    return CorpusRegistry({"broken": str(feed)}, default=("default", default), factory=factory,
+                          retry_seconds=retry_seconds), feed
+
+
+def _failing_factory(calls):
+    def factory(path):
+        calls.append(path)
+        raise ValueError("malformed feed")
+    return factory
+
+
+def test_failed_load_is_not_retried_for_the_same_feed(tmp_path, clock):
+    calls = []
+    registry, feed = _registry(tmp_path, _failing_factory(calls))
+    with pytest.raises(CorpusUnavailable) as first:
+        registry.get("broken")
+    assert first.value.name == "broken" and isinstance(first.value.error, ValueError)
+    assert "broken" in str(first.value) and first.value.retry_in == 60
+
+    clock[0] += 30
+    with pytest.raises(CorpusUnavailable) as again:
+        registry.get("broken")
+    assert again.value.retry_in == pytest.approx(30)
+    assert len(calls) == 1
+    assert registry.get("broken", load=False) is None
+    status = {corpus["name"]: corpus for corpus in registry.status()["corpora"]}
+    assert status["broken"]["error"] == "malformed feed" and not status["broken"]["loaded"]
+
+
+def test_failed_load_retried_after_backoff(tmp_path, clock):
+    calls = []
+    registry, _ = _registry(tmp_path, _failing_factory(calls), retry_seconds=10)
+    for _ in range(2):
+        with pytest.raises(CorpusUnavailable):
+            registry.get("broken")
+    clock[0] += 11
+    with pytest.raises(CorpusUnavailable):
+        registry.get("broken")
+    assert len(calls) == 2
+
+
+def test_failed_load_retried_when_feed_changes(tmp_path, clock):
+    calls = []
+    registry, feed = _registry(tmp_path, _failing_factory(calls))
+    with pytest.raises(CorpusUnavailable):
+        registry.get("broken")
+    feed.write_text("job_title,category\nComptable,Finance\n")
+    with pytest.raises(CorpusUnavailable):
+        registry.get("broken")
+    assert len(calls) == 2
+    os.remove(feed)
+    with pytest.raises(CorpusUnavailable):
+        registry.get("broken")
+    assert len(calls) == 3
+
+
+def test_load_error_cleared_once_the_feed_loads(tmp_path, clock):
+    calls = []
+    matcher = SimpleNamespace(index_key="fixed", job_count=1, nbytes=lambda: 0, close=lambda: None)
+
+    def factory(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise ValueError("malformed feed")
+        return matcher
+
+    registry, feed = _registry(tmp_path, factory)
+    with pytest.raises(CorpusUnavailable):
+        registry.get("broken")
+    feed.write_text("job_title,category\nComptable,Finance\n")
+    assert registry.get("broken") is matcher
+    assert registry.get("broken") is matcher and len(calls) == 2
+    status = {corpus["name"]: corpus for corpus in registry.status()["corpora"]}
+    assert status["broken"]["loaded"] and status["broken"]["error"] is None
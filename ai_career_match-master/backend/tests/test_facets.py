@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+from services.search.facets import FacetIndex, normalize_filters, parse_salary_range
+
+JOBS = [
+    {"category": "Data", "demand_level": "High", "avg_salary_mad": "8000-15000"},
+    {"category": "IT", "demand_level": "Medium", "avg_salary_mad": "12000 - 20000"},
+    {"category": "data ", "demand_level": "Low", "avg_salary_mad": "6000"},
+    {"category": "Santé", "demand_level": "High", "avg_salary_mad": "À négocier"},
+    {"category": "IT", "demand_level": "high", "avg_salary_mad": "25000-30000"},
+]
+
+
+def _index(jobs=JOBS):
+    return FacetIndex({field: [job[field] for job in jobs] for field in ("category", "demand_level", "avg_salary_mad")})
+
+
+def _rows(mask):
+    return list(np.flatnonzero(mask))
+
+
+def test_parse_salary_range():
+    assert parse_salary_range("8000-15000") == (8000.0, 15000.0)
+    assert parse_salary_range("9 000") == (9000.0, 9000.0)
+    assert parse_salary_range("7,5 - 9,5") == (7.5, 9.5)
+    assert all(math.isnan(bound) for bound in parse_salary_range("À négocier"))
+
+
+def test_facet_values_or_within_and_across():
+    index = _index()
+    # Case and surrounding spaces are ignored, values of one facet are OR-ed
+    assert _rows(index.mask({"category": ["DATA"]})) == [0, 2]
+    assert _rows(index.mask({"category": ["data", "it"]})) == [0, 1, 2, 4]
+    # Facets are AND-ed
+    assert _rows(index.mask({"category": ["it"], "demand_level": ["HIGH"]})) == [4]
+    assert _rows(index.mask({"category": ["unknown"]})) == []
+
+
+def test_salary_filters_match_overlapping_ranges():
+    index = _index()
+    # Overlap with [10000, 13000]: 8000-15000, 12000-20000; 6000 and 25000-30000 do not, unparsed never does
+    assert _rows(index.mask({"salary_min": 10000, "salary_max": 13000})) == [0, 1]
+    # Touching bounds count as overlapping
+    assert _rows(index.mask({"salary_min": 20000})) == [1, 4]
+    assert _rows(index.mask({"salary_max": 6000})) == [2]
+
+
+def test_live_mask_and_counts():
+    index = _index()
+    live = np.array([True, True, False, True, True])
+    mask = index.mask({"demand_level": ["high"]}, live)
+    assert _rows(mask) == [0, 3, 4]
+    assert list(live) == [True, True, False, True, True]  # the caller's mask is not modified
+    counts = index.counts(index.mask(None, live))
+    assert counts["total"] == 4
+    assert counts["category"] == {"IT": 2, "Data": 1, "Santé": 1}
+    assert counts["salary"] == {"min": 8000.0, "max": 30000.0}
+
+
+def test_extended_rows_match_a_full_build():
+    new_jobs = [{"category": "Quantum", "demand_level": "High", "avg_salary_mad": "18000-22000"},
+                {"category": "it", "demand_level": "Low", "avg_salary_mad": "9000"}]
+    base = _index()
+    extended = base.extended(new_jobs)
+    full = _index(JOBS + new_jobs)
+    for filters in ({"category": ["it"]}, {"category": ["quantum", "data"]}, {"demand_level": ["low"]},
+                    {"salary_min": 17000, "salary_max": 19000}):
+        assert _rows(extended.mask(filters)) == _rows(full.mask(filters))
+    # The index it was extended from is left untouched
+    assert base.n_rows == len(JOBS) and _rows(base.mask({"category": ["it"]})) == [1, 4]
+
+
+def test_normalize_filters():
+    assert normalize_filters() is None
+    assert normalize_filters(category=[" IT", "it", ""], salary_min=5000) == {"category": ["it"], "salary_min": 5000.0}
@@ -0,0 +1,88 @@
+import re
+
+import pytest
+
+from services.intent_analyzer import IntentAnalyzer, load_vocabulary
+
+VOCABULARY = load_vocabulary()
+
+MESSAGES = [
+    "Je cherche un stage de développeur web à Casablanca",
+    "Looking for a remote junior data internship",
+    "Poste de comptable en télétravail à distance sur Rabat",
+    "Bonjour, je suis infirmier sans expérience",
+    "database admin job in Tanger",
+    "Alternance en marketing digital, design mobile à Marrakech ou à Rabat",
+    "compétence en python et connaissance en sql, savoir communiquer",
+    "Premier emploi débutant apprentissage",
+    "hello",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return IntentAnalyzer(VOCABULARY)
+
+
+def _reference(message):
+    """The per-keyword scan the single regex replaced"""
+    message = message.lower()
+    intentions = [intent for intent, patterns in VOCABULARY["intents"].items()
+                  if any(re.search(pattern, message) for pattern in patterns)]
+    competences = [keyword for keyword in VOCABULARY["competence_keywords"] if keyword in message]
+    location = re.search(VOCABULARY["location_pattern"], message)
+    lieu = location.group(1) if location else None
+    query_parts = competences + [VOCABULARY["intent_queries"][intent] for intent in intentions
+                                 if VOCABULARY["intent_queries"].get(intent)]
+    return {
+        "original_message": message,
+        "intentions": intentions,
+        "competences": competences,
+        "lieu": lieu,
+        "type_contrat": "CDI",
+        "experience_level": None,
+        "search_query": " ".join(query_parts) if query_parts else message,
+        "fallback_queries": ([f"{message} {lieu}"] if lieu else []) + [f"{skill} emploi maroc" for skill in competences],
+    }
+
+
+def test_french_message(analyzer):
+    analysis = analyzer.analyze("Je cherche un stage de développeur web à Casablanca")
+    assert analysis["intentions"] == ["stage", "ville"]
+    assert analysis["competences"] == ["développeur", "web"]
+    assert analysis["lieu"] == "casablanca"
+    assert analysis["search_query"] == "développeur web stage alternance"
+
+
+def test_english_message(analyzer):
+    analysis = analyzer.analyze("Looking for a remote junior data internship")
+    assert analysis["intentions"] == ["stage", "debutant", "remote"]
+    assert analysis["competences"] == ["data"]
+    assert analysis["lieu"] is None
+    assert analysis["fallback_queries"] == ["data emploi maroc"]
+
+
+def test_overlapping_matches_are_all_kept(analyzer):
+    # "à distance" is both the remote intent and the location phrase, "data" is inside "database"
+    analysis = analyzer.analyze("Poste de comptable en télétravail à distance sur Rabat")
+    assert analysis["intentions"] == ["remote", "ville"] and analysis["lieu"] == "distance"
+    assert analyzer.analyze("database admin job in Tanger")["competences"] == ["data"]
+    # Leftmost location phrase
+    assert analyzer.analyze("Alternance en marketing à Marrakech ou à Rabat")["lieu"] == "marrakech"
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_same_analysis_as_per_keyword_scan(analyzer, message):
+    assert analyzer.analyze(message) == _reference(message)
+
+
+def test_analysis_is_a_fresh_copy(analyzer):
+    message = "Stage data à Rabat"
+    first = analyzer.analyze(message)
+    first["intentions"].append("remote")
+    first["competences"].clear()
+    first["fallback_queries"].append("modifié")
+    first["lieu"] = "tanger"
+    assert analyzer.analyze(message) == _reference(message)
+    assert analyzer._analyze_cached.cache_info().hits >= 1
@@ -0,0 +1,61 @@
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from services.search import topk
+from services.search.inverted_index import InvertedIndex
+
+
+def _vectors(n_docs=300, n_terms=80, density=0.08, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = sparse.random(n_docs, n_terms, density=density, format="csr", random_state=rng, dtype=np.float64)
+    return normalize(matrix, norm="l2")
+
+
+def _query(term_ids, n_terms=80):
+    weights = np.linspace(1.0, 0.5, len(term_ids))
+    query = sparse.csr_matrix((weights, (np.zeros(len(term_ids), dtype=int), term_ids)), shape=(1, n_terms))
+    return normalize(query, norm="l2")
+
+
+def _assert_same(wand, exhaustive):
+    assert [idx for idx, _ in wand] == [idx for idx, _ in exhaustive]
+    np.testing.assert_allclose([s for _, s in wand], [s for _, s in exhaustive], rtol=1e-9)
+
+
+def test_wand_matches_exhaustive_scoring():
+    vectors = _vectors()
+    index = InvertedIndex(vectors)
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        query = _query(rng.choice(80, size=rng.integers(1, 6), replace=False))
+        for k in (1, 5, 20, 400):
+            exhaustive = topk.top_k_scores(topk.sparse_scores(vectors, query), k)
+            _assert_same(index.search(query, k), exhaustive)
+
+
+def test_wand_skips_deleted_documents():
+    vectors = _vectors(seed=2)
+    index = InvertedIndex(vectors)
+    live = np.ones(vectors.shape[0], dtype=bool)
+    live[::3] = False
+    query = _query([3, 17, 42])
+    scores = topk.sparse_scores(vectors, query)
+    scores[~live] = 0.0
+    _assert_same(index.search(query, 10, live=live), topk.top_k_scores(scores, 10))
+
+
+def test_wand_unknown_terms_and_empty_results():
+    vectors = sparse.csr_matrix(np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]))
+    index = InvertedIndex(vectors)
+    assert index.search(_query([2], n_terms=3), 5) == []
+    assert index.search(_query([0], n_terms=3), 0) == []
+
+
+def test_wand_ties_lowest_index_first():
+    # Rows 1 to 3 are identical: the two kept are the lowest ones
+    vectors = sparse.csr_matrix(np.array([[0.0, 0.6, 0.8], [0.6, 0.8, 0.0], [0.6, 0.8, 0.0], [0.6, 0.8, 0.0]]))
+    index = InvertedIndex(vectors)
+    query = _query([0, 1], n_terms=3)
+    exhaustive = topk.top_k_scores(topk.sparse_scores(vectors, query), 2)
+    assert [idx for idx, _ in index.search(query, 2)] == [idx for idx, _ in exhaustive] == [1, 2]
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import services.matcher as matcher_module
+from services.matcher import JobMatcher
+from services.search import index_store
+from services.search.job_store import JobStore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs_morocco.csv")
+
+JOBS = pd.DataFrame({
+    "job_id": [3, 1, 2],
+    "job_title": ["Développeur Python", "Comptable", float("nan")],
+    "category": ["IT", "Finance", "IT"],
+    "description": ["API « REST »", "", "santé"],
+    "avg_salary_mad": ["8000-15000", "6000", "8000-15000"],
+})
+
+
+def _rows(store):
+    return [record.to_dict() for record in store]
+
+
+def test_saved_store_is_memory_mapped(tmp_path):
+    store = JobStore.from_dataframe(JOBS)
+    index_store.save_jobs(str(tmp_path / "artifact"), store)
+    loaded = index_store.load_jobs(str(tmp_path / "artifact"))
+    assert _rows(loaded) == _rows(store)
+    assert loaded.column("job_id") == [3, 1, 2] and loaded.value(2, "job_title") == ""
+    assert isinstance(loaded.job_ids.base, np.memmap)
+    assert index_store.load_jobs(str(tmp_path / "missing")) is None
+
+
+def test_append_after_load_and_save_view(tmp_path):
+    index_store.save_jobs(str(tmp_path / "a"), JobStore.from_dataframe(JOBS))
+    store = index_store.load_jobs(str(tmp_path / "a"))
+    view = store.view()
+    store.append({"job_id": 9, "job_title": "Infirmier", "category": "Santé", "avg_salary_mad": "6000"})
+    assert len(view) == 3 and len(store) == 4
+    assert store.record(3)["category"] == "Santé" and store.record(3)["description"] == ""
+
+    # A view saves its own rows only, a store saves the mapped rows and the appended ones
+    index_store.save_jobs(str(tmp_path / "view"), view)
+    index_store.save_jobs(str(tmp_path / "all"), store)
+    assert _rows(index_store.load_jobs(str(tmp_path / "view"))) == _rows(view)
+    assert _rows(index_store.load_jobs(str(tmp_path / "all"))) == _rows(store)
+
+
+def test_restart_does_not_parse_the_feed(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_SIMILAR_NEIGHBORS", "0")
+    feed = str(tmp_path / "jobs.csv")
+    shutil.copy(CSV_PATH, feed)
+    first = JobMatcher(feed, index_dir=str(tmp_path / "index"))
+    expected = _rows(JobMatcher._read_feed(feed))
+
+    def read_jobs(*args, **kwargs):
+        raise AssertionError("the feed was parsed again")
+
+    monkeypatch.setattr(matcher_module, "read_jobs", read_jobs)
+    second = JobMatcher(feed, index_dir=str(tmp_path / "index"))
+    assert _rows(second._current().jobs) == expected
+    assert second.search_jobs("python", top_k=5) == first.search_jobs("python", top_k=5)
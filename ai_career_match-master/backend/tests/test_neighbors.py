@@ -0,0 +1,71 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from services.matcher import JobMatcher
+from services.search.neighbors import NeighborTable, build_lock, neighbors_path
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs_morocco.csv")
+
+
+@pytest.fixture
+def matchers(tmp_path, monkeypatch):
+    """Two workers on the same feed and index directory, without background table builds"""
+    monkeypatch.setenv("JOB_SIMILAR_NEIGHBORS", "5")
+    monkeypatch.setattr(JobMatcher, "_schedule_neighbor_table", lambda self: None)
+    feed = str(tmp_path / "jobs.csv")
+    shutil.copy(CSV_PATH, feed)
+    return [JobMatcher(feed, index_dir=str(tmp_path / "index")) for _ in range(2)]
+
+
+def test_table_built_once_per_artifact(matchers, monkeypatch):
+    first, second = matchers
+    builds = []
+    build = NeighborTable.build
+
+    def counting_build(*args, **kwargs):
+        builds.append(args)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(NeighborTable, "build", counting_build)
+    table = first.build_neighbor_table()
+    assert os.path.exists(neighbors_path(first.index_path, 5))
+
+    # The second worker loads the table the first one saved instead of building it again
+    loaded = second.build_neighbor_table()
+    assert len(builds) == 1
+    assert (loaded.rows == table.rows).all() and (loaded.scores == table.scores).all()
+    assert second._current().neighbors is loaded
+
+
+def test_build_lock_is_exclusive(tmp_path):
+    path = neighbors_path(str(tmp_path / "index" / "key"), 5)
+    events = []
+    holding = threading.Event()
+
+    def hold():
+        with build_lock(path):
+            holding.set()
+            time.sleep(0.2)
+            events.append("first released")
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    holding.wait()
+    with build_lock(path):
+        events.append("second acquired")
+    thread.join()
+    assert events == ["first released", "second acquired"]
+
+
+def test_stale_build_skipped_after_compaction(matchers, monkeypatch):
+    first, _ = matchers
+    stale = first._current()
+    first.upsert_job({"job_title": "Pilote de drone", "description": "drone"})
+    first.compact()
+    monkeypatch.setattr(first, "_current", lambda: stale)
+    monkeypatch.setattr(NeighborTable, "build", lambda *args, **kwargs: pytest.fail("stale table built"))
+    assert first.build_neighbor_table() is None
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services import query_planner
+from services.query_planner import QueryPlanner
+
+FALLBACKS = ["data analyst", "analyste", "business intelligence"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # clock[0]: perf_counter seconds, advanced by the fake searches only
+    clock = [100.0]
+    monkeypatch.setattr(query_planner.time, "perf_counter", lambda: clock[0])
+    return clock
+
+
+def _matcher(clock, results, search_ms=20.0, unknown=()):
+    """Fake matcher: every batched search costs search_ms per query, results by query"""
+    calls = {"searches": [], "known": []}
+
+    def search_jobs_many(queries, top_k):
+        calls["searches"].append(list(queries))
+        clock[0] += search_ms * len(queries) / 1000.0
+        return [results.get(query, [])[:top_k] for query in queries]
+
+    def has_known_terms(query):
+        calls["known"].append(query)
+        return query not in unknown
+
+    return SimpleNamespace(search_jobs_many=search_jobs_many, has_known_terms=has_known_terms), calls
+
+
+def _hits(start, n):
+    return [(start + i, 0.9 - 0.01 * i) for i in range(n)]
+
+
+def _status(stages):
+    return {stage.name: (stage.status, stage.reason) for stage in stages}
+
+
+def test_budget_cuts_cascade_in_order(clock):
+    # Main query finds nothing: every fallback, general and broader stage is needed (7 stages)
+    matcher, calls = _matcher(clock, {"data analyst": _hits(0, 2), "technologie": _hits(10, 3)})
+    planner = QueryPlanner(matcher, budget_ms=100.0)
+    stages = planner.plan("analyste donnees", FALLBACKS, "analyste donnees maroc")
+    all_matches, top_matches, tried = planner.execute(stages)
+
+    # 20 ms spent on the main query, 80 ms left: room for 4 more queries in cascade order
+    status = _status(stages)
+    assert [name for name, (s, _) in status.items() if s == "ran"] == \
+        ["main", "fallback_1", "fallback_2", "fallback_3", "general_1"]
+    assert {status[name] for name in ("general_2", "general_3", "broader")} == {("skipped", "latency budget exhausted")}
+    assert calls["searches"] == [["analyste donnees"], FALLBACKS + ["technologie"]]
+    assert [stage.wave for stage in stages[:5]] == ["wave_main"] + ["wave_cascade"] * 4
+
+    assert tried == ["analyste donnees"] + FALLBACKS
+    assert [idx for idx, _ in all_matches] == [0, 1]
+
+
+def test_budget_smaller_than_main_query(clock):
+    matcher, calls = _matcher(clock, {}, search_ms=50.0)
+    planner = QueryPlanner(matcher, budget_ms=40.0)
+    stages = planner.plan("analyste", FALLBACKS, "analyste maroc")
+    planner.execute(stages)
+    assert stages[0].status == "ran"
+    assert all(stage.reason == "latency budget exhausted" for stage in stages[1:])
+    assert len(calls["searches"]) == 1
+
+
+def test_zero_budget_runs_every_needed_stage(clock):
+    matcher, calls = _matcher(clock, {}, search_ms=500.0)
+    planner = QueryPlanner(matcher, budget_ms=0)
+    stages = planner.plan("analyste", FALLBACKS, "analyste maroc")
+    planner.execute(stages)
+    assert all(stage.status == "ran" for stage in stages)
+    assert len(calls["searches"]) == 2
+
+
+def test_enough_main_results_skip_the_cascade(clock):
+    matcher, calls = _matcher(clock, {"analyste": _hits(0, 10)})
+    planner = QueryPlanner(matcher, budget_ms=100.0)
+    stages = planner.plan("analyste", FALLBACKS, "analyste maroc")
+    all_matches, top_matches, tried = planner.execute(stages)
+    assert calls["searches"] == [["analyste"]]
+    assert all(stage.status == "skipped" and stage.reason != "latency budget exhausted" for stage in stages[1:])
+    assert tried == ["analyste"] and len(top_matches) == 10
+
+
+def test_plan_skips_hopeless_stages(clock):
+    matcher, calls = _matcher(clock, {}, unknown={"xyzzy"})
+    planner = QueryPlanner(matcher)
+    stages = planner.plan("xyzzy", ["", "xyzzy", "comptable"], "comptable")
+    status = _status(stages)
+    assert status["main"] == ("skipped", "no query term in the index vocabulary")
+    assert status["fallback_1"] == ("skipped", "empty query")
+    assert status["fallback_2"] == ("skipped", "no query term in the index vocabulary")
+    assert status["fallback_3"] == ("planned", None)
+    # Each distinct query is checked once
+    assert sorted(calls["known"]) == sorted({"xyzzy", "comptable", *query_planner.GENERAL_QUERIES})
+
+
+def test_broader_completes_up_to_min_results(clock):
+    matcher, calls = _matcher(clock, {"analyste": _hits(0, 6), "analyste maroc": _hits(3, 10)})
+    planner = QueryPlanner(matcher, budget_ms=0)
+    stages = planner.plan("analyste", [], "analyste maroc")
+    all_matches, top_matches, tried = planner.execute(stages)
+    assert len(all_matches) == 6
+    # Duplicates of the main results are not added again, the merged list is sorted by score
+    assert sorted(idx for idx, _ in top_matches) == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert [score for _, score in top_matches] == sorted((score for _, score in top_matches), reverse=True)
+    assert stages[-1].used
+    report = planner.report(stages)
+    assert report["budget_ms"] == 0 and [s["stage"] for s in report["stages"]][-1] == "broader"
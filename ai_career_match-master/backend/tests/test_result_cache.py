@@ -0,0 +1,58 @@
+import os
+import shutil
+
+import pytest
+
+from services.matcher import JobMatcher
+from services.search import result_cache
+from services.search.result_cache import QueryResultCache
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs_morocco.csv")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # clock[0]: monotonic seconds seen by the cache
+    clock = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def test_upserted_job_returned_by_a_cached_search(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_SIMILAR_NEIGHBORS", "0")
+    feed = str(tmp_path / "jobs.csv")
+    shutil.copy(CSV_PATH, feed)
+    matcher = JobMatcher(feed, index_dir=str(tmp_path / "index"))
+
+    before = matcher.search_jobs("data analyst", top_k=200)
+    assert matcher.search_jobs("data analyst", top_k=200) == before
+    assert matcher.result_cache.stats()["hits"] == 1
+
+    job_id = matcher.upsert_jobs([{"job_title": "Data Analyst", "category": "Data",
+                                   "required_skills": "SQL, Python, Power BI",
+                                   "description": "Analyse de données et tableaux de bord"}])[0]["job_id"]
+    after = matcher.search_jobs("data analyst", top_k=200)
+    found = [row for row, _ in after if matcher.get_job_by_index(row)["job_id"] == job_id]
+    assert len(found) == 1 and len(after) == len(before) + 1
+    assert matcher.result_cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction_and_ttl_expiry(clock):
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1, ("a",))
+    cache.put("b", 1, ("b",))
+    assert cache.get("a", 1) == ("a",)
+    # 'b' is now the least recently used entry
+    cache.put("c", 1, ("c",))
+    assert cache.get("b", 1) is None and cache.get("a", 1) == ("a",) and cache.get("c", 1) == ("c",)
+    assert cache.stats()["evictions"] == 1
+
+    clock[0] += 61
+    assert cache.get("a", 1) is None
+    cache.put("d", 1, ("d",))
+    clock[0] += 30
+    assert cache.get("d", 1) == ("d",) and cache.get("c", 1) is None
+    # A result of another index version is never returned
+    assert cache.get("d", 2) is None
+    stats = cache.stats()
+    assert (stats["expirations"], stats["invalidations"], stats["size"]) == (2, 1, 0)
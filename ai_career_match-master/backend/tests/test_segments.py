@@ -0,0 +1,89 @@
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.search.segments import SegmentedIndex
+
+BASE_DOCS = [
+    "developpeur python django api",
+    "data scientist python machine learning",
+    "comptable fiscalite audit",
+    "developpeur web javascript react",
+    "infirmier urgence hopital",
+    "ingenieur reseau cisco securite",
+]
+NEW_DOCS = [
+    "data engineer python spark sql",
+    "developpeur mobile react native javascript",
+    "auditeur interne fiscalite",
+]
+
+
+def _vectorizer(docs, vocabulary=None):
+    vectorizer = TfidfVectorizer(vocabulary=vocabulary, dtype=np.float32)
+    vectorizer.fit(docs)
+    return vectorizer
+
+
+def _unweighted(vectorizer, docs):
+    # Same as the matcher: TF-IDF rows divided by the IDF, proportional to term counts
+    return sparse.csr_matrix(vectorizer.transform(docs).multiply(1.0 / vectorizer.idf_[None, :]))
+
+
+def _segments():
+    vectorizer = _vectorizer(BASE_DOCS + NEW_DOCS)
+    base_vectorizer = _vectorizer(BASE_DOCS, vectorizer.vocabulary_)
+    segments = SegmentedIndex(base_vectorizer.transform(BASE_DOCS), base_vectorizer.idf_)
+    return segments, base_vectorizer
+
+
+def _rebuilt(docs, vocabulary):
+    vectorizer = _vectorizer(docs, vocabulary)
+    return vectorizer.transform(docs).toarray(), vectorizer.idf_
+
+
+def test_upsert_delete_compact_equals_full_rebuild():
+    segments, vectorizer = _segments()
+    # Upsert two jobs, then replace job 1 (tombstone + new row) and delete job 4
+    segments = segments.apply(_unweighted(vectorizer, NEW_DOCS[:2]))
+    segments = segments.apply(_unweighted(vectorizer, NEW_DOCS[2:]), deleted_rows=[1])
+    segments = segments.apply(deleted_rows=[4])
+    live_docs = [doc for row, doc in enumerate(BASE_DOCS + NEW_DOCS) if row not in (1, 4)]
+
+    expected_vectors, expected_idf = _rebuilt(live_docs, vectorizer.vocabulary_)
+    # Document frequencies are maintained: the IDF is already the rebuilt one before compaction
+    np.testing.assert_allclose(segments.idf(), expected_idf, rtol=1e-6)
+
+    vectors, idf, kept_rows = segments.compact()
+    assert list(kept_rows) == [0, 2, 3, 5, 6, 7, 8]
+    np.testing.assert_allclose(idf, expected_idf, rtol=1e-6)
+    np.testing.assert_allclose(vectors.toarray(), expected_vectors, atol=1e-6)
+
+
+def test_delta_rows_scored_with_refreshed_idf():
+    segments, vectorizer = _segments()
+    segments = segments.apply(_unweighted(vectorizer, NEW_DOCS))
+    expected_vectors, _ = _rebuilt(BASE_DOCS + NEW_DOCS, vectorizer.vocabulary_)
+    np.testing.assert_allclose(segments.delta_vectors().toarray(), expected_vectors[len(BASE_DOCS):], atol=1e-6)
+
+    query = vectorizer.transform(["python data"])
+    scores = segments.scores(query)
+    assert scores.shape == (len(BASE_DOCS) + len(NEW_DOCS),)
+    assert int(np.argmax(scores)) in (1, 6)
+
+
+def test_apply_leaves_previous_index_untouched():
+    segments, vectorizer = _segments()
+    updated = segments.apply(_unweighted(vectorizer, NEW_DOCS[:1]), deleted_rows=[0])
+    assert (segments.n_rows, segments.n_deleted, segments.dirty) == (6, 0, False)
+    assert (updated.n_rows, updated.n_deleted, updated.n_live) == (7, 1, 6)
+    assert segments.live.all() and not updated.live[0]
+
+
+def test_row_upserted_then_deleted_in_same_batch():
+    segments, vectorizer = _segments()
+    updated = segments.apply(_unweighted(vectorizer, NEW_DOCS[:2]), deleted_rows=[6, 6, 42])
+    assert updated.n_deleted == 1 and not updated.live[6] and updated.live[7]
+    # The deleted row's terms no longer count in the document frequencies
+    expected = segments.apply(_unweighted(vectorizer, NEW_DOCS[1:2]))
+    np.testing.assert_array_equal(updated.doc_freq, expected.doc_freq)
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from services import session_store
+from services.session_store import MemorySessionStore, SessionStore, SqliteSessionStore, create_session_store
+
+SESSION = {"original_query": "développeur python", "clarify_question": "Quelle ville ?", "timestamp": "2026-01-01T10:00:00"}
+RESULTS = {"jobs": [{"job_id": 1, "title": "Data Analyst", "score": 0.42}] * 50, "pdf": "JVBERi0xLjQK"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # clock[0]: current time of both the wall and the monotonic clock
+    clock = [1_000_000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    monkeypatch.setattr(session_store.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def _sqlite(tmp_path, **kwargs):
+    return SqliteSessionStore(str(tmp_path / "sessions.db"), **kwargs)
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_sqlite_save_and_get(tmp_path):
+    store = _sqlite(tmp_path)
+    store.save("a", dict(SESSION, extra="not stored"))
+    assert store.get("a") == SESSION
+    assert store.get("missing") is None
+    # Saving again replaces the session and drops its results
+    assert store.set_results("a", RESULTS)
+    store.save("a", dict(SESSION, original_query="comptable"))
+    assert store.get("a")["original_query"] == "comptable"
+    assert store.get_results("a") is None
+
+
+def test_sqlite_results_round_trip_compressed(tmp_path):
+    store = _sqlite(tmp_path)
+    assert not store.set_results("a", RESULTS)  # no session yet
+    store.save("a", SESSION)
+    assert store.set_results("a", RESULTS)
+    assert store.get_results("a") == RESULTS
+    stats = store.stats()
+    assert stats["backend"] == "sqlite" and stats["size"] == 1
+    assert 0 < stats["results_bytes"] < len(session_store.json.dumps(RESULTS))
+
+
+def test_sqlite_ttl_expiry(tmp_path, clock):
+    store = _sqlite(tmp_path, ttl_seconds=60)
+    store.save("a", SESSION)
+    clock[0] += 30
+    store.save("b", SESSION)
+    # set_results refreshes the write time
+    clock[0] += 20
+    assert store.set_results("a", RESULTS)
+    clock[0] += 50
+    assert store.get("a") == SESSION and store.get_results("a") == RESULTS
+    assert store.get("b") is None
+    assert not store.set_results("b", RESULTS)
+    assert store.stats()["size"] == 1
+    assert store.purge() == 1
+
+
+def test_sqlite_max_sessions_purge(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(session_store, "PURGE_EVERY", 5)
+    store = _sqlite(tmp_path, max_sessions=3)
+    for i in range(5):
+        clock[0] += 1
+        store.save(f"s{i}", SESSION)
+    # The 5th write purged the least recently written sessions
+    assert [store.get(f"s{i}") is not None for i in range(5)] == [False, False, True, True, True]
+
+
+def test_sqlite_shared_between_instances(tmp_path):
+    writer, reader = _sqlite(tmp_path), _sqlite(tmp_path)
+    writer.save("a", SESSION)
+    assert reader.get("a") == SESSION
+    assert reader.set_results("a", RESULTS)
+    assert writer.get_results("a") == RESULTS
+
+
+def test_sqlite_connections_per_thread(tmp_path):
+    store = _sqlite(tmp_path)
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(20):
+                store.save(f"{n}-{i}", SESSION)
+                assert store.set_results(f"{n}-{i}", {"n": n, "i": i})
+                assert store.get_results(f"{n}-{i}") == {"n": n, "i": i}
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.stats()["size"] == 80
+
+
+def test_memory_store_eviction_and_ttl(clock):
+    store = MemorySessionStore(max_sessions=2, ttl_seconds=60)
+    for session_id in ("a", "b", "c"):
+        clock[0] += 1
+        store.save(session_id, SESSION)
+    assert store.get("a") is None and store.stats()["evictions"] == 1
+    assert store.set_results("b", RESULTS) and store.get_results("b") == RESULTS
+    clock[0] += 61
+    assert store.get("b") is None and store.get("c") is None
+
+
+def test_create_session_store_backends(tmp_path, monkeypatch):
+    monkeypatch.setenv("ASSISTANT_SESSION_BACKEND", "sqlite")
+    monkeypatch.setenv("ASSISTANT_SESSION_DB", str(tmp_path / "db" / "sessions.db"))
+    monkeypatch.setenv("ASSISTANT_SESSION_MAX", "10")
+    store = create_session_store()
+    assert isinstance(store, SqliteSessionStore) and store.max_sessions == 10
+    monkeypatch.setenv("ASSISTANT_SESSION_BACKEND", "memory")
+    assert isinstance(create_session_store(), MemorySessionStore)
+    monkeypatch.setenv("ASSISTANT_SESSION_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        create_session_store()
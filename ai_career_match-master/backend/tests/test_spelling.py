@@ -0,0 +1,63 @@
+from services.search.spelling import SpellingCorrector, edit_distance
+
+TERMS = {"developpeur": 40, "comptable": 12, "commercial": 30, "infirmier": 8, "marketing": 25,
+         "ingenieur": 50, "python": 20, "analyste": 9, "analytique": 3}
+
+
+def _corrector(**kwargs):
+    return SpellingCorrector(TERMS, **kwargs)
+
+
+def test_edit_distance():
+    assert edit_distance("python", "python", 2) == 0
+    assert edit_distance("pyhton", "python", 2) == 1   # transposition is one edit
+    assert edit_distance("pytn", "python", 2) == 2
+    # Above max_distance: capped at max_distance + 1
+    assert edit_distance("java", "python", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_correct_one_and_two_edits():
+    corrector = _corrector()
+    assert corrector.correct("comptabel") == ("comptable", 1)
+    assert corrector.correct("commerical") == ("commercial", 1)
+    # Long tokens allow two edits, shorter ones a single edit
+    assert corrector.correct("ingenieru") == ("ingenieur", 1)
+    assert corrector.correct("ingnieru") == ("ingenieur", 2)
+    assert corrector.correct("pyhtn") is None
+
+
+def test_known_short_and_non_alpha_tokens_are_kept():
+    corrector = _corrector()
+    assert corrector.correct("python") is None
+    assert corrector.correct("pyth") is None        # under MIN_TOKEN_LENGTH
+    assert corrector.correct("python3") is None     # not alphabetic
+    assert corrector.correct("zzzzzzzz") is None    # nothing close enough
+
+
+def test_accents_map_to_index_spelling():
+    corrector = _corrector()
+    assert corrector.correct("développeur") == ("developpeur", 0)
+    assert corrector.correct("développeru") == ("developpeur", 1)
+
+
+def test_closest_then_most_frequent():
+    corrector = SpellingCorrector({"manager": 5, "managers": 50, "manage": 1})
+    # 'managr' is one edit from 'manager' and 'manage': the most frequent wins
+    assert corrector.correct("managr") == ("manager", 1)
+    corrector = SpellingCorrector({"analyste": 9, "analystes": 90})
+    assert corrector.correct("analyzte") == ("analyste", 1)
+
+
+def test_ignore_and_is_known():
+    assert _corrector(ignore=["comptabel"]).correct("comptabel") is None
+    assert _corrector(is_known=lambda token: token.startswith("comptab")).correct("comptabel") is None
+
+
+def test_correct_text():
+    text, corrections = _corrector().correct_text("devloppeur python marketting casablanca")
+    assert text == "developpeur python marketing casablanca"
+    assert corrections == [
+        {"original": "devloppeur", "corrected": "developpeur", "distance": 1},
+        {"original": "marketting", "corrected": "marketing", "distance": 1},
+    ]
@@ -0,0 +1,39 @@
+import numpy as np
+from scipy import sparse
+
+from services.search import topk
+
+
+def test_top_k_scores_best_first():
+    scores = np.array([0.2, 0.9, 0.5, 0.7])
+    assert topk.top_k_scores(scores, 2) == [(1, 0.9), (3, 0.7)]
+
+
+def test_top_k_scores_ties_lowest_index_first():
+    scores = np.array([0.5, 0.8, 0.5, 0.5, 0.8, 0.1])
+    assert [idx for idx, _ in topk.top_k_scores(scores, 4)] == [1, 4, 0, 2]
+    # The cut inside a tie keeps the lowest indexes, whatever argpartition picked
+    assert [idx for idx, _ in topk.top_k_scores(scores, 3)] == [1, 4, 0]
+
+
+def test_top_k_scores_matches_full_sort():
+    rng = np.random.default_rng(0)
+    # Coarse scores: many ties
+    scores = rng.integers(0, 20, size=500) / 20.0
+    expected = sorted((i for i in range(scores.size) if scores[i] > topk.MIN_SCORE), key=lambda i: (-scores[i], i))
+    for k in (1, 7, 50, 499, 1000):
+        assert [idx for idx, _ in topk.top_k_scores(scores, k)] == expected[:k]
+
+
+def test_top_k_scores_threshold_and_empty():
+    scores = np.array([0.005, 0.01, 0.02])
+    assert topk.top_k_scores(scores, 5) == [(2, 0.02)]
+    assert topk.top_k_scores(scores, 0) == []
+    assert topk.top_k_scores(np.array([]), 3) == []
+
+
+def test_top_k_sparse_rows_same_order_as_dense():
+    rng = np.random.default_rng(1)
+    dense = rng.integers(0, 5, size=(6, 40)) / 4.0
+    rows = topk.top_k_sparse_rows(sparse.csr_matrix(dense), 5)
+    assert rows == [topk.top_k_scores(row, 5) for row in dense]
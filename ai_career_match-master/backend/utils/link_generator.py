@@ -1,6 +1,12 @@
+import os
+from functools import lru_cache
 from urllib.parse import quote, quote_plus
 from typing import Optional
 
+# Memo of the URLs of ad-hoc titles / queries (job titles of the index are precomputed by the matcher)
+LINK_CACHE_SIZE = int(os.getenv("LINK_CACHE_SIZE", "4096"))
+
+
 class LinkGenerator:
     @staticmethod
     def generate_linkedin_url(job_title: str, location: str = "Morocco") -> str:
@@ -45,20 +51,25 @@ class LinkGenerator:
         # Use quote_plus to encode spaces as + (as required by Rekrute format)
         encoded_title = quote_plus(job_title)
         return f"https://www.rekrute.com/offres.html?st=d&keywordNew=1&jobLocation=RK&tagSearchKey=&keyword={encoded_title}"
-    
-    
-    
+
     @staticmethod
-    def generate_all_urls(job_title: str, location: str = "Morocco", job_id: Optional[str] = None) -> dict:
-        """Generate primary search URLs for a job title"""
-        # Primary link is Stagiaires.ma
-        stagiaires_url = LinkGenerator.generate_stagiaires_url(job_title, job_id)
-        # LinkedIn link (proper format, avoids login page)
-        linkedin_url = LinkGenerator.generate_linkedin_url(job_title, location)
+    def build_all_urls(job_title: str, location: str = "Morocco") -> dict:
+        """Primary search URLs for a job title, computed (not memoized: index build)"""
         return {
-            "stagiaires_url": stagiaires_url,  # Primary link - Stagiaires.ma search
-            "linkedin_url": linkedin_url,  # LinkedIn job search (direct to listings)
+            "stagiaires_url": LinkGenerator.generate_stagiaires_url(job_title),  # Primary link - Stagiaires.ma search
+            "linkedin_url": LinkGenerator.generate_linkedin_url(job_title, location),  # LinkedIn job search (direct to listings)
             "indeed_url": LinkGenerator.generate_indeed_url(job_title, location),
             "google_url": LinkGenerator.generate_google_url(job_title, location),
             "rekrute_url": LinkGenerator.generate_rekrute_url(job_title)
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def generate_all_urls(job_title: str, location: str = "Morocco", job_id: Optional[str] = None) -> dict:
+        """Generate primary search URLs for a job title (memoized, a new dict each call)"""
+        # job_id does not change the URLs: left out of the memo key
+        return dict(_memo_all_urls(job_title, location))
+
+
+@lru_cache(maxsize=LINK_CACHE_SIZE)
+def _memo_all_urls(job_title: str, location: str) -> tuple:
+    return tuple(LinkGenerator.build_all_urls(job_title, location).items())
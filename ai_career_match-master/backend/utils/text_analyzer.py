@@ -0,0 +1,89 @@
+"""
+Text Analyzer
+Shared French-aware analysis (lowercase, accent folding, punctuation, FR/EN stop words, Snowball
+stemming) used for indexing, querying and skill extraction, so every side produces the same terms
+"""
+import re
+import unicodedata
+from typing import Dict, List
+
+from nltk.stem.snowball import FrenchStemmer
+
+# Stored accent-folded, like the tokens they are compared to
+FRENCH_STOP_WORDS = frozenset([
+    "le", "la", "les", "l", "un", "une", "des", "de", "du", "d", "et", "ou", "en", "au", "aux", "a",
+    "dans", "pour", "par", "sur", "sous", "avec", "sans", "chez", "entre", "vers",
+    "ce", "cet", "cette", "ces", "c", "ca", "son", "sa", "ses", "leur", "leurs", "mon", "ma", "mes",
+    "ton", "ta", "tes", "notre", "nos", "votre", "vos", "je", "j", "tu", "il", "elle", "on", "nous",
+    "vous", "ils", "elles", "me", "m", "te", "t", "se", "s", "y", "qui", "que", "qu", "quoi", "dont",
+    "ne", "n", "pas", "plus", "est", "sont", "etre", "ont", "avoir", "etc",
+])  # no 'ai': it is also the skill (AI)
+# Function words only: a generic English list would also drop job vocabulary ('full', 'front', 'back')
+ENGLISH_STOP_WORDS = frozenset([
+    "the", "an", "and", "or", "of", "to", "in", "for", "with", "on", "at", "by", "from", "as",
+    "is", "are", "be", "this", "that", "it", "its", "i", "you", "we", "my", "your", "our",
+])
+STOP_WORDS = FRENCH_STOP_WORDS | ENGLISH_STOP_WORDS
+
+# Bound on the token -> stem memo (the job vocabulary is far smaller)
+MEMO_MAX_ENTRIES = 100000
+
+# Technology names whose punctuation is part of the name ('c++' is not 'c', '.net' is not 'net'):
+# rewritten to one word before the punctuation is stripped
+TECH_TOKENS = {
+    "c++": "cplusplus", "c#": "csharp", "f#": "fsharp", "asp.net": "aspnet", ".net": "dotnet",
+    "node.js": "nodejs", "vue.js": "vuejs", "react.js": "reactjs", "next.js": "nextjs", "nuxt.js": "nuxtjs",
+    "express.js": "expressjs", "angular.js": "angularjs", "d3.js": "d3js", "three.js": "threejs",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+# Longest first ('asp.net' before '.net'), not inside a longer word ('vb.net', 'c++11')
+_TECH_TOKENS = re.compile(
+    r"(?<![\w.])(" + "|".join(re.escape(token) for token in sorted(TECH_TOKENS, key=len, reverse=True)) + r")(?!\w)"
+)
+
+
+def fold_accents(text: str) -> str:
+    """'développeur' -> 'developpeur'"""
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents folded, technology names kept ('C++' -> 'cplusplus'), punctuation replaced by spaces, single spaces"""
+    if not text:
+        return ""
+    text = fold_accents(str(text).lower())
+    text = _TECH_TOKENS.sub(lambda match: f" {TECH_TOKENS[match.group(1)]} ", text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class TextAnalyzer:
+    def __init__(self, stop_words=STOP_WORDS, stem: bool = True, memo_size: int = MEMO_MAX_ENTRIES):
+        self.stop_words = frozenset(stop_words)
+        self.stemmer = FrenchStemmer() if stem else None
+        self.memo_size = memo_size
+        self._memo: Dict[str, str] = {}
+
+    def stem(self, token: str) -> str:
+        """Snowball stem of a normalized token, memoized: the same vocabulary comes back on every call"""
+        stemmed = self._memo.get(token)
+        if stemmed is None:
+            stemmed = self.stemmer.stem(token) if self.stemmer else token
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[token] = stemmed
+        return stemmed
+
+    def tokens(self, text: str) -> List[str]:
+        """Analyzed terms of a text: normalized, stop words removed, stemmed"""
+        return [self.stem(token) for token in normalize(text).split() if token not in self.stop_words]
+
+    def analyze(self, text: str) -> str:
+        """Analyzed terms joined by spaces, ready for the sklearn vectorizers"""
+        return " ".join(self.tokens(text))
+
+
+# Global instance
+text_analyzer = TextAnalyzer()
@@ -2,9 +2,8 @@
 Text Normalization and Skill Matching Module
 Simplified version without semantic matching
 """
-import re
 from typing import List, Dict
-from unicodedata import normalize
+from utils.text_analyzer import normalize
 
 
 class TextNormalizer:
@@ -14,30 +13,9 @@ class TextNormalizer:
     def normalize_text(text: str) -> str:
         """
         Normalize text: lowercase, remove accents, punctuation, extra spaces
+        Same rules as the search analyzer (utils/text_analyzer.py), so CV skills and job terms agree
         """
-        if not text:
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove accents
-        try:
-            text = normalize('NFD', text)
-            text = text.encode('ascii', 'ignore').decode('utf-8')
-        except:
-            pass
-        
-        # Remove punctuation
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Remove extra spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Strip leading/trailing spaces
-        text = text.strip()
-        
-        return text
+        return normalize(text)
     
     @staticmethod
     def normalize_skill(skill: str) -> str: